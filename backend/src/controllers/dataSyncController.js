@@ -493,8 +493,8 @@ exports.getSyncStatus = async (req, res) => {
       });
     }
 
-    // Get document count from ML service
-    const mlResult = await mlService.listDocuments(userId, { page: 1 });
+    // Get document count from ML service (lists are cursor-paginated; count is opt-in)
+    const mlResult = await mlService.listDocuments(userId, { include_count: true, page_size: 1, fields: 'id' });
     
     const db = req.app.locals.db || require('mongoose').connection.db;
     
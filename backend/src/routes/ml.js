@@ -86,12 +86,14 @@ router.post('/documents', mlLimiter, authenticate, async (req, res) => {
  */
 router.get('/documents', authenticate, async (req, res) => {
   try {
-    const { documentType, embeddingStatus, page } = req.query;
+    const { documentType, embeddingStatus, cursor, pageSize, fields } = req.query;
 
     const filters = {};
     if (documentType) filters.document_type = documentType;
     if (embeddingStatus) filters.embedding_status = embeddingStatus;
-    if (page) filters.page = page;
+    if (cursor) filters.cursor = cursor;
+    if (pageSize) filters.page_size = pageSize;
+    if (fields) filters.fields = fields;
 
     const result = await mlService.listDocuments(req.user.id, filters);
 
@@ -156,6 +156,85 @@ class MLService {
     }
   }
 
+  /**
+   * Run several semantic searches in one request
+   * @param {string} userId - User ID to filter results
+   * @param {Array<string|object>} queries - Query texts, or objects with
+   *   { query, topK, scoreThreshold, documentType } for per-query options
+   * @param {object} defaults - Defaults for { topK, scoreThreshold, documentType }
+   */
+  async searchSimilarBatch(userId, queries, defaults = {}) {
+    try {
+      const searches = queries.map((item) => {
+        const options = typeof item === 'string' ? { query: item } : item;
+        const search = {
+          query: options.query,
+          user_id: userId,
+        };
+
+        const topK = options.topK ?? defaults.topK;
+        const scoreThreshold = options.scoreThreshold ?? defaults.scoreThreshold;
+        const documentType = options.documentType ?? defaults.documentType;
+
+        if (topK !== undefined) search.top_k = topK;
+        if (scoreThreshold !== undefined) search.score_threshold = scoreThreshold;
+        if (documentType) search.document_type = documentType;
+
+        return search;
+      });
+
+      const response = await this.client.post('/search/batch/', { searches });
+
+      logger.info(`Ran ${searches.length} batched searches for user: ${userId}`);
+      return {
+        success: true,
+        data: response.data,
+      };
+    } catch (error) {
+      logger.error('Failed to run batch search:', error);
+      return {
+        success: false,
+        error: error.response?.data || error.message,
+      };
+    }
+  }
+
+  /**
+   * Find documents similar to existing ones ("more like this")
+   * Uses stored vectors only; no text is embedded.
+   * @param {string} userId - User ID to filter results
+   * @param {Array<string>} documentIds - Example document UUIDs
+   * @param {object} options - { negativeDocumentIds, topK, scoreThreshold, documentType, strategy }
+   */
+  async recommendSimilar(userId, documentIds, options = {}) {
+    try {
+      const payload = {
+        document_ids: documentIds,
+        user_id: userId,
+      };
+
+      if (options.negativeDocumentIds?.length) payload.negative_document_ids = options.negativeDocumentIds;
+      if (options.topK !== undefined) payload.top_k = options.topK;
+      if (options.scoreThreshold !== undefined) payload.score_threshold = options.scoreThreshold;
+      if (options.documentType) payload.document_type = options.documentType;
+      if (options.strategy) payload.strategy = options.strategy;
+
+      const response = await this.client.post('/recommend/', payload);
+
+      logger.info(`Recommended ${response.data.count} documents for user: ${userId}`);
+      return {
+        success: true,
+        data: response.data,
+      };
+    } catch (error) {
+      logger.error('Failed to get recommendations:', error);
+      return {
+        success: false,
+        error: error.response?.data || error.message,
+      };
+    }
+  }
+
   /**
    * Get document by ID
    * @param {string} documentId - Document UUID
@@ -180,7 +259,8 @@ class MLService {
   /**
    * List documents for a user
    * @param {string} userId - User ID
-   * @param {object} filters - Optional filters (document_type, embedding_status, page)
+   * @param {object} filters - Optional filters (document_type, embedding_status),
+   *   paging (cursor, page_size, include_count) and fields (comma-separated)
    */
   async listDocuments(userId, filters = {}) {
     try {
@@ -0,0 +1,36 @@
+"""
+Synthetic journal-style texts for parity checks and benchmarks
+"""
+import random
+from typing import List
+
+SENTENCES = [
+    "Today I felt grateful for the small moments of joy.",
+    "I'm feeling anxious about my future and the decisions ahead of me.",
+    "The full moon made me restless, I couldn't sleep until 3am.",
+    "Had a long talk with my sister about forgiveness and letting go.",
+    "Work was overwhelming but I managed to finish the presentation.",
+    "I want to spend more time outdoors and less time on my phone.",
+    "Meditation this morning helped me stay calm during the meeting.",
+    "I keep dreaming about the ocean, maybe it means I need a change.",
+    "Feeling proud that I stuck to my running plan for three weeks.",
+    "Mercury retrograde again, every conversation feels misunderstood.",
+    "Não consegui dormir bem, mas o dia foi tranquilo e produtivo.",
+    "Hoy me sentí más conectado con mis amigos que nunca.",
+    "My goal for this month is to read two books and journal daily.",
+    "I noticed a pattern: I get irritable when I skip breakfast.",
+    "The conversation with my manager went better than I expected.",
+    "Sometimes I wonder if I'm on the right path at all.",
+]
+
+
+def synthetic_texts(count: int, words: int = 60, seed: int = 42) -> List[str]:
+    """Build `count` texts of roughly `words` words each"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        parts = []
+        while sum(len(p.split()) for p in parts) < words:
+            parts.append(rng.choice(SENTENCES))
+        texts.append(' '.join(parts))
+    return texts
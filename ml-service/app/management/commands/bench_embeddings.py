@@ -0,0 +1,214 @@
+"""
+Management command to benchmark embedding throughput and latency
+"""
+import json
+import platform
+import resource
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from app.services.embedding_backends import BACKENDS, create_backend
+from app.services.embedding_service import EmbeddingService, backend_options_from_settings
+from app.services.memory_report import get_memory_report
+from ._corpus import synthetic_texts
+
+
+def _int_list(value: str):
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def _set_torch_threads(threads: int):
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark EmbeddingService across backends, thread counts, batch sizes and text lengths; '
+        'optionally compare against a saved baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backends', default=settings.EMBEDDING_BACKEND,
+                            help=f"Comma-separated backends ({', '.join(BACKENDS)})")
+        parser.add_argument('--threads', default='',
+                            help='Comma-separated intra-op thread counts (default: current setting)')
+        parser.add_argument('--batch-sizes', default='1,8,32,128', help='Texts per encode call')
+        parser.add_argument('--lengths', default='16,64,256', help='Approximate words per synthetic text')
+        parser.add_argument('--journal-samples', type=int, default=0,
+                            help='Also benchmark this many journal entries sampled from MongoDB')
+        parser.add_argument('--samples', type=int, default=256, help='Texts per configuration')
+        parser.add_argument('--repeats', type=int, default=3, help='Timed passes over the texts')
+        parser.add_argument('--output', help='Write results as JSON to this path (e.g. a new baseline)')
+        parser.add_argument('--baseline', help='Compare against a JSON file written with --output')
+        parser.add_argument('--tolerance', type=float, default=0.10,
+                            help='Allowed relative throughput drop / p95 increase against the baseline')
+
+    def handle(self, *args, **options):
+        backends = [n.strip() for n in options['backends'].split(',') if n.strip()]
+        unknown = set(backends) - set(BACKENDS)
+        if unknown:
+            raise CommandError(f"Unknown backends: {', '.join(sorted(unknown))}")
+
+        corpora = {
+            str(words): synthetic_texts(options['samples'], words=words)
+            for words in _int_list(options['lengths'])
+        }
+        if options['journal_samples']:
+            corpora['journal'] = self._journal_texts(options['journal_samples'])
+
+        threads_list = _int_list(options['threads']) or [settings.EMBEDDING_NUM_THREADS]
+        batch_sizes = _int_list(options['batch_sizes'])
+
+        results = []
+        service = EmbeddingService()
+        previous_model = EmbeddingService._model
+        try:
+            # Uncached, so repeated passes measure the model and not Redis
+            with override_settings(EMBEDDING_CACHE_ENABLED=False):
+                for backend_name in backends:
+                    for threads in threads_list:
+                        self.stdout.write(f"Loading {backend_name} backend ({threads or 'default'} threads)...")
+                        if threads:
+                            _set_torch_threads(threads)
+                        EmbeddingService._model = create_backend(
+                            backend_name,
+                            settings.EMBEDDING_MODEL,
+                            settings.MAX_SEQUENCE_LENGTH,
+                            **{**backend_options_from_settings(), 'num_threads': threads}
+                        ).load()
+
+                        for length, texts in corpora.items():
+                            for batch_size in batch_sizes:
+                                results.append({
+                                    'backend': backend_name,
+                                    'threads': threads,
+                                    'length': length,
+                                    'batch_size': batch_size,
+                                    **self._run(service, texts, batch_size, options['repeats']),
+                                })
+        finally:
+            EmbeddingService._model = previous_model
+
+        self._print_table(results)
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'model': settings.EMBEDDING_MODEL,
+            'host': platform.node(),
+            'python': platform.python_version(),
+            'samples': options['samples'],
+            'repeats': options['repeats'],
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            self._compare(results, options['baseline'], options['tolerance'])
+
+    def _journal_texts(self, limit: int):
+        from app.services.mongo_service import MongoService
+
+        entries = MongoService().get_journal_entries(limit=limit)
+        texts = [e.get('content', '') or e.get('text', '') for e in entries]
+        texts = [t for t in texts if t]
+        if not texts:
+            raise CommandError('No journal entries with text found in MongoDB')
+        return texts
+
+    def _run(self, service: EmbeddingService, texts, batch_size: int, repeats: int):
+        """Time `generate_embeddings_bulk` one batch at a time"""
+        model = service.get_model()
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        tokens = sum(
+            len(ids) for ids in model.tokenizer(
+                texts, truncation=True, max_length=model.max_seq_length
+            )['input_ids']
+        )
+
+        service.generate_embeddings_bulk(batches[0])  # Warm up
+
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(repeats):
+            for batch in batches:
+                batch_started = time.perf_counter()
+                service.generate_embeddings_bulk(batch)
+                latencies.append(time.perf_counter() - batch_started)
+        elapsed = time.perf_counter() - started
+
+        p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+        memory = get_memory_report()
+        return {
+            'texts': len(texts),
+            'p50_ms': round(float(p50), 2),
+            'p95_ms': round(float(p95), 2),
+            'p99_ms': round(float(p99), 2),
+            'texts_per_sec': round(len(texts) * repeats / elapsed, 1),
+            'tokens_per_sec': round(tokens * repeats / elapsed, 1),
+            # ru_maxrss is a process-wide high-water mark, so it only grows across rows
+            'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'rss_mb': memory.get('rss_mb'),
+        }
+
+    def _print_table(self, results):
+        self.stdout.write('')
+        self.stdout.write(
+            f"{'backend':<10}{'thr':>4}{'length':>8}{'batch':>7}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'p99 ms':>10}{'texts/s':>10}{'tokens/s':>11}{'peak MB':>9}"
+        )
+        for r in results:
+            self.stdout.write(
+                f"{r['backend']:<10}{r['threads'] or '-':>4}{r['length']:>8}{r['batch_size']:>7}"
+                f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+                f"{r['texts_per_sec']:>10.1f}{r['tokens_per_sec']:>11.1f}{r['peak_rss_mb']:>9.1f}"
+            )
+
+    def _compare(self, results, baseline_path: str, tolerance: float):
+        """Fail if any configuration is slower than the baseline beyond `tolerance`"""
+        try:
+            with open(baseline_path) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read baseline {baseline_path}: {e}")
+
+        def key(r):
+            return (r['backend'], r['threads'], str(r['length']), r['batch_size'])
+
+        previous = {key(r): r for r in baseline.get('results', [])}
+
+        self.stdout.write('')
+        self.stdout.write(f"Compared with {baseline_path} ({baseline.get('created_at', 'unknown date')}):")
+
+        regressions = []
+        for r in results:
+            base = previous.get(key(r))
+            if base is None:
+                continue
+            throughput = r['texts_per_sec'] / base['texts_per_sec'] - 1
+            p95 = r['p95_ms'] / base['p95_ms'] - 1
+            label = '/'.join(str(part) for part in key(r))
+            line = f"  {label:<32} texts/s {throughput:+7.1%}   p95 {p95:+7.1%}"
+            if throughput < -tolerance or p95 > tolerance:
+                regressions.append(label)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} configuration(s) regressed by more than {tolerance:.0%}: "
+                f"{', '.join(regressions)}"
+            )
+        self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
@@ -0,0 +1,163 @@
+"""
+Management command to compare REST and gRPC Qdrant transports
+"""
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from qdrant_client.models import (
+    Distance, FieldCondition, Filter, MatchValue, PointStruct, VectorParams
+)
+
+from app.services.qdrant_service import QdrantService
+
+
+def _percentiles(latencies):
+    p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+    return {'p50_ms': round(float(p50), 2), 'p95_ms': round(float(p95), 2), 'p99_ms': round(float(p99), 2)}
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark Qdrant upsert and search over REST and gRPC at EMBEDDING_DIMENSION, '
+        'using a throwaway collection'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transports', default='rest,grpc', help='Comma-separated: rest, grpc')
+        parser.add_argument('--points', type=int, default=20000, help='Points to upsert')
+        parser.add_argument('--batch-size', type=int, default=256, help='Points per upsert request')
+        parser.add_argument('--queries', type=int, default=500, help='Search requests')
+        parser.add_argument('--top-k', type=int, default=10)
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Concurrent requests (threads sharing one client)')
+        parser.add_argument('--users', type=int, default=50,
+                            help='Distinct user_id payload values; searches filter on one')
+        parser.add_argument('--output', help='Write results as JSON to this path')
+
+    def handle(self, *args, **options):
+        transports = [t.strip() for t in options['transports'].split(',') if t.strip()]
+        unknown = set(transports) - {'rest', 'grpc'}
+        if unknown:
+            raise CommandError(f"Unknown transports: {', '.join(sorted(unknown))}")
+
+        dimension = settings.EMBEDDING_DIMENSION
+        rng = np.random.default_rng(42)
+        vectors = rng.standard_normal((options['points'], dimension), dtype=np.float32)
+        queries = rng.standard_normal((options['queries'], dimension), dtype=np.float32)
+
+        results = []
+        for transport in transports:
+            client = QdrantService().create_client(prefer_grpc=transport == 'grpc')
+            collection = f"bench_{transport}_{uuid.uuid4().hex[:8]}"
+            self.stdout.write(f"Benchmarking {transport} on {collection}...")
+
+            client.create_collection(
+                collection_name=collection,
+                vectors_config=VectorParams(size=dimension, distance=Distance.COSINE)
+            )
+            try:
+                results.append({
+                    'transport': transport,
+                    'operation': 'upsert',
+                    **self._bench_upsert(client, collection, vectors, options)
+                })
+                for filtered in (False, True):
+                    results.append({
+                        'transport': transport,
+                        'operation': 'search+filter' if filtered else 'search',
+                        **self._bench_search(client, collection, queries, filtered, options)
+                    })
+            finally:
+                client.delete_collection(collection_name=collection)
+                client.close()
+
+        self.stdout.write('')
+        self.stdout.write(
+            f"{'transport':<10}{'operation':<15}{'requests':>9}{'req/s':>10}{'items/s':>11}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        )
+        for r in results:
+            self.stdout.write(
+                f"{r['transport']:<10}{r['operation']:<15}{r['requests']:>9}{r['requests_per_sec']:>10.1f}"
+                f"{r['items_per_sec']:>11.1f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    'qdrant_url': settings.QDRANT_URL,
+                    'dimension': dimension,
+                    'concurrency': options['concurrency'],
+                    'results': results,
+                }, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def _timed(self, fn, jobs, concurrency):
+        """Run fn over jobs, returning (per-call latencies, wall time)"""
+        def run(job):
+            started = time.perf_counter()
+            fn(job)
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                latencies = list(executor.map(run, jobs))
+        else:
+            latencies = [run(job) for job in jobs]
+        return latencies, time.perf_counter() - started
+
+    def _bench_upsert(self, client, collection, vectors, options):
+        batch_size = options['batch_size']
+        users = options['users']
+        batches = [
+            [
+                PointStruct(
+                    id=start + i,
+                    vector=vector,
+                    payload={'user_id': str((start + i) % users), 'document_type': 'journal_entry'}
+                )
+                for i, vector in enumerate(vectors[start:start + batch_size].tolist())
+            ]
+            for start in range(0, len(vectors), batch_size)
+        ]
+
+        latencies, elapsed = self._timed(
+            lambda batch: client.upsert(collection_name=collection, points=batch, wait=True),
+            batches,
+            options['concurrency']
+        )
+        return {
+            'requests': len(batches),
+            'requests_per_sec': round(len(batches) / elapsed, 1),
+            'items_per_sec': round(len(vectors) / elapsed, 1),
+            **_percentiles(latencies),
+        }
+
+    def _bench_search(self, client, collection, queries, filtered, options):
+        query_filter = None
+        if filtered:
+            query_filter = Filter(must=[FieldCondition(key='user_id', match=MatchValue(value='0'))])
+
+        def search(query):
+            client.search(
+                collection_name=collection,
+                query_vector=query,
+                limit=options['top_k'],
+                query_filter=query_filter
+            )
+
+        jobs = queries.tolist()
+        search(jobs[0])  # Warm up
+        latencies, elapsed = self._timed(search, jobs, options['concurrency'])
+        return {
+            'requests': len(jobs),
+            'requests_per_sec': round(len(jobs) / elapsed, 1),
+            'items_per_sec': round(len(jobs) * options['top_k'] / elapsed, 1),
+            **_percentiles(latencies),
+        }
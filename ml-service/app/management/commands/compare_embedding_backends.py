@@ -0,0 +1,87 @@
+"""
+Management command to check parity and speed of embedding backends
+"""
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.services.embedding_backends import BACKENDS, create_backend
+from app.services.embedding_service import backend_options_from_settings
+from ._corpus import synthetic_texts
+
+
+class Command(BaseCommand):
+    help = 'Compare torch/onnx/onnx-int8 embedding backends for numerical parity and throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backends', default=','.join(BACKENDS),
+                            help='Comma-separated backends to compare against torch')
+        parser.add_argument('--samples', type=int, default=256, help='Number of texts')
+        parser.add_argument('--words', type=int, default=80, help='Approximate words per text')
+        parser.add_argument('--batch-size', type=int, default=32)
+        parser.add_argument('--repeats', type=int, default=3, help='Timed passes per backend')
+        parser.add_argument('--min-cosine', type=float, default=0.99,
+                            help='Fail if any vector is less similar than this to its torch counterpart')
+
+    def handle(self, *args, **options):
+        names = [n.strip() for n in options['backends'].split(',') if n.strip()]
+        unknown = set(names) - set(BACKENDS)
+        if unknown:
+            raise CommandError(f"Unknown backends: {', '.join(sorted(unknown))}")
+        if 'torch' not in names:
+            names.insert(0, 'torch')
+
+        texts = synthetic_texts(options['samples'], words=options['words'])
+        batch_size = options['batch_size']
+
+        results = {}
+        for name in names:
+            self.stdout.write(f"Loading {name} backend...")
+            backend = create_backend(
+                name,
+                settings.EMBEDDING_MODEL,
+                settings.MAX_SEQUENCE_LENGTH,
+                **backend_options_from_settings()
+            ).load()
+
+            backend.encode(texts[:batch_size], batch_size=batch_size)  # Warm up
+
+            timings = []
+            for _ in range(options['repeats']):
+                started = time.perf_counter()
+                vectors = backend.encode(texts, batch_size=batch_size)
+                timings.append(time.perf_counter() - started)
+
+            results[name] = {
+                'vectors': np.asarray(vectors, dtype=np.float32),
+                'seconds': min(timings),
+            }
+
+        reference = results['torch']
+        ref_unit = reference['vectors'] / np.linalg.norm(reference['vectors'], axis=1, keepdims=True)
+
+        self.stdout.write('')
+        self.stdout.write(f"{'backend':<12}{'texts/s':>10}{'speedup':>9}{'min cos':>10}{'mean cos':>10}{'max |diff|':>12}")
+
+        failed = []
+        for name, result in results.items():
+            vectors = result['vectors']
+            unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+            cosines = np.sum(unit * ref_unit, axis=1)
+            max_diff = float(np.max(np.abs(vectors - reference['vectors'])))
+            throughput = len(texts) / result['seconds']
+            speedup = reference['seconds'] / result['seconds']
+
+            self.stdout.write(
+                f"{name:<12}{throughput:>10.1f}{speedup:>8.2f}x{cosines.min():>10.5f}{cosines.mean():>10.5f}{max_diff:>12.6f}"
+            )
+            if cosines.min() < options['min_cosine']:
+                failed.append(name)
+
+        if failed:
+            raise CommandError(
+                f"Parity check failed for {', '.join(failed)} (min cosine < {options['min_cosine']})"
+            )
+        self.stdout.write(self.style.SUCCESS('All backends within tolerance'))
@@ -0,0 +1,44 @@
+"""
+Management command to apply the configured Qdrant collection schema
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.services.qdrant_service import QdrantService
+
+
+class Command(BaseCommand):
+    help = (
+        'Create the embeddings collection or migrate it to the schema in settings '
+        '(HNSW, replication, payload indexes)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--collection', default=settings.QDRANT_COLLECTION_EMBEDDINGS)
+        parser.add_argument('--dry-run', action='store_true', help='Only print what would change')
+
+    def handle(self, *args, **options):
+        qdrant_service = QdrantService()
+        client = qdrant_service.get_client()
+        collection = options['collection']
+
+        if not client.collection_exists(collection):
+            if options['dry_run']:
+                self.stdout.write(f"Collection {collection} does not exist and would be created")
+                return
+            qdrant_service.initialize_collection(collection)
+            self.stdout.write(self.style.SUCCESS(f"Created {collection}"))
+            return
+
+        changes = qdrant_service.migrate_collection(collection, dry_run=options['dry_run'])
+        if not changes:
+            self.stdout.write(self.style.SUCCESS(f"{collection} already matches the configured schema"))
+            return
+
+        verb = 'Would apply' if options['dry_run'] else 'Applied'
+        for change in changes:
+            self.stdout.write(f"{verb}: {change}")
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Migrated {collection}; Qdrant rebuilds affected indexes in the background"
+            ))
@@ -0,0 +1,129 @@
+"""
+Management command to measure recall and latency of quantized search
+"""
+import json
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from qdrant_client.models import FieldCondition, Filter, MatchValue, QuantizationSearchParams, SearchParams
+
+from app.services.qdrant_service import QdrantService
+
+
+class Command(BaseCommand):
+    help = (
+        'Recall@k and latency of quantized search (per oversampling / rescore setting) '
+        'against exact search over the original vectors'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--collection', default=settings.QDRANT_COLLECTION_EMBEDDINGS)
+        parser.add_argument('--queries', type=int, default=200,
+                            help='Stored points used as queries (each excluded from its own results)')
+        parser.add_argument('--top-k', type=int, default=10)
+        parser.add_argument('--oversampling', default='1,1.5,2,3', help='Comma-separated values to try')
+        parser.add_argument('--per-user', action='store_true',
+                            help="Filter each query on its point's user_id, like production searches")
+        parser.add_argument('--output', help='Write results as JSON to this path')
+
+    def handle(self, *args, **options):
+        client = QdrantService().get_client()
+        collection = options['collection']
+        if not client.collection_exists(collection):
+            raise CommandError(f"Collection {collection} does not exist")
+
+        info = client.get_collection(collection)
+        quantization = info.config.quantization_config
+        if quantization is None:
+            self.stdout.write(self.style.WARNING(
+                f"{collection} is not quantized; quantized rows will match plain HNSW"
+            ))
+
+        points, _ = client.scroll(
+            collection_name=collection,
+            limit=options['queries'],
+            with_payload=['user_id'],
+            with_vectors=True
+        )
+        if not points:
+            raise CommandError(f"Collection {collection} is empty")
+
+        k = options['top_k']
+        configs = [('exact', SearchParams(exact=True)), ('hnsw', SearchParams(
+            quantization=QuantizationSearchParams(ignore=True)
+        ))]
+        for oversampling in [float(v) for v in options['oversampling'].split(',') if v.strip()]:
+            for rescore in (False, True):
+                configs.append((
+                    f"quant x{oversampling:g}{' +rescore' if rescore else ''}",
+                    SearchParams(quantization=QuantizationSearchParams(
+                        rescore=rescore, oversampling=oversampling
+                    ))
+                ))
+
+        runs = {name: self._run(client, collection, points, params, k, options['per_user']) for name, params in configs}
+        truth = runs['exact']['ids']
+
+        results = []
+        for name, run in runs.items():
+            recalls = [
+                len(set(found) & set(expected)) / len(expected)
+                for found, expected in zip(run['ids'], truth)
+                if expected
+            ]
+            p50, p95, p99 = np.percentile(np.asarray(run['latencies']) * 1000, [50, 95, 99])
+            results.append({
+                'config': name,
+                'recall': round(float(np.mean(recalls)), 4) if recalls else None,
+                'p50_ms': round(float(p50), 2),
+                'p95_ms': round(float(p95), 2),
+                'p99_ms': round(float(p99), 2),
+            })
+
+        self.stdout.write('')
+        self.stdout.write(
+            f"Collection {collection}: {info.points_count} points, quantization="
+            f"{quantization.model_dump(exclude_none=True) if quantization else 'none'}, "
+            f"{len(points)} queries, recall@{k}"
+        )
+        self.stdout.write(f"{'config':<24}{'recall':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for r in results:
+            recall = f"{r['recall']:.4f}" if r['recall'] is not None else '-'
+            self.stdout.write(f"{r['config']:<24}{recall:>8}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    'collection': collection,
+                    'points': info.points_count,
+                    'quantization': quantization.model_dump(mode='json') if quantization else None,
+                    'top_k': k,
+                    'queries': len(points),
+                    'results': results,
+                }, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def _run(self, client, collection, points, params, k, per_user):
+        """Search every query point with `params`, dropping the point itself"""
+        ids, latencies = [], []
+        for point in points:
+            query_filter = None
+            if per_user and point.payload.get('user_id') is not None:
+                query_filter = Filter(must=[
+                    FieldCondition(key='user_id', match=MatchValue(value=point.payload['user_id']))
+                ])
+
+            started = time.perf_counter()
+            hits = client.search(
+                collection_name=collection,
+                query_vector=point.vector,
+                query_filter=query_filter,
+                limit=k + 1,
+                search_params=params,
+                with_payload=False
+            )
+            latencies.append(time.perf_counter() - started)
+            ids.append([hit.id for hit in hits if hit.id != point.id][:k])
+        return {'ids': ids, 'latencies': latencies}
@@ -0,0 +1,114 @@
+"""
+Management command to re-embed all documents into a new collection and switch to it
+"""
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from app.models import Experiment
+from app.services.qdrant_service import QdrantService
+from app.services.reembedding import active_reembedding, start_reembedding, switch_reembedding
+from app.tasks import reembed_collection_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Blue/green re-embedding: backfill a new versioned collection with another model '
+        '(start / status / resume), then atomically point the live alias at it (switch)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['start', 'status', 'resume', 'switch', 'cancel'])
+        parser.add_argument('--experiment', help='Run to act on (default: the running one, or the latest for status)')
+        parser.add_argument('--model', default=settings.EMBEDDING_MODEL, help='Target model (start)')
+        parser.add_argument('--dimension', type=int, default=settings.EMBEDDING_DIMENSION, help='Target vector size (start)')
+        parser.add_argument('--backend', default=settings.EMBEDDING_BACKEND, help='Target embedding backend (start)')
+        parser.add_argument('--batch-size', type=int, default=settings.REEMBED_BATCH_SIZE)
+        parser.add_argument('--throttle', type=float, default=settings.REEMBED_THROTTLE_SECONDS,
+                            help='Seconds between backfill batches')
+        parser.add_argument('--force', action='store_true',
+                            help='Switch despite documents without text')
+
+    def handle(self, *args, **options):
+        getattr(self, f"handle_{options['action']}")(options)
+
+    def get_experiment(self, options, running: bool = True) -> Experiment:
+        runs = Experiment.objects.filter(experiment_type='reembedding')
+        if options['experiment']:
+            experiment = runs.filter(id=options['experiment']).first()
+        elif running:
+            experiment = active_reembedding(refresh=True)
+        else:
+            experiment = runs.first()
+        if experiment is None:
+            raise CommandError('No matching re-embedding run')
+        return experiment
+
+    def queue_batch(self, experiment: Experiment):
+        reembed_collection_batch.apply_async((str(experiment.id),), queue=settings.REEMBED_QUEUE or None)
+
+    def handle_start(self, options):
+        try:
+            experiment = start_reembedding(
+                model_name=options['model'],
+                dimension=options['dimension'],
+                backend=options['backend'],
+                batch_size=options['batch_size'],
+                throttle_seconds=options['throttle']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.queue_batch(experiment)
+        self.stdout.write(self.style.SUCCESS(
+            f"Started re-embedding {experiment.id}: {experiment.metrics['total']} documents into "
+            f"{experiment.config['target_collection']}"
+        ))
+
+    def handle_status(self, options):
+        experiment = self.get_experiment(options, running=False)
+        self.stdout.write(f"{experiment.name} [{experiment.id}] status={experiment.status}")
+        self.stdout.write(json.dumps({'config': experiment.config, 'metrics': experiment.metrics}, indent=2))
+        if experiment.error_message:
+            self.stdout.write(self.style.WARNING(f"Last error: {experiment.error_message}"))
+
+    def check_running(self, experiment: Experiment, action: str):
+        if experiment.status != 'running' or experiment.metrics.get('switched_at'):
+            raise CommandError(f"Cannot {action} {experiment.id}: it is {experiment.status}, not running")
+
+    def handle_resume(self, options):
+        experiment = self.get_experiment(options)
+        self.check_running(experiment, 'resume')
+        if experiment.metrics.get('backfill_completed_at'):
+            raise CommandError(f"{experiment.id} has finished its backfill; run `reembed_collection switch`")
+        Experiment.objects.filter(id=experiment.id).update(error_message='')
+        self.queue_batch(experiment)
+        self.stdout.write(self.style.SUCCESS(
+            f"Resumed {experiment.id} after {experiment.metrics.get('processed', 0)} documents"
+        ))
+
+    def handle_switch(self, options):
+        experiment = self.get_experiment(options)
+        try:
+            previous = switch_reembedding(experiment, force=options['force'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"{experiment.config['alias']} now serves {experiment.config['target_collection']}"
+        ))
+        self.stdout.write(f"Drop {previous} once the new collection is verified")
+
+    def handle_cancel(self, options):
+        experiment = self.get_experiment(options)
+        self.check_running(experiment, 'cancel')
+        target = experiment.config['target_collection']
+        # Never drop the collection searches are served from
+        if QdrantService().resolve_alias(experiment.config['alias']) == target:
+            raise CommandError(f"Cannot cancel {experiment.id}: {experiment.config['alias']} serves {target}")
+        experiment.status = 'failed'
+        experiment.error_message = 'Cancelled'
+        experiment.completed_at = timezone.now()
+        experiment.save(update_fields=['status', 'error_message', 'completed_at'])
+        QdrantService().get_client().delete_collection(target)
+        self.stdout.write(self.style.SUCCESS(f"Cancelled {experiment.id} and dropped {target}"))
@@ -0,0 +1,44 @@
+"""
+Management command to copy document fields into the payload of their chunk vectors
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.models import Document
+from app.services.qdrant_service import QdrantService, document_payload
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the denormalized document fields used by payload-projected searches '
+        'to every indexed document (for vectors stored before they were added)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--collection', default=settings.QDRANT_COLLECTION_EMBEDDINGS)
+        parser.add_argument('--user-id', help='Only documents of this user')
+        parser.add_argument('--batch-size', type=int, default=256, help='Documents per Qdrant request')
+
+    def handle(self, *args, **options):
+        qdrant_service = QdrantService()
+        queryset = Document.objects.filter(embedding_status='completed').order_by('id')
+        if options['user_id']:
+            queryset = queryset.filter(user_id=options['user_id'])
+
+        synced = 0
+        user_ids = set()
+        batch = {}
+        for doc in queryset.iterator(chunk_size=options['batch_size']):
+            batch[str(doc.id)] = document_payload(doc)
+            user_ids.add(doc.user_id)
+            if len(batch) == options['batch_size']:
+                qdrant_service.set_document_payloads(batch, collection_name=options['collection'])
+                synced += len(batch)
+                batch = {}
+                self.stdout.write(f"Synced {synced} documents")
+        qdrant_service.set_document_payloads(batch, collection_name=options['collection'])
+        synced += len(batch)
+
+        # Cached vectors and search responses carry the old payloads
+        qdrant_service.invalidate_users(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Synced payloads of {synced} documents in {options['collection']}"))
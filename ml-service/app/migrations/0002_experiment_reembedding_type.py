@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='experiment',
+            name='experiment_type',
+            field=models.CharField(choices=[('embedding', 'Embedding Generation'), ('clustering', 'Pattern Clustering'), ('classification', 'Text Classification'), ('training', 'Model Training'), ('reembedding', 'Collection Re-embedding')], default='embedding', max_length=50),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_experiment_reembedding_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['created_at', 'id'], name='documents_created_1930e1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['user_id', 'created_at', 'id'], name='documents_user_id_4e86f3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='embedding',
+            index=models.Index(fields=['created_at', 'id'], name='embeddings_created_c9bbe3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experiment',
+            index=models.Index(fields=['created_at', 'id'], name='experiments_created_6b2d67_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experiment',
+            index=models.Index(fields=['project_id', 'created_at', 'id'], name='experiments_project_788df7_idx'),
+        ),
+    ]
@@ -37,6 +37,9 @@ class Document(models.Model):
         indexes = [
             models.Index(fields=['user_id', 'document_type']),
             models.Index(fields=['embedding_status', 'created_at']),
+            # Keyset pagination on (created_at, id), overall and per user
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['user_id', 'created_at', 'id']),
         ]
     
     def __str__(self):
@@ -56,6 +59,9 @@ class Embedding(models.Model):
     class Meta:
         db_table = 'embeddings'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"Embedding for {self.document.title}"
@@ -74,6 +80,7 @@ class Experiment(models.Model):
             ('clustering', 'Pattern Clustering'),
             ('classification', 'Text Classification'),
             ('training', 'Model Training'),
+            ('reembedding', 'Collection Re-embedding'),
         ],
         default='embedding'
     )
@@ -100,6 +107,10 @@ class Experiment(models.Model):
     class Meta:
         db_table = 'experiments'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['project_id', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.status})"
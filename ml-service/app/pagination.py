@@ -0,0 +1,123 @@
+"""
+Keyset pagination for list endpoints
+
+Pages are addressed by an opaque cursor holding the (created_at, id) of
+the row they start after, so a deep page costs one index range scan
+instead of an OFFSET over every earlier row, and no COUNT(*) runs per
+request.
+"""
+import uuid
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.response import Response
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Newest first, by (created_at, id)
+
+    DRF's CursorPagination positions on the first ordering field only and
+    steps over equal values with an OFFSET; here the position is the whole
+    (created_at, id) key, which is unique, so pages never need an offset.
+
+    Query params: `cursor` (from `next` / `previous`), `page_size` (up to
+    `max_page_size`) and `include_count=true`, which adds the total
+    `count` at the price of a COUNT(*).
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = queryset.count() if request.query_params.get('include_count', '').lower() in ('1', 'true') else None
+
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            _, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by('created_at', 'id')
+        else:
+            queryset = queryset.order_by('-created_at', '-id')
+
+        if current_position is not None:
+            created_at, pk = self._parse_position(current_position)
+            if reverse:
+                queryset = queryset.filter(created_at__gte=created_at).filter(
+                    Q(created_at__gt=created_at) | Q(id__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(created_at__lte=created_at).filter(
+                    Q(created_at__lt=created_at) | Q(id__lt=pk)
+                )
+
+        # One extra row tells whether another page follows
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = current_position is not None, has_following_position
+        else:
+            self.has_next, self.has_previous = has_following_position, current_position is not None
+
+        # Links continue strictly after the last row shown / before the first
+        if self.page:
+            self.next_position = self._get_position_from_instance(self.page[-1], self.ordering)
+            self.previous_position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            self.next_position = self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.previous_position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, dict):
+            return f"{instance['created_at'].isoformat()}|{instance['id']}"
+        return f"{instance.created_at.isoformat()}|{instance.pk}"
+
+    def _parse_position(self, position):
+        created_at, _, pk = position.partition('|')
+        try:
+            created_at, pk = parse_datetime(created_at), uuid.UUID(pk)
+        except ValueError:
+            created_at = None
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+    def get_paginated_response(self, data):
+        response = {'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data}
+        if self.count is not None:
+            response['count'] = self.count
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['count'] = {'type': 'integer', 'example': 123}
+        return schema
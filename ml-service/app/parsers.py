@@ -0,0 +1,35 @@
+"""
+Streaming request parsers
+
+Views opt in through `parser_classes`; JSON stays the default.
+"""
+import json
+
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+
+class NDJSONParser(parsers.BaseParser):
+    """
+    Newline-delimited JSON, one value per line
+
+    Returns a lazy iterator that reads the request stream line by line, so
+    a large upload is never held in memory as a whole. Blank lines are
+    skipped; a line that is not valid JSON is yielded as a `ParseError`
+    instance instead of aborting the request, so views can report it per item.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        return self._iter_lines(stream, encoding) if stream is not None else iter(())
+
+    def _iter_lines(self, stream, encoding):
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line.decode(encoding))
+            except ValueError as e:
+                yield ParseError(f"Line {line_number}: {e}")
@@ -0,0 +1,51 @@
+"""
+Binary renderers for vector-returning endpoints
+
+Views opt in through `renderer_classes` and shape their payload on
+`request.accepted_renderer.format`; JSON stays the default.
+"""
+from rest_framework import renderers
+
+from .services.vector_codec import encode_vectors
+
+
+class VectorOctetStreamRenderer(renderers.BaseRenderer):
+    """
+    Raw little-endian vector bytes
+
+    Expects `{'vectors': ndarray, 'dtype': str}`; the shape and dtype are sent
+    as `X-Embedding-Shape` / `X-Embedding-Dtype` headers. Error responses
+    (plain dicts without vectors) fall back to JSON, labelled as such.
+    """
+    media_type = 'application/octet-stream'
+    format = 'bin'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if not isinstance(data, dict) or 'vectors' not in data:
+            if response is not None:
+                response['Content-Type'] = 'application/json'
+            return renderers.JSONRenderer().render(data)
+
+        vectors, dtype = data['vectors'], data.get('dtype', 'float32')
+        if response is not None:
+            response['X-Embedding-Shape'] = ','.join(str(n) for n in vectors.shape)
+            response['X-Embedding-Dtype'] = dtype
+        return encode_vectors(vectors, dtype)
+
+
+class MsgPackRenderer(renderers.BaseRenderer):
+    """MessagePack; bytes values (e.g. raw vectors) are sent as bin fields"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        import msgpack
+
+        if data is None:
+            return b''
+        return msgpack.packb(data, use_bin_type=True, default=str)
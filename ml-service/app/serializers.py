@@ -3,9 +3,20 @@ DRF Serializers for API
 """
 from rest_framework import serializers
 from .models import Document, Embedding, Experiment
+from .services.qdrant_service import DOCUMENT_PAYLOAD_FIELDS
 
 
-class DocumentSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Accepts `fields=[...]` to serialize only those fields (see `SparseFieldsetMixin`)"""
+    
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class DocumentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Document model"""
     
     text = serializers.CharField(write_only=True, required=False)  # For creating with text
@@ -32,7 +43,23 @@ class DocumentSerializer(serializers.ModelSerializer):
         return document
 
 
-class EmbeddingSerializer(serializers.ModelSerializer):
+class DocumentIngestSerializer(DocumentSerializer):
+    """
+    Validates one item of a bulk ingestion (see `services.ingestion`)
+    
+    mongo_id uniqueness is checked for a whole batch in one query, so the
+    per-item UniqueValidator is dropped. A blank mongo_id is stored as NULL,
+    which the unique constraint allows any number of times.
+    """
+    
+    class Meta(DocumentSerializer.Meta):
+        extra_kwargs = {'mongo_id': {'validators': []}}
+    
+    def validate_mongo_id(self, value):
+        return value or None
+
+
+class EmbeddingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Embedding model"""
     
     document_title = serializers.CharField(source='document.title', read_only=True)
@@ -43,7 +70,7 @@ class EmbeddingSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'vector_id', 'created_at']
 
 
-class ExperimentSerializer(serializers.ModelSerializer):
+class ExperimentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Experiment model"""
     
     class Meta:
@@ -64,6 +91,100 @@ class SemanticSearchSerializer(serializers.Serializer):
     document_type = serializers.CharField(required=False, default='journal_entry')
     top_k = serializers.IntegerField(required=False, default=10, min_value=1, max_value=100)
     score_threshold = serializers.FloatField(required=False, default=0.5, min_value=0.0, max_value=1.0)
+    # 'payload' answers from the fields denormalized into Qdrant, without a database query
+    projection = serializers.ChoiceField(choices=['document', 'payload'], required=False, default='document')
+    fields = serializers.ListField(
+        child=serializers.ChoiceField(choices=list(DOCUMENT_PAYLOAD_FIELDS)), required=False, allow_empty=False
+    )
+    
+    def validate(self, attrs):
+        if 'fields' in attrs and attrs['projection'] != 'payload':
+            raise serializers.ValidationError({'fields': "Only supported with projection 'payload'"})
+        if attrs['projection'] == 'payload':
+            attrs['fields'] = list(dict.fromkeys(attrs.get('fields') or DOCUMENT_PAYLOAD_FIELDS))
+        return attrs
+
+
+class BatchSemanticSearchSerializer(serializers.Serializer):
+    """Input for batch semantic search: one entry per query"""
+    
+    searches = SemanticSearchSerializer(many=True, allow_empty=False)
+    
+    def validate_searches(self, value):
+        from django.conf import settings
+        
+        if len(value) > settings.SEARCH_BATCH_MAX_QUERIES:
+            raise serializers.ValidationError(f"At most {settings.SEARCH_BATCH_MAX_QUERIES} queries per request")
+        return value
+
+
+class RecommendSerializer(serializers.Serializer):
+    """Input for "more like this" recommendations from stored document vectors"""
+    
+    document_ids = serializers.ListField(
+        child=serializers.UUIDField(format='hex_verbose'), allow_empty=False, max_length=50
+    )
+    negative_document_ids = serializers.ListField(
+        child=serializers.UUIDField(format='hex_verbose'), required=False, default=list, max_length=50
+    )
+    user_id = serializers.CharField(required=True, max_length=100)
+    document_type = serializers.CharField(required=False, default='journal_entry')
+    top_k = serializers.IntegerField(required=False, default=10, min_value=1, max_value=100)
+    score_threshold = serializers.FloatField(required=False, default=0.5, min_value=0.0, max_value=1.0)
+    strategy = serializers.ChoiceField(choices=['average_vector', 'best_score'], default='average_vector')
+
+
+class EmbedSerializer(serializers.Serializer):
+    """Input for embedding texts"""
+    
+    texts = serializers.ListField(child=serializers.CharField(), allow_empty=False)
+    dtype = serializers.ChoiceField(choices=['float32', 'float16'], required=False, default='float32')
+    encoding = serializers.ChoiceField(choices=['base64', 'list'], required=False, default='base64')
+    
+    def validate_texts(self, value):
+        from django.conf import settings
+        
+        if len(value) > settings.EMBED_MAX_TEXTS:
+            raise serializers.ValidationError(f"At most {settings.EMBED_MAX_TEXTS} texts per request")
+        return value
+
+
+class SimilaritySerializer(serializers.Serializer):
+    """
+    Input for batch similarity
+    
+    Candidates come from `texts` or `document_ids`; queries from `query_texts`
+    or `query_document_ids`, defaulting to the candidates themselves. Stored
+    vectors are only read for the documents of `user_id`, which is required
+    whenever document IDs are given.
+    """
+    
+    texts = serializers.ListField(child=serializers.CharField(), required=False, allow_empty=False)
+    document_ids = serializers.ListField(child=serializers.UUIDField(format='hex_verbose'), required=False, allow_empty=False)
+    query_texts = serializers.ListField(child=serializers.CharField(), required=False, allow_empty=False)
+    query_document_ids = serializers.ListField(child=serializers.UUIDField(format='hex_verbose'), required=False, allow_empty=False)
+    user_id = serializers.CharField(required=False, max_length=100)
+    top_k = serializers.IntegerField(required=False, min_value=1, max_value=100)
+    
+    def validate(self, data):
+        from django.conf import settings
+        
+        if ('texts' in data) == ('document_ids' in data):
+            raise serializers.ValidationError('Provide exactly one of texts or document_ids')
+        if 'query_texts' in data and 'query_document_ids' in data:
+            raise serializers.ValidationError('Provide at most one of query_texts or query_document_ids')
+        if ('document_ids' in data or 'query_document_ids' in data) and not data.get('user_id'):
+            raise serializers.ValidationError({'user_id': ['This field is required with document IDs.']})
+        
+        n_candidates = len(data.get('texts') or data.get('document_ids'))
+        n_queries = len(data.get('query_texts') or data.get('query_document_ids') or []) or n_candidates
+        
+        if max(n_candidates, n_queries) > settings.SIMILARITY_MAX_ITEMS:
+            raise serializers.ValidationError(f"At most {settings.SIMILARITY_MAX_ITEMS} items per side")
+        if 'top_k' not in data and n_candidates * n_queries > settings.SIMILARITY_MAX_MATRIX_CELLS:
+            raise serializers.ValidationError('Full matrix too large, set top_k')
+        
+        return data
 
 
 class SyncJournalSerializer(serializers.Serializer):
@@ -0,0 +1,105 @@
+"""
+Token-accurate sliding-window chunking for long documents
+"""
+import uuid
+from typing import Any, Dict, List
+
+
+def chunk_text(
+    text: str,
+    tokenizer,
+    max_tokens: int,
+    overlap: int = 0,
+    max_chunks: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Split text into overlapping windows measured in model tokens
+
+    Windows leave room for the tokenizer's special tokens, so each chunk
+    encodes without truncation. Chunk text is sliced from the original
+    string via offset mappings, preserving whitespace and casing.
+
+    Args:
+        text: Document text
+        tokenizer: Fast (offset-mapping capable) HuggingFace tokenizer
+        max_tokens: Model sequence limit including special tokens
+        overlap: Tokens shared between consecutive windows
+        max_chunks: Stop after this many chunks (0 = unlimited)
+
+    Returns:
+        List of chunks: {"index", "text", "start", "end", "token_count"}
+    """
+    window = max(1, max_tokens - tokenizer.num_special_tokens_to_add(pair=False))
+    overlap = min(max(0, overlap), window - 1)
+    stride = window - overlap
+
+    encoding = tokenizer(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        truncation=False,
+        verbose=False
+    )
+    offsets = encoding['offset_mapping']
+
+    if len(offsets) <= window:
+        return [{
+            'index': 0,
+            'text': text,
+            'start': 0,
+            'end': len(text),
+            'token_count': len(offsets),
+        }]
+
+    chunks = []
+    for start_token in range(0, len(offsets), stride):
+        end_token = min(start_token + window, len(offsets))
+        start_char = offsets[start_token][0]
+        end_char = offsets[end_token - 1][1]
+
+        chunks.append({
+            'index': len(chunks),
+            'text': text[start_char:end_char],
+            'start': start_char,
+            'end': end_char,
+            'token_count': end_token - start_token,
+        })
+
+        if end_token == len(offsets) or (max_chunks and len(chunks) >= max_chunks):
+            break
+
+    return chunks
+
+
+def join_chunks(chunks: List[Dict[str, Any]]) -> str:
+    """
+    Rebuild the text covered by `chunk_text` chunks
+
+    Overlaps are removed using the chunks' offsets; whitespace between
+    non-overlapping chunks collapses to one space. Text past `max_chunks`
+    is not recoverable.
+    """
+    text = ''
+    end = None
+    for chunk in chunks:
+        if end is None:
+            text = chunk['text']
+        elif chunk['start'] >= end:
+            text += ' ' + chunk['text']
+        else:
+            text += chunk['text'][end - chunk['start']:]
+        end = chunk['end']
+    return text
+
+
+def chunk_point_id(document_id: str, chunk_index: int) -> str:
+    """
+    Qdrant point ID for a document chunk
+
+    The first chunk keeps the document ID itself, so single-chunk documents
+    (and lookups by document ID) are unchanged; later chunks get stable
+    UUIDv5 IDs derived from it.
+    """
+    if chunk_index == 0:
+        return str(document_id)
+    return str(uuid.uuid5(uuid.UUID(str(document_id)), f"chunk-{chunk_index}"))
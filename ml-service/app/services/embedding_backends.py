@@ -0,0 +1,281 @@
+"""
+Inference backends for embedding generation
+
+`torch` runs the SentenceTransformer pipeline in PyTorch eager mode.
+`onnx` / `onnx-int8` export the underlying transformer to ONNX once
+(optionally dynamic-quantized to int8) and run it with ONNX Runtime,
+reproducing the SentenceTransformer pooling and normalization in NumPy.
+"""
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('torch', 'onnx', 'onnx-int8')
+
+
+class EmbeddingBackend:
+    """Common interface: `tokenizer`, `max_seq_length`, `encode`, `encode_features`"""
+
+    def encode_feature_batches(self, batches: List[Dict[str, np.ndarray]]) -> List[np.ndarray]:
+        """Encode several padded batches (executors may run them in parallel)"""
+        return [self.encode_features(features) for features in batches]
+
+
+class TorchBackend(EmbeddingBackend):
+    """SentenceTransformer (PyTorch) inference"""
+
+    name = 'torch'
+
+    def __init__(self, model_name: str, max_seq_length: int, weights_mode: str = 'default', weights_dir: str = ''):
+        self.model_name = model_name
+        self.max_seq_length = max_seq_length
+        self.weights_mode = weights_mode
+        self.weights_dir = weights_dir
+        self.weights_path = None
+        self.model = None
+
+    def load(self):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(self.model_name, device='cpu')
+        self.model.max_seq_length = min(self.model.max_seq_length or self.max_seq_length, self.max_seq_length)
+        self.max_seq_length = self.model.max_seq_length
+        self.model.eval()
+
+        if self.weights_mode == 'mmap':
+            self._map_weights()
+        return self
+
+    def _map_weights(self):
+        """
+        Swap parameters for tensors memory-mapped from a local weights file
+
+        The mapping is private and read-only in practice (inference never
+        writes weights), so every process using the same file shares one
+        physical copy through the page cache.
+        """
+        import torch
+
+        slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', self.model_name)
+        self.weights_path = os.path.join(self.weights_dir, f"{slug}.pt")
+
+        if not os.path.exists(self.weights_path):
+            os.makedirs(self.weights_dir, exist_ok=True)
+            tmp_path = f"{self.weights_path}.{os.getpid()}.tmp"
+            torch.save(self.model.state_dict(), tmp_path)
+            os.replace(tmp_path, self.weights_path)
+            logger.info(f"Wrote shareable weights file {self.weights_path}")
+
+        state_dict = torch.load(self.weights_path, map_location='cpu', mmap=True, weights_only=True)
+        self.model.load_state_dict(state_dict, assign=True)
+        logger.info(f"Memory-mapped model weights from {self.weights_path}")
+
+    @property
+    def tokenizer(self):
+        return self.model.tokenizer
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Encode texts into a (len(texts), dim) float32 array"""
+        return self.model.encode(texts, convert_to_numpy=True, batch_size=batch_size)
+
+    def encode_features(self, features: Dict[str, np.ndarray]) -> np.ndarray:
+        """Run the full pipeline (transformer, pooling, normalize) on tokenized inputs"""
+        import torch
+
+        inputs = {name: torch.as_tensor(value) for name, value in features.items()}
+        with torch.inference_mode():
+            embeddings = self.model(inputs)['sentence_embedding']
+        return embeddings.cpu().numpy().astype(np.float32)
+
+
+class OnnxBackend(EmbeddingBackend):
+    """ONNX Runtime inference with SentenceTransformer-compatible pooling"""
+
+    def __init__(self, model_name: str, max_seq_length: int, model_dir: str, quantize: bool = False, num_threads: int = 0):
+        self.model_name = model_name
+        self.max_seq_length = max_seq_length
+        self.model_dir = model_dir
+        self.quantize = quantize
+        self.num_threads = num_threads
+        self.name = 'onnx-int8' if quantize else 'onnx'
+
+        self.session = None
+        self.tokenizer = None
+        self.input_names = []
+        self.config = {}
+
+    @property
+    def export_dir(self) -> str:
+        slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', self.model_name)
+        return os.path.join(self.model_dir, slug)
+
+    @property
+    def model_path(self) -> str:
+        filename = 'model-int8.onnx' if self.quantize else 'model.onnx'
+        return os.path.join(self.export_dir, filename)
+
+    def load(self):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                f"EMBEDDING_BACKEND={self.name} requires onnxruntime (pip install onnxruntime)"
+            ) from e
+        from transformers import AutoTokenizer
+
+        if not os.path.exists(self.model_path):
+            export_onnx_model(self.model_name, self.export_dir, quantize=self.quantize)
+
+        with open(os.path.join(self.export_dir, 'pooling.json')) as f:
+            self.config = json.load(f)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+
+        self.session = ort.InferenceSession(self.model_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(self.export_dir)
+        self.max_seq_length = min(self.config.get('max_seq_length') or self.max_seq_length, self.max_seq_length)
+        logger.info(f"Loaded ONNX model {self.model_path}")
+        return self
+
+    def encode_features(self, features: Dict[str, np.ndarray]) -> np.ndarray:
+        """Run the transformer on tokenized inputs and pool to sentence vectors"""
+        inputs = {name: features[name].astype(np.int64) for name in self.input_names}
+        token_embeddings = self.session.run(None, inputs)[0]
+        embeddings = pool(token_embeddings, features['attention_mask'], self.config.get('pooling_mode', 'mean'))
+
+        if self.config.get('normalize'):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings.astype(np.float32)
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Encode texts into a (len(texts), dim) float32 array"""
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            features = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors='np'
+            )
+            batches.append(self.encode_features(features))
+
+        if not batches:
+            return np.zeros((0, self.config.get('dimension', 0)), dtype=np.float32)
+        return np.concatenate(batches)
+
+
+def pool(token_embeddings: np.ndarray, attention_mask: np.ndarray, mode: str) -> np.ndarray:
+    """SentenceTransformer pooling over (batch, seq, dim) token embeddings"""
+    if mode == 'cls':
+        return token_embeddings[:, 0]
+
+    mask = attention_mask[..., None].astype(token_embeddings.dtype)
+    if mode == 'max':
+        masked = np.where(mask > 0, token_embeddings, -1e9)
+        return masked.max(axis=1)
+
+    summed = (token_embeddings * mask).sum(axis=1)
+    return summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+def export_onnx_model(model_name: str, export_dir: str, quantize: bool = False):
+    """
+    Export a SentenceTransformer's transformer module to ONNX
+
+    Writes model.onnx (and model-int8.onnx when quantizing), the tokenizer
+    and a pooling.json describing the pooling/normalization stages.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    os.makedirs(export_dir, exist_ok=True)
+    fp32_path = os.path.join(export_dir, 'model.onnx')
+
+    if not os.path.exists(fp32_path):
+        logger.info(f"Exporting {model_name} to ONNX in {export_dir}")
+        st_model = SentenceTransformer(model_name, device='cpu')
+        transformer = st_model[0].auto_model.eval()
+        tokenizer = st_model.tokenizer
+
+        pooling_mode = 'mean'
+        for module in st_model:
+            if isinstance(module, Pooling):
+                if module.pooling_mode_cls_token:
+                    pooling_mode = 'cls'
+                elif module.pooling_mode_max_tokens:
+                    pooling_mode = 'max'
+
+        dummy = tokenizer(['cosmic insights'], return_tensors='pt')
+        input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in dummy]
+        dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+        dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+        tmp_path = f"{fp32_path}.{os.getpid()}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer,
+                tuple(dummy[name] for name in input_names),
+                tmp_path,
+                input_names=input_names,
+                output_names=['last_hidden_state'],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+                do_constant_folding=True
+            )
+
+        tokenizer.save_pretrained(export_dir)
+        with open(os.path.join(export_dir, 'pooling.json'), 'w') as f:
+            json.dump({
+                'model_name': model_name,
+                'pooling_mode': pooling_mode,
+                'normalize': any(isinstance(module, Normalize) for module in st_model),
+                'max_seq_length': st_model.max_seq_length,
+                'dimension': st_model.get_sentence_embedding_dimension(),
+            }, f, indent=2)
+
+        # Rename last so concurrent workers never load a half-written file
+        os.replace(tmp_path, fp32_path)
+        logger.info(f"Exported {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(export_dir, 'model-int8.onnx')
+        if not os.path.exists(int8_path):
+            tmp_path = f"{int8_path}.{os.getpid()}.tmp"
+            quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, int8_path)
+            logger.info(f"Quantized {int8_path}")
+
+
+def create_backend(name: str, model_name: str, max_seq_length: int, **options: Any):
+    """Instantiate (but do not load) an embedding backend by name"""
+    if name == 'torch':
+        return TorchBackend(
+            model_name,
+            max_seq_length,
+            weights_mode=options.get('weights_mode', 'default'),
+            weights_dir=options.get('weights_dir', '')
+        )
+    if name in ('onnx', 'onnx-int8'):
+        return OnnxBackend(
+            model_name,
+            max_seq_length,
+            model_dir=options['onnx_dir'],
+            quantize=name == 'onnx-int8',
+            num_threads=options.get('num_threads', 0)
+        )
+    raise ValueError(f"Unknown embedding backend '{name}', expected one of {', '.join(BACKENDS)}")
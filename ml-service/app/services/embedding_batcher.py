@@ -0,0 +1,168 @@
+"""
+Micro-batching layer for query embeddings
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the batch size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class EmbeddingBatcher:
+    """
+    Collects concurrent embedding requests and encodes them together
+
+    Callers block on a future while a background thread drains the queue.
+    A batch is flushed when `max_batch_size` requests are waiting or when
+    the oldest request has waited `window_ms`, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], Any],
+        max_batch_size: int = 32,
+        window_ms: float = 5.0
+    ):
+        self._encode_fn = encode_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0.0, window_ms) / 1000.0
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+
+        # Metrics
+        self._requests = 0
+        self._batches = 0
+        self._batched_items = 0
+        self._failed_batches = 0
+        self._max_queue_depth = 0
+        self._wait_seconds = 0.0
+        self._encode_seconds = 0.0
+        self._histogram = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self._histogram_overflow = 0
+
+    def _ensure_worker(self):
+        """Start the flush thread (caller holds the condition lock)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name='embedding-batcher',
+            daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            f"Embedding batcher started (max_batch_size={self.max_batch_size}, "
+            f"window_ms={self.window * 1000:.1f})"
+        )
+
+    def _reset_after_fork(self):
+        """Drop state inherited from the parent process (its thread is gone)"""
+        self._pid = os.getpid()
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for embedding and return a future for its vector"""
+        future = Future()
+
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+
+        with self._cond:
+            self._ensure_worker()
+            self._queue.append((text, future, time.perf_counter()))
+            self._requests += 1
+            self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+            self._cond.notify()
+
+        return future
+
+    def embed(self, text: str, timeout: float = None):
+        """Embed a single text through the batcher and wait for the result"""
+        return self.submit(text).result(timeout=timeout)
+
+    def _next_batch(self) -> List[tuple]:
+        """Block until a batch is ready to flush and pop it from the queue"""
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+
+            deadline = self._queue[0][2] + self.window
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            size = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(size)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            texts = [item[0] for item in batch]
+            started = time.perf_counter()
+
+            try:
+                embeddings = self._encode_fn(texts)
+            except Exception as e:
+                logger.error(f"Embedding batch of {len(batch)} failed: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                with self._cond:
+                    self._failed_batches += 1
+                continue
+
+            finished = time.perf_counter()
+            for (_, future, _), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+
+            with self._cond:
+                self._record_batch(batch, started, finished)
+
+    def _record_batch(self, batch: List[tuple], started: float, finished: float):
+        size = len(batch)
+        self._batches += 1
+        self._batched_items += size
+        self._encode_seconds += finished - started
+        self._wait_seconds += sum(started - enqueued for _, _, enqueued in batch)
+
+        for bucket in BATCH_SIZE_BUCKETS:
+            if size <= bucket:
+                self._histogram[bucket] += 1
+                break
+        else:
+            self._histogram_overflow += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and batch size metrics"""
+        with self._cond:
+            items = self._batched_items
+            histogram = {f"le_{bucket}": count for bucket, count in self._histogram.items()}
+            histogram[f"gt_{BATCH_SIZE_BUCKETS[-1]}"] = self._histogram_overflow
+
+            return {
+                'max_batch_size': self.max_batch_size,
+                'window_ms': self.window * 1000,
+                'queue_depth': len(self._queue),
+                'max_queue_depth': self._max_queue_depth,
+                'requests': self._requests,
+                'batches': self._batches,
+                'failed_batches': self._failed_batches,
+                'avg_batch_size': round(items / self._batches, 2) if self._batches else 0.0,
+                'avg_wait_ms': round(self._wait_seconds * 1000 / items, 3) if items else 0.0,
+                'avg_encode_ms': round(self._encode_seconds * 1000 / self._batches, 3) if self._batches else 0.0,
+                'batch_size_histogram': histogram,
+            }
@@ -0,0 +1,215 @@
+"""
+Content-addressed cache for embedding vectors
+
+Tier 1 is a bounded in-process LRU, tier 2 is Redis (the Celery broker by
+default) holding raw float32 bytes. Keys are derived from the normalized
+text and the embedding model name, so switching `EMBEDDING_MODEL` never
+serves stale vectors. Processes running different models (e.g. during a
+rollout) share Redis without touching each other's namespace; entries of
+a model no longer in use expire with the TTL.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import redis
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Seconds to skip the Redis tier after a connection error
+REDIS_RETRY_INTERVAL = 30
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a text used for cache keys"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+
+class EmbeddingCache:
+    """Two-tier (LRU + Redis) embedding cache for one model"""
+
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int = 10000,
+        redis_url: Optional[str] = None,
+        redis_ttl: int = 7 * 24 * 3600,
+        redis_max_entries: int = 500000,
+        key_prefix: str = 'emb'
+    ):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.redis_url = redis_url
+        self.redis_ttl = redis_ttl
+        self.redis_max_entries = redis_max_entries
+
+        model_hash = hashlib.sha256(model_name.encode('utf-8')).hexdigest()[:16]
+        self.namespace = f"{key_prefix}:{model_hash}"
+        self._index_key = f"{self.namespace}:index"
+
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_down_until = 0.0
+
+        self._stats = {
+            'lru_hits': 0,
+            'redis_hits': 0,
+            'misses': 0,
+            'lru_evictions': 0,
+            'redis_evictions': 0,
+            'redis_errors': 0,
+        }
+
+    def make_key(self, text: str) -> str:
+        """Cache key for a text under the current model"""
+        digest = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+        return f"{self.namespace}:{digest}"
+
+    # --- Redis tier -------------------------------------------------------
+
+    def _get_redis(self) -> Optional[redis.Redis]:
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                self.redis_url,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5
+            )
+        return self._redis
+
+    def _redis_failed(self, e: Exception):
+        logger.warning(f"Embedding cache Redis tier unavailable: {e}")
+        self._stats['redis_errors'] += 1
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+
+    def _redis_get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        client = self._get_redis()
+        if client is None:
+            return [None] * len(keys)
+        try:
+            return client.mget(keys)
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            return [None] * len(keys)
+
+    def _redis_set_many(self, items: Dict[str, np.ndarray]):
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            now = time.time()
+            pipe = client.pipeline(transaction=False)
+            for key, vector in items.items():
+                pipe.setex(key, self.redis_ttl, vector.astype(np.float32).tobytes())
+            pipe.zadd(self._index_key, {key: now for key in items})
+            # Entries that expired by TTL only linger in the index
+            pipe.zremrangebyscore(self._index_key, 0, now - self.redis_ttl)
+            # The index of a model no longer written to expires with its entries
+            pipe.expire(self._index_key, self.redis_ttl)
+            pipe.zcard(self._index_key)
+            size = pipe.execute()[-1]
+
+            overflow = size - self.redis_max_entries
+            if overflow > 0:
+                evicted = [key for key, _ in client.zpopmin(self._index_key, overflow)]
+                if evicted:
+                    client.delete(*evicted)
+                    self._stats['redis_evictions'] += len(evicted)
+        except redis.RedisError as e:
+            self._redis_failed(e)
+
+    # --- LRU tier ---------------------------------------------------------
+
+    def _lru_get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+            return vector
+
+    def _lru_set(self, key: str, vector: np.ndarray):
+        with self._lock:
+            self._lru[key] = vector
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+                self._stats['lru_evictions'] += 1
+
+    # --- Public API -------------------------------------------------------
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up cached vectors
+
+        Args:
+            texts: Texts exactly as they would be encoded
+
+        Returns:
+            One float32 vector per text, or None for misses
+        """
+        keys = [self.make_key(t) for t in texts]
+        results = [self._lru_get(key) for key in keys]
+
+        missing = [i for i, vector in enumerate(results) if vector is None]
+        self._stats['lru_hits'] += len(texts) - len(missing)
+        if not missing:
+            return results
+
+        raw = self._redis_get_many([keys[i] for i in missing])
+        for i, data in zip(missing, raw):
+            if data is None:
+                self._stats['misses'] += 1
+                continue
+            vector = np.frombuffer(data, dtype=np.float32)
+            results[i] = vector
+            self._lru_set(keys[i], vector)
+            self._stats['redis_hits'] += 1
+
+        return results
+
+    def set_many(self, texts: List[str], vectors: List[np.ndarray]):
+        """Store vectors in both tiers"""
+        items = {}
+        for text, vector in zip(texts, vectors):
+            key = self.make_key(text)
+            vector = np.asarray(vector, dtype=np.float32)
+            self._lru_set(key, vector)
+            items[key] = vector
+
+        if items:
+            self._redis_set_many(items)
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        return self.get_many([text])[0]
+
+    def set(self, text: str, vector: np.ndarray):
+        self.set_many([text], [vector])
+
+    def clear(self):
+        """Drop the in-process tier (Redis entries expire on their own)"""
+        with self._lock:
+            self._lru.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters"""
+        stats = dict(self._stats)
+        lookups = stats['lru_hits'] + stats['redis_hits'] + stats['misses']
+        stats.update({
+            'model': self.model_name,
+            'lru_size': len(self._lru),
+            'lru_max_entries': self.max_entries,
+            'redis_enabled': bool(self.redis_url),
+            'hit_rate': round((stats['lru_hits'] + stats['redis_hits']) / lookups, 4) if lookups else 0.0,
+        })
+        return stats
@@ -0,0 +1,304 @@
+"""
+Process-pool embedding executor
+
+Runs N model replicas in separate processes, each with an explicit torch
+thread count and (optionally) pinned to its own CPU set, so several
+replicas on one box do not oversubscribe cores. The parent process only
+holds the tokenizer; padded batches are shipped to the replicas.
+
+Replicas are started with the `spawn` method, so they never inherit torch
+or OpenMP state. Celery prefork workers are daemonic and cannot own a
+pool; run Celery with `--pool=threads` or `--pool=solo` in this mode.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .embedding_backends import EmbeddingBackend, create_backend
+
+logger = logging.getLogger(__name__)
+
+# Per-replica state, set by _init_replica in each pool process
+_replica = {}
+
+
+def available_cpus() -> List[int]:
+    """CPUs this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def serving_slot() -> Tuple[int, int]:
+    """
+    (serving processes on this host, index of this one)
+
+    Exported by gunicorn.conf.py to each worker; (1, 0) elsewhere.
+    """
+    return int(os.environ.get('EMBEDDING_POOL_WORKERS', '1')), int(os.environ.get('EMBEDDING_POOL_SLOT', '0'))
+
+
+def plan_replicas(pool_size: int, threads: int, cpus: List[int], workers: int = 1, slot: int = 0) -> List[List[int]]:
+    """
+    Split the available CPUs into one set per replica
+
+    Every serving process on the host runs its own pool, so the CPUs are
+    first divided between them; pools of different workers neither
+    oversubscribe the host nor pin onto the same cores.
+
+    Args:
+        pool_size: Number of replicas, 0 derives it from this worker's cores / threads
+        threads: Torch threads per replica
+        cpus: Available CPU IDs
+        workers: Serving processes sharing the CPUs
+        slot: Index of this process among them
+
+    Returns:
+        One list of CPU IDs per replica
+    """
+    threads = max(1, threads)
+    workers = max(1, workers)
+    share = len(cpus) // workers
+    if share:
+        start = (slot % workers) * share
+        cpus = cpus[start:start + share]
+    if pool_size <= 0:
+        pool_size = max(1, len(cpus) // threads)
+
+    return [
+        sorted({cpus[(i * threads + t) % len(cpus)] for t in range(threads)})
+        for i in range(pool_size)
+    ]
+
+
+def _init_replica(index_counter, cpu_sets, pin_cpus, threads, backend_name, model_name, max_seq_length, backend_options):
+    """Pool initializer: claim a replica slot, pin threads and load the model"""
+    with index_counter.get_lock():
+        index = index_counter.value
+        index_counter.value += 1
+
+    cpus = cpu_sets[index % len(cpu_sets)]
+    if pin_cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+
+    import torch
+    torch.set_num_threads(threads)
+
+    backend = create_backend(
+        backend_name,
+        model_name,
+        max_seq_length,
+        **{**backend_options, 'num_threads': threads}
+    ).load()
+
+    _replica.update({
+        'index': index,
+        'pid': os.getpid(),
+        'cpus': cpus if pin_cpus else None,
+        'backend': backend,
+    })
+
+
+def _describe_replica() -> Dict[str, Any]:
+    backend = _replica['backend']
+    dimension = backend.encode(['probe'], batch_size=1).shape[1]
+    return {'max_seq_length': backend.max_seq_length, 'dimension': int(dimension)}
+
+
+def _run_in_replica(method: str, *args):
+    started = time.perf_counter()
+    vectors = getattr(_replica['backend'], method)(*args)
+    busy = time.perf_counter() - started
+    return vectors, (_replica['index'], _replica['pid'], _replica['cpus'], busy)
+
+
+class EmbeddingProcessPool:
+    """Pool of model replicas fed through a shared task queue"""
+
+    def __init__(
+        self,
+        backend_name: str,
+        model_name: str,
+        max_seq_length: int,
+        backend_options: Dict[str, Any],
+        pool_size: int = 0,
+        threads: int = 1,
+        pin_cpus: bool = True
+    ):
+        self.backend_name = backend_name
+        self.model_name = model_name
+        self.max_seq_length = max_seq_length
+        self.backend_options = backend_options
+        self.threads = max(1, threads)
+        self.pin_cpus = pin_cpus
+        self.pool_size = pool_size
+        self._plan()
+
+        self._executor = None
+        self._pid = None
+        self._started_at = None
+        self._lock = threading.Lock()
+        self._replicas = {}
+
+    def _plan(self):
+        self.cpu_sets = plan_replicas(self.pool_size, self.threads, available_cpus(), *serving_slot())
+        self.size = len(self.cpu_sets)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # A pool created in the gunicorn master is re-planned for this worker's CPU share
+                self._plan()
+                context = multiprocessing.get_context('spawn')
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.size,
+                    mp_context=context,
+                    initializer=_init_replica,
+                    initargs=(
+                        context.Value('i', 0),
+                        self.cpu_sets,
+                        self.pin_cpus,
+                        self.threads,
+                        self.backend_name,
+                        self.model_name,
+                        self.max_seq_length,
+                        self.backend_options,
+                    )
+                )
+                self._pid = os.getpid()
+                self._started_at = time.monotonic()
+                self._replicas = {}
+                logger.info(
+                    f"Started embedding pool: {self.size} replicas x {self.threads} threads "
+                    f"(pin_cpus={self.pin_cpus})"
+                )
+            return self._executor
+
+    def _restart(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _record(self, info: tuple):
+        index, pid, cpus, busy = info
+        with self._lock:
+            replica = self._replicas.setdefault(index, {'tasks': 0, 'busy_seconds': 0.0})
+            replica.update({'pid': pid, 'cpus': cpus})
+            replica['tasks'] += 1
+            replica['busy_seconds'] += busy
+
+    def _map(self, method: str, arg_lists: List[tuple]) -> List[np.ndarray]:
+        """Run `method` on replicas for each argument tuple, preserving order"""
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                futures = [executor.submit(_run_in_replica, method, *args) for args in arg_lists]
+                results = []
+                for future in futures:
+                    vectors, info = future.result()
+                    self._record(info)
+                    results.append(vectors)
+                return results
+            except BrokenProcessPool:
+                if attempt:
+                    raise
+                logger.error("Embedding pool broke (replica died), restarting")
+                self._restart()
+
+    def describe(self) -> Dict[str, Any]:
+        """Model properties reported by a replica (also warms the pool up)"""
+        return self._get_executor().submit(_describe_replica).result()
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Split texts across replicas and encode them"""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        per_replica = max(batch_size, -(-len(texts) // self.size))
+        parts = [
+            (texts[start:start + per_replica], batch_size)
+            for start in range(0, len(texts), per_replica)
+        ]
+        return np.concatenate(self._map('encode', parts))
+
+    def encode_feature_batches(self, batches: List[Dict[str, np.ndarray]]) -> List[np.ndarray]:
+        """Encode padded batches in parallel across replicas"""
+        return self._map('encode_features', [(features,) for features in batches])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-replica task counts and utilization (busy time / pool uptime)"""
+        with self._lock:
+            uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+            replicas = [
+                {
+                    'index': index,
+                    **replica,
+                    'busy_seconds': round(replica['busy_seconds'], 3),
+                    'utilization': round(replica['busy_seconds'] / uptime, 4) if uptime else 0.0,
+                }
+                for index, replica in sorted(self._replicas.items())
+            ]
+        return {
+            'running': self._executor is not None,
+            'size': self.size,
+            'threads_per_replica': self.threads,
+            'pin_cpus': self.pin_cpus,
+            'cpu_sets': self.cpu_sets,
+            'uptime_seconds': round(uptime, 1),
+            'replicas': replicas,
+        }
+
+
+class PooledBackend(EmbeddingBackend):
+    """
+    Embedding backend that delegates inference to an EmbeddingProcessPool
+
+    Replicas start on first use, not in `load`: with
+    EMBEDDING_WEIGHTS_MODE=preload the model is loaded in the gunicorn
+    master, where a pool would hold N copies of the model that no worker
+    ever uses (each worker starts its own).
+    """
+
+    def __init__(self, pool: EmbeddingProcessPool):
+        self.pool = pool
+        self.name = f"{pool.backend_name}+pool"
+        self.model_name = pool.model_name
+        self.tokenizer = None
+        self._info: Optional[Dict[str, Any]] = None
+
+    def load(self):
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        return self
+
+    def _describe(self) -> Dict[str, Any]:
+        if self._info is None:
+            self._info = self.pool.describe()
+        return self._info
+
+    @property
+    def max_seq_length(self) -> int:
+        return self._describe()['max_seq_length']
+
+    @property
+    def dimension(self) -> int:
+        return self._describe()['dimension']
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return self.pool.encode(texts, batch_size=batch_size)
+
+    def encode_features(self, features: Dict[str, np.ndarray]) -> np.ndarray:
+        return self.pool.encode_feature_batches([features])[0]
+
+    def encode_feature_batches(self, batches: List[Dict[str, np.ndarray]]) -> List[np.ndarray]:
+        return self.pool.encode_feature_batches(batches)
@@ -1,19 +1,88 @@
 """
 Service for generating embeddings using SentenceTransformers
 """
+import asyncio
 import logging
-from typing import List
-from sentence_transformers import SentenceTransformer
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import numpy as np
 from django.conf import settings
 
+from .embedding_backends import create_backend
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_pool import EmbeddingProcessPool, PooledBackend
+from .memory_report import get_memory_report
+from .similarity import similarity_matrix, top_k_similar
+from .embedding_cache import EmbeddingCache
+from .chunking import chunk_text
+from .instrumentation import instrumented
+
 logger = logging.getLogger(__name__)
 
 
+def backend_options_from_settings() -> Dict[str, Any]:
+    """Keyword options for `create_backend` taken from Django settings"""
+    return {
+        'onnx_dir': settings.EMBEDDING_ONNX_DIR,
+        'num_threads': settings.EMBEDDING_NUM_THREADS,
+        'weights_mode': settings.EMBEDDING_WEIGHTS_MODE,
+        'weights_dir': settings.EMBEDDING_WEIGHTS_DIR,
+    }
+
+
+def plan_token_batches(lengths: List[int], token_budget: int, max_batch_size: int) -> List[List[int]]:
+    """
+    Group texts into padding-minimizing batches
+    
+    Indices are sorted by token length and packed greedily so that
+    `batch_size * longest_in_batch` stays within `token_budget`.
+    
+    Args:
+        lengths: Token count per text
+        token_budget: Max padded tokens per batch
+        max_batch_size: Hard cap on texts per batch
+        
+    Returns:
+        Lists of original indices, one per batch
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    batches = []
+    current = []
+    
+    for index in order:
+        # Lengths are ascending, so this text sets the padded width
+        padded = (len(current) + 1) * max(lengths[index], 1)
+        if current and (padded > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+        current.append(index)
+    
+    if current:
+        batches.append(current)
+    return batches
+
+
+@instrumented('embedding', [
+    'load_model',
+    'embed_query',
+    'embed_query_async',
+    'embed_queries',
+    'generate_embedding',
+    'generate_embeddings_batch',
+    'generate_embeddings_bulk',
+    'embed_documents',
+    'embed_document',
+])
 class EmbeddingService:
     """Singleton service for embedding generation"""
     
     _instance = None
     _model = None
+    _batcher = None
+    _batcher_lock = threading.Lock()
+    _cache = None
+    _async_executor = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -21,19 +90,187 @@ class EmbeddingService:
         return cls._instance
     
     def load_model(self):
-        """Load embedding model (called on app startup)"""
+        """Load embedding model with the configured backend (called on app startup)"""
         if self._model is None:
-            logger.info(f"Loading embedding model: {settings.EMBEDDING_MODEL}")
-            self._model = SentenceTransformer(settings.EMBEDDING_MODEL)
+            logger.info(
+                f"Loading embedding model: {settings.EMBEDDING_MODEL} "
+                f"(backend={settings.EMBEDDING_BACKEND}, executor={settings.EMBEDDING_EXECUTOR})"
+            )
+            if settings.EMBEDDING_EXECUTOR == 'process':
+                self._model = PooledBackend(EmbeddingProcessPool(
+                    backend_name=settings.EMBEDDING_BACKEND,
+                    model_name=settings.EMBEDDING_MODEL,
+                    max_seq_length=settings.MAX_SEQUENCE_LENGTH,
+                    backend_options=backend_options_from_settings(),
+                    pool_size=settings.EMBEDDING_POOL_SIZE,
+                    threads=settings.EMBEDDING_POOL_THREADS,
+                    pin_cpus=settings.EMBEDDING_POOL_PIN_CPUS
+                )).load()
+            else:
+                self._model = create_backend(
+                    settings.EMBEDDING_BACKEND,
+                    settings.EMBEDDING_MODEL,
+                    settings.MAX_SEQUENCE_LENGTH,
+                    **backend_options_from_settings()
+                ).load()
             logger.info("Model loaded successfully")
         return self._model
     
+    def get_model_config(self) -> Dict[str, Any]:
+        """{"model", "backend", "dimension"} of the collection searches are served from"""
+        from .reembedding import live_model
+        return live_model()
+    
     def get_model(self):
-        """Get loaded model"""
+        """
+        Get the model backend of the live collection (exposes `encode(texts, batch_size)`)
+        
+        That is the EMBEDDING_* model until a re-embedding run is switched
+        in; from then on queries and new documents use the run's model.
+        """
+        config = self.get_model_config()
+        if (config['model'], config['backend']) != (settings.EMBEDDING_MODEL, settings.EMBEDDING_BACKEND):
+            from .reembedding import get_encoder
+            return get_encoder(config).get_model()
         if self._model is None:
             self.load_model()
         return self._model
     
+    def get_batcher(self) -> EmbeddingBatcher:
+        """Get the micro-batcher used for concurrent query embeddings"""
+        if self._batcher is None:
+            with self._batcher_lock:
+                if self._batcher is None:
+                    EmbeddingService._batcher = EmbeddingBatcher(
+                        encode_fn=self._encode_batch,
+                        max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                        window_ms=settings.EMBEDDING_BATCH_WINDOW_MS
+                    )
+        return self._batcher
+    
+    def get_async_executor(self) -> ThreadPoolExecutor:
+        """Threads that run query embeddings for async views (EMBEDDING_ASYNC_WORKERS)"""
+        if self._async_executor is None:
+            with self._batcher_lock:
+                if self._async_executor is None:
+                    EmbeddingService._async_executor = ThreadPoolExecutor(
+                        max_workers=settings.EMBEDDING_ASYNC_WORKERS,
+                        thread_name_prefix='embed-async'
+                    )
+        return self._async_executor
+    
+    def get_batcher_stats(self) -> Dict[str, Any]:
+        """Micro-batcher metrics (empty until the first batched request)"""
+        if self._batcher is None:
+            return {'enabled': settings.EMBEDDING_BATCHING_ENABLED}
+        return {'enabled': settings.EMBEDDING_BATCHING_ENABLED, **self._batcher.get_stats()}
+    
+    def get_executor_stats(self) -> Dict[str, Any]:
+        """Per-replica utilization when running the process-pool executor"""
+        if not isinstance(self._model, PooledBackend):
+            return {'mode': settings.EMBEDDING_EXECUTOR}
+        return {'mode': 'process', **self._model.pool.get_stats()}
+    
+    def get_memory_report(self) -> Dict[str, Any]:
+        """Process memory usage, including the shared weights mapping if any"""
+        weights_path = getattr(self._model, 'weights_path', None)
+        return {
+            'weights_mode': settings.EMBEDDING_WEIGHTS_MODE,
+            **get_memory_report(weights_path)
+        }
+    
+    def get_cache(self) -> Optional[EmbeddingCache]:
+        """Get the embedding cache for the live model (None if disabled)"""
+        if not settings.EMBEDDING_CACHE_ENABLED:
+            return None
+        
+        # int8 backends drift slightly from fp32, so keep their vectors apart
+        config = self.get_model_config()
+        model_key = f"{config['model']}@{config['backend']}"
+        if self._cache is None or self._cache.model_name != model_key:
+            EmbeddingService._cache = EmbeddingCache(
+                model_name=model_key,
+                max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+                redis_url=settings.EMBEDDING_CACHE_REDIS_URL,
+                redis_ttl=settings.EMBEDDING_CACHE_REDIS_TTL,
+                redis_max_entries=settings.EMBEDDING_CACHE_REDIS_MAX_ENTRIES
+            )
+        return self._cache
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Embedding cache hit/miss/eviction counters"""
+        cache = self.get_cache()
+        if cache is None:
+            return {'enabled': False}
+        return {'enabled': True, **cache.get_stats()}
+    
+    def _truncate(self, text: str) -> str:
+        """Truncate text to roughly MAX_SEQUENCE_LENGTH tokens"""
+        if len(text) > settings.MAX_SEQUENCE_LENGTH * 4:  # Approx 4 chars per token
+            return text[:settings.MAX_SEQUENCE_LENGTH * 4]
+        return text
+    
+    def _encode_batch(self, texts: List[str]):
+        """Encode a micro-batch in a single model call"""
+        model = self.get_model()
+        return model.encode(texts, batch_size=len(texts))
+    
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Generate embedding for a search query
+        
+        Concurrent callers are coalesced by the micro-batcher into a single
+        `encode` call. Falls back to `generate_embedding` when batching is off.
+        
+        Args:
+            text: Query text
+            
+        Returns:
+            List of floats representing the embedding vector
+        """
+        if not settings.EMBEDDING_BATCHING_ENABLED:
+            return self.generate_embedding(text)
+        
+        text = self._truncate(text)
+        
+        cache = self.get_cache()
+        if cache is not None:
+            cached = cache.get(text)
+            if cached is not None:
+                return cached.tolist()
+        
+        embedding = self.get_batcher().embed(text, timeout=settings.EMBEDDING_BATCH_TIMEOUT)
+        
+        if cache is not None:
+            cache.set(text, embedding)
+        return embedding.tolist()
+    
+    async def embed_query_async(self, text: str) -> List[float]:
+        """
+        `embed_query` for async views
+        
+        Runs on a bounded thread pool, so at most EMBEDDING_ASYNC_WORKERS
+        queries are inside the cache / micro-batcher at once; the rest wait
+        without holding the event loop. Concurrent queries still coalesce
+        into shared model calls through the batcher.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.get_async_executor(), self.embed_query, text)
+    
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed several search queries in one batched encode
+        
+        Queries are truncated like `embed_query`, so both share cache entries.
+        
+        Args:
+            texts: Query texts
+            
+        Returns:
+            (len(texts), dim) float32 array
+        """
+        return self.generate_embeddings_bulk([self._truncate(text) for text in texts])
+    
     def generate_embedding(self, text: str) -> List[float]:
         """
         Generate embedding vector for text
@@ -44,14 +281,21 @@ class EmbeddingService:
         Returns:
             List of floats representing the embedding vector
         """
-        model = self.get_model()
-        
         # Truncate if too long
-        if len(text) > settings.MAX_SEQUENCE_LENGTH * 4:  # Approx 4 chars per token
-            text = text[:settings.MAX_SEQUENCE_LENGTH * 4]
+        text = self._truncate(text)
+        
+        cache = self.get_cache()
+        if cache is not None:
+            cached = cache.get(text)
+            if cached is not None:
+                return cached.tolist()
         
         # Generate embedding
-        embedding = model.encode(text, convert_to_numpy=True)
+        model = self.get_model()
+        embedding = model.encode([text])[0]
+        
+        if cache is not None:
+            cache.set(text, embedding)
         
         return embedding.tolist()
     
@@ -65,15 +309,139 @@ class EmbeddingService:
         Returns:
             List of embedding vectors
         """
+        return [emb.tolist() for emb in self.generate_embeddings_bulk(texts)]
+    
+    def generate_embeddings_bulk(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for a large number of texts
+        
+        Cached vectors are reused; the remaining distinct texts go through
+        the length-bucketed encoder. Used by journal sync and dataset builds.
+        
+        Args:
+            texts: List of input texts
+            
+        Returns:
+            (len(texts), dim) float32 array, in input order
+        """
+        # No character truncation: the tokenizer truncates at the model limit
+        cache = self.get_cache()
+        embeddings = cache.get_many(texts) if cache is not None else [None] * len(texts)
+        
+        # Encode each distinct missing text once
+        missing = list(dict.fromkeys(t for t, emb in zip(texts, embeddings) if emb is None))
+        if missing:
+            encoded = dict(zip(missing, self.encode_length_bucketed(missing)))
+            embeddings = [encoded[t] if emb is None else emb for t, emb in zip(texts, embeddings)]
+            
+            if cache is not None:
+                cache.set_many(missing, [encoded[t] for t in missing])
+        
+        if not embeddings:
+            return np.zeros((0, self.get_model_config()['dimension']), dtype=np.float32)
+        return np.vstack(embeddings).astype(np.float32, copy=False)
+    
+    def chunk_document(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Split a document into token windows that fit the model
+        
+        Args:
+            text: Document text
+            
+        Returns:
+            List of chunks (see `chunking.chunk_text`)
+        """
         model = self.get_model()
+        max_tokens = min(settings.EMBEDDING_CHUNK_TOKENS, model.max_seq_length)
+        return chunk_text(
+            text,
+            model.tokenizer,
+            max_tokens=max_tokens,
+            overlap=settings.EMBEDDING_CHUNK_OVERLAP,
+            max_chunks=settings.EMBEDDING_MAX_CHUNKS
+        )
+    
+    def embed_documents(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Chunk documents and embed all chunks in one bulk call
         
-        # Truncate texts
-        texts = [t[:settings.MAX_SEQUENCE_LENGTH * 4] if len(t) > settings.MAX_SEQUENCE_LENGTH * 4 else t for t in texts]
+        Args:
+            texts: Document texts
+            
+        Returns:
+            Per document: {"chunks": [...], "vectors": (n_chunks, dim) array}
+        """
+        chunked = [self.chunk_document(text) for text in texts]
+        vectors = self.generate_embeddings_bulk([c['text'] for chunks in chunked for c in chunks])
+        
+        results = []
+        offset = 0
+        for chunks in chunked:
+            results.append({
+                'chunks': chunks,
+                'vectors': vectors[offset:offset + len(chunks)]
+            })
+            offset += len(chunks)
+        
+        logger.debug(f"Embedded {len(texts)} documents as {offset} chunks")
+        return results
+    
+    def embed_document(self, text: str) -> Dict[str, Any]:
+        """Chunk and embed a single document (see `embed_documents`)"""
+        return self.embed_documents([text])[0]
+    
+    def encode_length_bucketed(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts with minimal padding
+        
+        Texts are tokenized once, grouped by token length into batches sized
+        by `EMBEDDING_BULK_TOKEN_BUDGET`, and the vectors are written back in
+        input order.
+        
+        Args:
+            texts: List of input texts
+            
+        Returns:
+            (len(texts), dim) float32 array
+        """
+        model = self.get_model()
+        tokenizer = model.tokenizer
+        
+        encoded = tokenizer(
+            [t.strip() for t in texts],
+            truncation=True,
+            max_length=model.max_seq_length,
+            padding=False
+        )
+        lengths = [len(ids) for ids in encoded['input_ids']]
+        batches = plan_token_batches(
+            lengths,
+            token_budget=settings.EMBEDDING_BULK_TOKEN_BUDGET,
+            max_batch_size=settings.EMBEDDING_BULK_MAX_BATCH_SIZE
+        )
         
-        # Generate embeddings
-        embeddings = model.encode(texts, convert_to_numpy=True, batch_size=32)
+        feature_batches = [
+            dict(tokenizer.pad(
+                {key: [encoded[key][i] for i in indices] for key in encoded.keys()},
+                padding=True,
+                return_tensors='np'
+            ))
+            for indices in batches
+        ]
         
-        return [emb.tolist() for emb in embeddings]
+        result = None
+        for indices, vectors in zip(batches, model.encode_feature_batches(feature_batches)):
+            if result is None:
+                result = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            result[indices] = vectors
+        
+        logger.debug(
+            f"Encoded {len(texts)} texts in {len(batches)} length buckets "
+            f"({sum(lengths)} tokens)"
+        )
+        if result is None:
+            return np.zeros((0, self.get_model_config()['dimension']), dtype=np.float32)
+        return result
     
     def get_similarity(self, text1: str, text2: str) -> float:
         """
@@ -86,12 +454,34 @@ class EmbeddingService:
         Returns:
             Similarity score between 0 and 1
         """
-        model = self.get_model()
-        embeddings = model.encode([text1, text2], convert_to_numpy=True)
+        embeddings = self.generate_embeddings_bulk([text1, text2])
+        return float(similarity_matrix(embeddings[:1], embeddings[1:], settings.SIMILARITY_BLOCK_BYTES)[0, 0])
+    
+    def similarity(
+        self,
+        queries: np.ndarray,
+        candidates: np.ndarray,
+        top_k: Optional[int] = None,
+        exclude_self: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Cosine similarity between two sets of vectors
+        
+        Computed as normalized matrix multiplies over row blocks of at most
+        `SIMILARITY_BLOCK_BYTES`, so memory stays bounded for large inputs.
         
-        # Cosine similarity
-        from numpy import dot
-        from numpy.linalg import norm
+        Args:
+            queries: (n, dim) query vectors
+            candidates: (m, dim) candidate vectors
+            top_k: Return only the best k candidates per query
+            exclude_self: Queries and candidates are the same set; skip self-matches
+            
+        Returns:
+            {"matrix": n x m scores} or {"indices": n x k, "scores": n x k}
+        """
+        block_bytes = settings.SIMILARITY_BLOCK_BYTES
+        if top_k is None:
+            return {'matrix': similarity_matrix(queries, candidates, block_bytes)}
         
-        similarity = dot(embeddings[0], embeddings[1]) / (norm(embeddings[0]) * norm(embeddings[1]))
-        return float(similarity)
+        indices, scores = top_k_similar(queries, candidates, top_k, block_bytes, exclude_self=exclude_self)
+        return {'indices': indices, 'scores': scores}
@@ -0,0 +1,251 @@
+"""
+Background dependency health probing
+
+Each dependency is checked by its own daemon thread on its own interval,
+and every check runs under a hard timeout, so a hung dependency shows up
+as a failed probe instead of hanging the health endpoint. Endpoints only
+read the cached results; per-probe latency history is kept for dashboards.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def check_database(timeout: float):
+    """SELECT 1 on a fresh connection (this probe thread's own)"""
+    from django.db import connection
+
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SET statement_timeout = %s", [int(timeout * 1000)])
+            cursor.execute("SELECT 1")
+    finally:
+        connection.close()
+
+
+def check_qdrant(timeout: float):
+    from .qdrant_service import QdrantService
+
+    QdrantService().get_client().get_collections()
+
+
+def check_mongodb(timeout: float):
+    HealthMonitor().get_mongo_client(timeout).admin.command('ping')
+
+
+def check_redis(timeout: float):
+    import redis
+
+    client = redis.Redis.from_url(settings.CELERY_BROKER_URL, socket_timeout=timeout, socket_connect_timeout=timeout)
+    try:
+        client.ping()
+    finally:
+        client.close()
+
+
+def check_embedding_model(timeout: float):
+    """One tiny forward pass; fails until the model has loaded"""
+    from .embedding_service import EmbeddingService
+
+    embedding_service = EmbeddingService()
+    vectors = np.asarray(embedding_service.get_model().encode(['health check'], batch_size=1))
+    dimension = embedding_service.get_model_config()['dimension']
+    if vectors.shape[-1] != dimension:
+        raise ValueError(f"Model returned {vectors.shape[-1]}d vectors, expected {dimension}d")
+
+
+class Probe:
+    """Latest result and latency history of one dependency"""
+
+    def __init__(self, name: str, check: Callable[[float], None], interval: float, timeout: float, required: bool):
+        self.name = name
+        self.check = check
+        self.interval = interval
+        self.timeout = timeout
+        self.required = required
+        self.lock = threading.Lock()
+        self.history = deque(maxlen=settings.HEALTH_HISTORY_SIZE)
+        self.result = None
+        self.consecutive_failures = 0
+        # A check still running after its timeout; no new check starts until it returns
+        self.pending = None
+
+    def run_once(self):
+        if self.pending is not None and self.pending.is_alive():
+            self.record(None, f"previous check still running after {self.timeout}s")
+            return
+
+        outcome = {}
+
+        def target():
+            try:
+                self.check(self.timeout)
+            except Exception as e:
+                outcome['error'] = f"{type(e).__name__}: {e}"
+
+        started = time.perf_counter()
+        thread = threading.Thread(target=target, name=f"health-check-{self.name}", daemon=True)
+        thread.start()
+        thread.join(self.timeout)
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        if thread.is_alive():
+            self.pending = thread
+            self.record(latency_ms, f"timed out after {self.timeout}s")
+        else:
+            self.pending = None
+            self.record(latency_ms, outcome.get('error'))
+
+    def record(self, latency_ms: Optional[float], error: Optional[str]):
+        checked_at = time.time()
+        healthy = error is None
+        latency_ms = round(latency_ms, 2) if latency_ms is not None else None
+        with self.lock:
+            self.consecutive_failures = 0 if healthy else self.consecutive_failures + 1
+            self.result = {
+                'status': 'healthy' if healthy else 'unhealthy',
+                'latency_ms': latency_ms,
+                'checked_at': checked_at,
+                'error': error,
+            }
+            self.history.append((checked_at, latency_ms, healthy))
+        if not healthy and self.consecutive_failures == 1:
+            logger.warning(f"Health probe {self.name} failed: {error}")
+
+    def get_result(self) -> Dict[str, Any]:
+        with self.lock:
+            result = dict(self.result) if self.result else {'status': 'unknown', 'latency_ms': None,
+                                                            'checked_at': None, 'error': 'not checked yet'}
+            consecutive_failures = self.consecutive_failures
+        if result['checked_at'] is not None:
+            age = time.time() - result['checked_at']
+            # A prober that stopped reporting must not keep the last good result alive
+            if age > self.interval * 3 + self.timeout:
+                result.update(status='stale', error=f"last checked {age:.0f}s ago")
+            result['age_seconds'] = round(age, 1)
+        return {**result, 'required': self.required, 'consecutive_failures': consecutive_failures}
+
+    def get_history(self) -> Dict[str, Any]:
+        with self.lock:
+            samples = list(self.history)
+        latencies = [latency for _, latency, healthy in samples if healthy and latency is not None]
+        return {
+            'interval_seconds': self.interval,
+            'timeout_seconds': self.timeout,
+            'availability': round(sum(healthy for _, _, healthy in samples) / len(samples), 4) if samples else None,
+            'latency_ms': {
+                'p50': round(float(np.percentile(latencies, 50)), 2),
+                'p95': round(float(np.percentile(latencies, 95)), 2),
+                'max': round(max(latencies), 2),
+            } if latencies else None,
+            'samples': [
+                {'checked_at': checked_at, 'latency_ms': latency, 'healthy': healthy}
+                for checked_at, latency, healthy in samples
+            ],
+        }
+
+
+class HealthMonitor:
+    """Singleton owning one prober thread per dependency (restarted after fork)"""
+
+    _instance = None
+    _lock = threading.Lock()
+    _probes = None
+    _pid = None
+    _mongo_client = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def build_probes(self) -> Dict[str, Probe]:
+        interval = settings.HEALTH_PROBE_INTERVAL
+        timeout = settings.HEALTH_PROBE_TIMEOUT
+        required = set(settings.HEALTH_REQUIRED_PROBES)
+        checks = {
+            'database': (check_database, interval),
+            'qdrant': (check_qdrant, interval),
+            'mongodb': (check_mongodb, interval),
+            'redis': (check_redis, interval),
+            'embedding_model': (check_embedding_model, settings.HEALTH_MODEL_PROBE_INTERVAL),
+        }
+        return {
+            name: Probe(name, check, probe_interval, timeout, required=name in required)
+            for name, (check, probe_interval) in checks.items()
+        }
+
+    def ensure_started(self):
+        """Start the probers in this process (no-op if already running)"""
+        if self._pid == os.getpid() or not settings.HEALTH_PROBES_ENABLED:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            HealthMonitor._mongo_client = None
+            HealthMonitor._probes = self.build_probes()
+            HealthMonitor._pid = os.getpid()
+            for probe in self._probes.values():
+                threading.Thread(target=self._loop, args=(probe,), name=f"health-{probe.name}", daemon=True).start()
+            logger.info(f"Started health probers: {', '.join(self._probes)}")
+
+    def _loop(self, probe: Probe):
+        while self._pid == os.getpid():
+            started = time.monotonic()
+            try:
+                probe.run_once()
+            except Exception as e:
+                logger.error(f"Health prober {probe.name} crashed: {e}")
+            time.sleep(max(probe.interval - (time.monotonic() - started), 0.1))
+
+    def get_mongo_client(self, timeout: float):
+        """Dedicated client whose server selection and sockets give up within the probe timeout"""
+        if self._mongo_client is None:
+            from pymongo import MongoClient
+
+            timeout_ms = int(timeout * 1000)
+            HealthMonitor._mongo_client = MongoClient(
+                settings.MONGO_URI,
+                serverSelectionTimeoutMS=timeout_ms,
+                connectTimeoutMS=timeout_ms,
+                socketTimeoutMS=timeout_ms
+            )
+        return self._mongo_client
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Cached readiness: 'ready' when every required probe's latest result is healthy
+
+        Returns:
+            {"status": "ready" | "not_ready" | "starting" | "disabled", "services": {...}}
+        """
+        if not settings.HEALTH_PROBES_ENABLED:
+            return {'status': 'disabled', 'services': {}}
+        self.ensure_started()
+
+        services = {name: probe.get_result() for name, probe in self._probes.items()}
+        required = [result for result in services.values() if result['required']]
+        if all(result['status'] == 'healthy' for result in required):
+            overall = 'ready'
+        elif all(result['status'] in ('healthy', 'unknown') for result in required):
+            overall = 'starting'
+        else:
+            overall = 'not_ready'
+        return {'status': overall, 'services': services}
+
+    def get_history(self, name: Optional[str] = None) -> Dict[str, Any]:
+        """Latency samples and summary per probe (optionally one probe)"""
+        self.ensure_started()
+        probes = self._probes or {}
+        if name is not None:
+            probes = {name: probes[name]} if name in probes else {}
+        return {probe_name: probe.get_history() for probe_name, probe in probes.items()}
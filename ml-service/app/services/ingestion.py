@@ -0,0 +1,131 @@
+"""
+Bulk document ingestion
+
+Documents are validated in batches and inserted with `bulk_create`, and
+their texts are queued as a few `bulk_embed_documents` tasks once the
+transaction commits, instead of one INSERT and one embedding pipeline per
+document. By default the whole payload is validated before anything is
+inserted, in one transaction; committing batch by batch is opt-in for
+streamed uploads too large to hold back.
+"""
+import logging
+from typing import Any, Dict, Iterable, List
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ParseError, ValidationError
+
+logger = logging.getLogger(__name__)
+
+
+def ingest_documents(items: Iterable[Any], atomic: bool = True, batch_size: int = None) -> Dict[str, Any]:
+    """
+    Validate, insert and queue embedding of many documents
+
+    Args:
+        items: Document dicts as accepted by `DocumentSerializer` (with optional
+            "text"); `ParseError` instances stand for unparseable NDJSON lines
+        atomic: Validate every item first and insert all of them in one
+            transaction, or nothing if any is invalid. Otherwise each batch
+            of valid items commits as soon as it is validated and invalid
+            items are reported.
+        batch_size: Documents per validation batch (and per transaction
+            unless `atomic`); default BULK_INGEST_BATCH_SIZE
+
+    Returns:
+        {"created", "total", "queued_batches", "errors": [{"index", "errors"}]}
+        with `index` the item's position in the input, plus "conflict": True
+        if a mongo_id was inserted concurrently. Ingestion stops there;
+        without `atomic`, batches inserted before stay committed and are
+        counted in "created".
+    """
+    from ..models import Document
+    from ..serializers import DocumentIngestSerializer
+
+    batch_size = batch_size or settings.BULK_INGEST_BATCH_SIZE
+    validator = DocumentIngestSerializer()
+    result = {'created': 0, 'total': 0, 'queued_batches': 0, 'errors': []}
+    seen_mongo_ids = set()
+    valid = []
+    batch = []
+
+    def check_batch():
+        """Reject mongo_ids already stored, with one query per batch"""
+        mongo_ids = [data['mongo_id'] for _, data in batch if data.get('mongo_id')]
+        taken = set(Document.objects.filter(mongo_id__in=mongo_ids).values_list('mongo_id', flat=True))
+        for index, data in batch:
+            if data.get('mongo_id') in taken:
+                result['errors'].append({
+                    'index': index,
+                    'errors': {'mongo_id': ['document with this mongo id already exists.']}
+                })
+            else:
+                valid.append(data)
+        batch.clear()
+
+    try:
+        for index, item in enumerate(items):
+            result['total'] += 1
+            try:
+                if isinstance(item, ParseError):
+                    raise ValidationError({'non_field_errors': [item.detail]})
+                data = validator.run_validation(item)
+            except ValidationError as e:
+                result['errors'].append({'index': index, 'errors': e.detail})
+                continue
+
+            mongo_id = data.get('mongo_id')
+            if mongo_id:
+                if mongo_id in seen_mongo_ids:
+                    result['errors'].append({'index': index, 'errors': {'mongo_id': ['Duplicate mongo_id in request.']}})
+                    continue
+                seen_mongo_ids.add(mongo_id)
+
+            batch.append((index, data))
+            if len(batch) == batch_size:
+                check_batch()
+                if not atomic:
+                    _insert(valid, result)
+                    valid.clear()
+
+        if batch:
+            check_batch()
+        if atomic and result['errors']:
+            return result
+        _insert(valid, result)
+    except IntegrityError as e:
+        logger.error(f"Bulk ingestion conflict after {result['created']} documents: {e}")
+        result['conflict'] = True
+    return result
+
+
+def _insert(validated: List[Dict[str, Any]], result: Dict[str, Any]):
+    """Insert one transaction of documents and queue their texts after commit"""
+    from ..models import Document
+    from ..tasks import dispatch_bulk_embedding
+    from .qdrant_service import QdrantService
+
+    if not validated:
+        return
+
+    documents = []
+    pending = []
+    for data in validated:
+        data = dict(data)
+        text = data.pop('text', None)
+        document = Document(**data)
+        documents.append(document)
+        if text:
+            pending.append({'document_id': str(document.id), 'text': text})
+
+    def queue_embeddings():
+        result['queued_batches'] += dispatch_bulk_embedding(pending, metadata={'created_via': 'bulk_create'})
+
+    with transaction.atomic():
+        Document.objects.bulk_create(documents, batch_size=settings.BULK_INGEST_BATCH_SIZE)
+        if pending:
+            transaction.on_commit(queue_embeddings)
+
+    result['created'] += len(documents)
+    QdrantService().invalidate_users({document.user_id for document in documents})
+    logger.info(f"Bulk ingested {len(documents)} documents, {len(pending)} queued for embedding")
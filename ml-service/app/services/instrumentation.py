@@ -0,0 +1,184 @@
+"""
+Lightweight stage timing
+
+`span(stage)` / `timed(stage)` measure a block or function with
+perf_counter and record it twice: into a process-wide histogram (rendered
+by `render_prometheus` for /metrics) and, during a request, into the
+request's stage totals (sent as a Server-Timing header by
+`middleware.ServerTimingMiddleware`). A measurement costs a few
+microseconds: two clock reads, a bisect and an uncontended lock.
+
+Metrics are per process, like the other /stats/ counters.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+# Seconds; spans from sub-millisecond cache hits to slow model loads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stage -> [seconds, calls] of the request being served (None outside requests)
+_request_stages = contextvars.ContextVar('request_stages', default=None)
+
+
+class Histogram:
+    """Cumulative-on-render Prometheus histogram"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect_left(self.buckets, seconds)
+        with self.lock:
+            self.counts[index] += 1
+            self.total += seconds
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self.lock:
+            return list(self.counts), self.total
+
+
+class MetricFamily:
+    """Histograms of one metric, one per label set"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.series: Dict[Tuple[str, ...], Histogram] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], seconds: float):
+        histogram = self.series.get(labels)
+        if histogram is None:
+            with self.lock:
+                histogram = self.series.setdefault(labels, Histogram())
+        histogram.observe(seconds)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, histogram in sorted(self.series.items()):
+            label_text = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            prefix = f"{label_text}," if label_text else ''
+            counts, total = histogram.snapshot()
+            cumulative = 0
+            for bound, count in zip((*histogram.buckets, '+Inf'), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}'
+            label_set = f"{{{label_text}}}" if label_text else ''
+            yield f"{self.name}_sum{label_set} {total}"
+            yield f"{self.name}_count{label_set} {cumulative}"
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+STAGE_DURATION = MetricFamily(
+    'ml_stage_duration_seconds', 'Time spent in instrumented service calls and request stages', ('stage',)
+)
+REQUEST_DURATION = MetricFamily(
+    'ml_request_duration_seconds', 'HTTP request latency by view', ('view', 'method', 'status')
+)
+
+
+def record(stage: str, seconds: float):
+    """Add one measurement of `stage` to the histogram and the current request"""
+    STAGE_DURATION.observe((stage,), seconds)
+    stages = _request_stages.get()
+    if stages is not None:
+        totals = stages.get(stage)
+        if totals is None:
+            stages[stage] = [seconds, 1]
+        else:
+            totals[0] += seconds
+            totals[1] += 1
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block as `stage`"""
+    if not settings.INSTRUMENTATION_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started)
+
+
+def timed(stage: str):
+    """Decorator timing every call of a function or coroutine function as `stage`"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not settings.INSTRUMENTATION_ENABLED:
+                    return await func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    record(stage, time.perf_counter() - started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not settings.INSTRUMENTATION_ENABLED:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(stage, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def instrumented(prefix: str, methods: Iterable[str]):
+    """Class decorator timing the named methods as `<prefix>.<method>`"""
+    def decorator(cls):
+        for name in methods:
+            setattr(cls, name, timed(f"{prefix}.{name}")(cls.__dict__[name]))
+        return cls
+    return decorator
+
+
+def start_request():
+    """Begin collecting stage totals for the current request (see `finish_request`)"""
+    stages = {}
+    return _request_stages.set(stages), stages
+
+
+def finish_request(token):
+    _request_stages.reset(token)
+
+
+def server_timing(stages: Dict[str, List[float]], total_seconds: float) -> str:
+    """Server-Timing header value: one metric per stage plus the request total, in ms"""
+    entries = [
+        f'{stage};dur={totals[0] * 1000:.2f}' + (f';desc="{totals[1]} calls"' if totals[1] > 1 else '')
+        for stage, totals in stages.items()
+    ]
+    entries.append(f'total;dur={total_seconds * 1000:.2f}')
+    return ', '.join(entries)
+
+
+def render_prometheus(families: Optional[Iterable[MetricFamily]] = None) -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for family in families or (REQUEST_DURATION, STAGE_DURATION):
+        lines.extend(family.render())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,74 @@
+"""
+Per-process memory accounting (RSS / PSS / shared vs private pages)
+"""
+import os
+import resource
+from typing import Any, Dict, Optional
+
+SMAPS_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty', 'Swap')
+
+
+def _parse_smaps_fields(lines) -> Dict[str, int]:
+    totals = {field: 0 for field in SMAPS_FIELDS}
+    for line in lines:
+        key, _, rest = line.partition(':')
+        if key in totals:
+            totals[key] += int(rest.split()[0])  # kB
+    return totals
+
+
+def _to_mb(totals: Dict[str, int]) -> Dict[str, float]:
+    return {f"{key.lower()}_mb": round(value / 1024, 1) for key, value in totals.items()}
+
+
+def mapped_file_usage(path: str) -> Optional[Dict[str, float]]:
+    """Resident/shared memory of all mappings of `path` in this process"""
+    try:
+        with open('/proc/self/smaps') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    selected = []
+    in_mapping = False
+    for line in lines:
+        first = line.split(maxsplit=5)
+        if first and '-' in first[0] and len(first) >= 5 and ':' not in first[0]:
+            # Mapping header: address perms offset dev inode [path]
+            in_mapping = len(first) == 6 and first[5].strip() == path
+            continue
+        if in_mapping:
+            selected.append(line)
+
+    if not selected:
+        return None
+    return _to_mb(_parse_smaps_fields(selected))
+
+
+def get_memory_report(weights_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Memory usage of the current process
+
+    PSS divides shared pages between the processes mapping them, so summing
+    `pss_mb` across workers gives their real combined footprint; compare it
+    with summed `rss_mb` to see what sharing saves.
+
+    Args:
+        weights_path: Memory-mapped weights file to report separately
+    """
+    report = {
+        'pid': os.getpid(),
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            report.update(_to_mb(_parse_smaps_fields(f)))
+    except OSError:
+        pass  # Not Linux (or kernel < 4.14): max RSS only
+
+    if weights_path:
+        report['weights_file'] = weights_path
+        report['weights_mapping'] = mapped_file_usage(weights_path)
+
+    return report
@@ -6,9 +6,20 @@ from minio import Minio
 from django.conf import settings
 from io import BytesIO
 
+from .instrumentation import instrumented
+
 logger = logging.getLogger(__name__)
 
 
+@instrumented('minio', [
+    'upload_file',
+    'upload_bytes',
+    'download_file',
+    'download_bytes',
+    'delete_file',
+    'list_files',
+    'get_presigned_url',
+])
 class MinIOService:
     """Singleton service for MinIO operations"""
     
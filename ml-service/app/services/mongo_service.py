@@ -7,9 +7,19 @@ from django.conf import settings
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+from .instrumentation import instrumented
+
 logger = logging.getLogger(__name__)
 
 
+@instrumented('mongo', [
+    'get_journal_entries',
+    'get_journal_entry',
+    'get_journal_entries_by_ids',
+    'get_goals',
+    'get_patterns',
+    'store_raw_text',
+])
 class MongoService:
     """Singleton service for MongoDB operations"""
     
@@ -85,6 +95,27 @@ class MongoService:
             logger.error(f"Error fetching journal entry {entry_id}: {e}")
             return None
     
+    def get_journal_entries_by_ids(self, entry_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get many journal entries in a single query
+        
+        Args:
+            entry_ids: Journal entry ObjectId strings (invalid IDs are skipped)
+            
+        Returns:
+            Mapping of entry ID to journal entry document
+        """
+        from bson import ObjectId
+        db = self.get_db()
+        
+        object_ids = [ObjectId(entry_id) for entry_id in entry_ids if ObjectId.is_valid(entry_id)]
+        entries = {}
+        for entry in db.journalentries.find({'_id': {'$in': object_ids}}):
+            entry['_id'] = str(entry['_id'])
+            entries[entry['_id']] = entry
+        
+        return entries
+    
     def get_goals(self, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get user goals"""
         db = self.get_db()
@@ -1,59 +1,539 @@
 """
 Service for Qdrant vector database operations
 """
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, Union
+import httpx
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, MatchAny, Range, FilterSelector,
+    SearchRequest, HnswConfigDiff, CollectionParamsDiff, KeywordIndexParams, PayloadSchemaType,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, BinaryQuantization, BinaryQuantizationConfig,
+    Disabled, VectorParamsDiff, SearchParams, QuantizationSearchParams, OptimizersConfigDiff,
+    CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation, RecommendStrategy,
+    SetPayload, SetPayloadOperation
+)
 from django.conf import settings
 import uuid
+import numpy as np
+
+from .chunking import chunk_point_id
+from .search_result_cache import SearchResultCache
+from .user_generations import UserGenerations
+from .user_vector_cache import UserVectorCache
+from .instrumentation import instrumented
 
 logger = logging.getLogger(__name__)
 
+# Payload fields used in filters, group_by and chunk cleanup
+KEYWORD_INDEXES = ('user_id', 'document_type', 'project_id', 'document_id')
+INTEGER_INDEXES = ('chunk_index',)
+
+# Document fields copied into every chunk's payload (field -> payload key), so
+# searches can answer without Postgres
+DOCUMENT_PAYLOAD_FIELDS = {
+    'title': 'title',
+    'mongo_id': 'mongo_id',
+    'user_id': 'user_id',
+    'project_id': 'project_id',
+    'document_type': 'document_type',
+    'metadata': 'document_metadata',
+    'created_at': 'created_at',
+}
+
+
+def document_payload(doc) -> Dict[str, Any]:
+    """Denormalized Document fields stored with each of its chunk vectors"""
+    return {
+        'user_id': doc.user_id,
+        'project_id': doc.project_id,
+        'document_type': doc.document_type,
+        'title': doc.title,
+        'mongo_id': doc.mongo_id,
+        'document_metadata': doc.metadata,
+        # Same format as DocumentSerializer
+        'created_at': doc.created_at.isoformat().replace('+00:00', 'Z') if doc.created_at else None,
+    }
+
+
+def project_document(payload: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """Document fields rebuilt from a hit's payload (see DOCUMENT_PAYLOAD_FIELDS)"""
+    return {
+        'id': payload.get('document_id'),
+        **{field: payload.get(DOCUMENT_PAYLOAD_FIELDS[field]) for field in fields},
+    }
+
+
+def payload_selector(fields: List[str]) -> List[str]:
+    """Payload keys Qdrant must return to project `fields`"""
+    return ['document_id', *(DOCUMENT_PAYLOAD_FIELDS[field] for field in fields)]
 
+
+# Qdrant's default optimizer indexing threshold (KB), restored after bulk loads
+DEFAULT_INDEXING_THRESHOLD = 20000
+
+
+@instrumented('qdrant', [
+    'upsert_vector',
+    'upsert_vectors',
+    'delete_stale_chunks',
+    'set_document_payloads',
+    'search_vectors',
+    'search_vectors_async',
+    'search_vectors_batch',
+    'document_point_ids',
+    'recommend',
+    'delete_vector',
+    'delete_document_vectors',
+    'get_vector',
+    'scroll_user_points',
+    'get_document_vectors',
+])
 class QdrantService:
     """Singleton service for Qdrant operations"""
     
     _instance = None
     _client = None
+    _client_pid = None
+    _client_lock = threading.Lock()
+    # Event loop -> AsyncQdrantClient; entries go away with their loop
+    _async_clients = weakref.WeakKeyDictionary()
+    _async_clients_lock = threading.Lock()
+    _generations = None
+    _user_cache = None
+    _search_cache = None
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
     
-    def get_client(self) -> QdrantClient:
-        """Get Qdrant client"""
-        if self._client is None:
-            logger.info(f"Connecting to Qdrant: {settings.QDRANT_URL}")
-            self._client = QdrantClient(
-                url=settings.QDRANT_URL,
-                api_key=settings.QDRANT_API_KEY if settings.QDRANT_API_KEY else None
+    def create_client(self, prefer_grpc: Optional[bool] = None) -> QdrantClient:
+        """
+        Build a new Qdrant client from settings
+        
+        Args:
+            prefer_grpc: Override QDRANT_PREFER_GRPC (used by bench_qdrant)
+        """
+        if prefer_grpc is None:
+            prefer_grpc = settings.QDRANT_PREFER_GRPC
+        
+        return QdrantClient(
+            url=settings.QDRANT_URL,
+            api_key=settings.QDRANT_API_KEY if settings.QDRANT_API_KEY else None,
+            prefer_grpc=prefer_grpc,
+            grpc_port=settings.QDRANT_GRPC_PORT,
+            timeout=settings.QDRANT_TIMEOUT,
+            # REST connection pool; gRPC multiplexes requests over one channel
+            limits=httpx.Limits(
+                max_connections=settings.QDRANT_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.QDRANT_POOL_MAX_KEEPALIVE
+            )
+        )
+    
+    def create_async_client(self) -> AsyncQdrantClient:
+        """Build a new asyncio Qdrant client from settings (see `create_client`)"""
+        return AsyncQdrantClient(
+            url=settings.QDRANT_URL,
+            api_key=settings.QDRANT_API_KEY if settings.QDRANT_API_KEY else None,
+            prefer_grpc=settings.QDRANT_PREFER_GRPC,
+            grpc_port=settings.QDRANT_GRPC_PORT,
+            timeout=settings.QDRANT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.QDRANT_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.QDRANT_POOL_MAX_KEEPALIVE
             )
-            logger.info("Connected to Qdrant")
+        )
+    
+    def get_async_client(self) -> AsyncQdrantClient:
+        """
+        Get the asyncio Qdrant client of the running event loop
+        
+        Connections belong to the loop that opened them, so each loop gets
+        its own client. Only use this on long-lived loops (ASGI workers);
+        see `async_client`.
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = self.create_async_client()
+                self._async_clients[loop] = client
+        return client
+    
+    @asynccontextmanager
+    async def async_client(self, shared: bool = True):
+        """
+        asyncio Qdrant client for a block of work
+        
+        Args:
+            shared: Use the running loop's long-lived client (ASGI). Async
+                views served through WSGI run each request on a throwaway
+                loop in its own thread; pass False there to get a client
+                that is closed at the end of the block instead.
+        """
+        if shared:
+            yield self.get_async_client()
+            return
+        client = self.create_async_client()
+        try:
+            yield client
+        finally:
+            await client.close()
+    
+    def get_client(self) -> QdrantClient:
+        """
+        Get the Qdrant client of the current process
+        
+        Sockets and gRPC channels do not survive fork, so a client inherited
+        from a parent process (gunicorn master, Celery prefork parent) is
+        replaced by a fresh one on first use in the child.
+        """
+        if self._client is None or self._client_pid != os.getpid():
+            with self._client_lock:
+                if self._client is None or self._client_pid != os.getpid():
+                    transport = 'gRPC' if settings.QDRANT_PREFER_GRPC else 'REST'
+                    logger.info(f"Connecting to Qdrant: {settings.QDRANT_URL} ({transport})")
+                    self._client = self.create_client()
+                    self._client_pid = os.getpid()
+                    logger.info("Connected to Qdrant")
         return self._client
     
-    def initialize_collection(self):
-        """Create collection if it doesn't exist"""
+    def get_generations(self) -> UserGenerations:
+        """Per-user generation counters used to invalidate search caches"""
+        if self._generations is None:
+            QdrantService._generations = UserGenerations(settings.USER_GENERATION_REDIS_URL)
+        return self._generations
+    
+    def invalidate_users(self, user_ids):
+        """Mark cached vectors and search results of these users as stale"""
+        self.get_generations().bump(user_ids)
+    
+    def get_user_cache(self) -> Optional[UserVectorCache]:
+        """Per-user exact-search cache (None if disabled)"""
+        if not settings.USER_VECTOR_CACHE_ENABLED:
+            return None
+        if self._user_cache is None:
+            with self._client_lock:
+                if self._user_cache is None:
+                    QdrantService._user_cache = UserVectorCache(
+                        loader=self.scroll_user_points,
+                        generations=self.get_generations(),
+                        max_bytes=settings.USER_VECTOR_CACHE_MAX_MB * 1024 * 1024,
+                        max_points=settings.USER_VECTOR_CACHE_MAX_POINTS,
+                        ttl=settings.USER_VECTOR_CACHE_TTL
+                    )
+        return self._user_cache
+    
+    def get_user_cache_stats(self) -> Dict[str, Any]:
+        """Per-user exact-search cache counters"""
+        cache = self.get_user_cache()
+        if cache is None:
+            return {'enabled': False}
+        return {'enabled': True, **cache.get_stats()}
+    
+    def get_search_cache(self) -> Optional[SearchResultCache]:
+        """Redis cache of semantic search responses (None if disabled)"""
+        if not settings.SEARCH_RESULT_CACHE_ENABLED:
+            return None
+        if self._search_cache is None:
+            QdrantService._search_cache = SearchResultCache(
+                redis_url=settings.SEARCH_RESULT_CACHE_REDIS_URL,
+                generations=self.get_generations(),
+                ttl=settings.SEARCH_RESULT_CACHE_TTL
+            )
+        return self._search_cache
+    
+    def get_search_cache_stats(self) -> Dict[str, Any]:
+        """Search result cache counters"""
+        cache = self.get_search_cache()
+        if cache is None:
+            return {'enabled': False}
+        return {'enabled': True, **cache.get_stats()}
+    
+    def collection_schema(self) -> Dict[str, Any]:
+        """
+        Desired layout of the embeddings collection, from settings
+        
+        With QDRANT_TENANT_PARTITIONING the global HNSW graph is disabled
+        (m=0) and Qdrant builds one graph per user_id instead (payload_m),
+        which keeps filtered per-user search fast as the collection grows.
+        Searches without a user_id filter then fall back to full scans.
+        """
+        if settings.QDRANT_TENANT_PARTITIONING:
+            hnsw_config = HnswConfigDiff(
+                m=0,
+                payload_m=settings.QDRANT_HNSW_M,
+                ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT
+            )
+        else:
+            hnsw_config = HnswConfigDiff(
+                m=settings.QDRANT_HNSW_M,
+                ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT
+            )
+        
+        payload_indexes = {
+            field: KeywordIndexParams(
+                type='keyword',
+                is_tenant=field == 'user_id' and settings.QDRANT_TENANT_PARTITIONING
+            )
+            for field in KEYWORD_INDEXES
+        }
+        payload_indexes.update({field: PayloadSchemaType.INTEGER for field in INTEGER_INDEXES})
+        
+        return {
+            'vectors_on_disk': settings.QDRANT_VECTORS_ON_DISK,
+            'quantization_config': self._quantization_config(),
+            'shard_number': settings.QDRANT_SHARD_NUMBER,
+            'replication_factor': settings.QDRANT_REPLICATION_FACTOR,
+            'write_consistency_factor': settings.QDRANT_WRITE_CONSISTENCY_FACTOR,
+            'hnsw_config': hnsw_config,
+            'payload_indexes': payload_indexes,
+        }
+    
+    def _quantization_config(self):
+        """Quantization from QDRANT_QUANTIZATION (None when disabled)"""
+        mode = settings.QDRANT_QUANTIZATION
+        if mode == 'scalar':
+            return ScalarQuantization(scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=settings.QDRANT_QUANTIZATION_QUANTILE,
+                always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM
+            ))
+        if mode == 'binary':
+            return BinaryQuantization(binary=BinaryQuantizationConfig(
+                always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM
+            ))
+        return None
+    
+    def search_params(
+        self,
+        oversampling: Optional[float] = None,
+        rescore: Optional[bool] = None,
+        exact: bool = False
+    ) -> Optional[SearchParams]:
+        """
+        Search-time parameters for quantized collections
+        
+        Args:
+            oversampling: Fetch this many times `limit` candidates from the
+                quantized index before rescoring (default QDRANT_SEARCH_OVERSAMPLING)
+            rescore: Re-rank candidates with the original vectors
+                (default QDRANT_SEARCH_RESCORE)
+            exact: Brute-force search over original vectors (ground truth)
+        """
+        if exact:
+            return SearchParams(exact=True)
+        if settings.QDRANT_QUANTIZATION == 'none':
+            return None
+        return SearchParams(quantization=QuantizationSearchParams(
+            rescore=settings.QDRANT_SEARCH_RESCORE if rescore is None else rescore,
+            oversampling=settings.QDRANT_SEARCH_OVERSAMPLING if oversampling is None else oversampling
+        ))
+    
+    def initialize_collection(self, collection_name: Optional[str] = None):
+        """
+        Create the collection if it doesn't exist, otherwise migrate it to the current schema
+        
+        The live alias (QDRANT_COLLECTION_EMBEDDINGS) is created on first
+        start: pointing at the plain QDRANT_COLLECTION_PREFIX collection on
+        installs that predate aliases, or at a new `<prefix>_v1` otherwise.
+        Re-embedding can then switch it to another collection atomically.
+        """
+        client = self.get_client()
+        alias = collection_name or settings.QDRANT_COLLECTION_EMBEDDINGS
+        collection_name = self.resolve_alias(alias) or alias
+        
+        if client.collection_exists(collection_name):
+            logger.info(f"Collection {collection_name} already exists")
+            self.migrate_collection(collection_name)
+        elif alias == settings.QDRANT_COLLECTION_EMBEDDINGS:
+            legacy = settings.QDRANT_COLLECTION_PREFIX
+            if client.collection_exists(legacy):
+                self.migrate_collection(legacy)
+                self.switch_alias(alias, legacy)
+            else:
+                self.create_collection(f"{legacy}_v1")
+                self.switch_alias(alias, f"{legacy}_v1")
+        else:
+            self.create_collection(collection_name)
+    
+    def create_collection(self, collection_name: str, dimension: Optional[int] = None, indexing: bool = True):
+        """
+        Create a collection with the configured schema
+        
+        Args:
+            collection_name: New collection name
+            dimension: Vector size (default EMBEDDING_DIMENSION)
+            indexing: False defers HNSW building (for bulk loads, see `set_indexing`)
+        """
+        client = self.get_client()
+        schema = self.collection_schema()
+        logger.info(f"Creating Qdrant collection: {collection_name}")
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(
+                size=dimension or settings.EMBEDDING_DIMENSION,
+                distance=Distance.COSINE,
+                on_disk=schema['vectors_on_disk']
+            ),
+            quantization_config=schema['quantization_config'],
+            shard_number=schema['shard_number'],
+            replication_factor=schema['replication_factor'],
+            write_consistency_factor=schema['write_consistency_factor'],
+            hnsw_config=schema['hnsw_config'],
+            optimizers_config=None if indexing else OptimizersConfigDiff(indexing_threshold=0)
+        )
+        for field, field_schema in schema['payload_indexes'].items():
+            client.create_payload_index(collection_name, field_name=field, field_schema=field_schema)
+        logger.info("Collection created successfully")
+    
+    def set_indexing(self, collection_name: str, enabled: bool):
+        """
+        Pause or resume HNSW index building on a collection
+        
+        With indexing paused, bulk upserts only append to segments, keeping
+        Qdrant's CPU free for live searches; the graph is built once
+        indexing resumes.
+        """
+        self.get_client().update_collection(
+            collection_name,
+            optimizers_config=OptimizersConfigDiff(
+                indexing_threshold=DEFAULT_INDEXING_THRESHOLD if enabled else 0
+            )
+        )
+    
+    def resolve_alias(self, alias: str) -> Optional[str]:
+        """Collection an alias points to (None if `alias` is not an alias)"""
+        for description in self.get_client().get_aliases().aliases:
+            if description.alias_name == alias:
+                return description.collection_name
+        return None
+    
+    def switch_alias(self, alias: str, collection_name: str) -> Optional[str]:
+        """
+        Point `alias` at `collection_name` in one atomic operation
+        
+        Returns:
+            The collection the alias pointed to before, if any
+        """
         client = self.get_client()
-        collection_name = settings.QDRANT_COLLECTION_EMBEDDINGS
+        previous = self.resolve_alias(alias)
         
-        # Check if collection exists
-        collections = client.get_collections().collections
-        exists = any(c.name == collection_name for c in collections)
+        operations = []
+        if previous is not None:
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+        operations.append(CreateAliasOperation(create_alias=CreateAlias(
+            collection_name=collection_name,
+            alias_name=alias
+        )))
+        client.update_collection_aliases(change_aliases_operations=operations)
         
-        if not exists:
-            logger.info(f"Creating Qdrant collection: {collection_name}")
-            client.create_collection(
-                collection_name=collection_name,
-                vectors_config=VectorParams(
-                    size=settings.EMBEDDING_DIMENSION,
-                    distance=Distance.COSINE
+        logger.info(f"Alias {alias} now points to {collection_name} (was {previous})")
+        return previous
+    
+    def migrate_collection(self, collection_name: Optional[str] = None, dry_run: bool = False) -> List[str]:
+        """
+        Bring an existing collection in line with `collection_schema`
+        
+        Updates HNSW, quantization, vector storage and replication
+        parameters in place and (re)creates
+        payload indexes whose type or tenant flag differ. The shard count of
+        an existing collection cannot change; a mismatch is only reported.
+        
+        Args:
+            collection_name: Defaults to QDRANT_COLLECTION_EMBEDDINGS
+            dry_run: Only report what would change
+            
+        Returns:
+            Human-readable list of changes (applied, or planned if dry_run)
+        """
+        client = self.get_client()
+        collection_name = collection_name or settings.QDRANT_COLLECTION_EMBEDDINGS
+        collection_name = self.resolve_alias(collection_name) or collection_name
+        schema = self.collection_schema()
+        info = client.get_collection(collection_name)
+        changes = []
+        
+        current_hnsw = info.config.hnsw_config
+        hnsw_diff = {
+            key: value
+            for key, value in schema['hnsw_config'].model_dump(exclude_none=True).items()
+            if getattr(current_hnsw, key, None) != value
+        }
+        if hnsw_diff:
+            changes.append(f"hnsw_config: {hnsw_diff}")
+            if not dry_run:
+                client.update_collection(collection_name, hnsw_config=HnswConfigDiff(**hnsw_diff))
+        
+        current_quantization = info.config.quantization_config
+        wanted_quantization = schema['quantization_config']
+        if (
+            (current_quantization.model_dump() if current_quantization else None)
+            != (wanted_quantization.model_dump() if wanted_quantization else None)
+        ):
+            changes.append(f"quantization: {settings.QDRANT_QUANTIZATION}")
+            if not dry_run:
+                client.update_collection(
+                    collection_name,
+                    quantization_config=wanted_quantization or Disabled.DISABLED
                 )
+        
+        params = info.config.params
+        if bool(getattr(params.vectors, 'on_disk', False)) != schema['vectors_on_disk']:
+            changes.append(f"vectors on_disk: {schema['vectors_on_disk']}")
+            if not dry_run:
+                client.update_collection(
+                    collection_name,
+                    vectors_config={'': VectorParamsDiff(on_disk=schema['vectors_on_disk'])}
+                )
+        
+        params_diff = {
+            key: schema[key]
+            for key in ('replication_factor', 'write_consistency_factor')
+            if getattr(params, key, None) != schema[key]
+        }
+        if params_diff:
+            changes.append(f"collection params: {params_diff}")
+            if not dry_run:
+                client.update_collection(collection_name, collection_params=CollectionParamsDiff(**params_diff))
+        
+        if params.shard_number != schema['shard_number']:
+            logger.warning(
+                f"Collection {collection_name} has {params.shard_number} shards, settings ask for "
+                f"{schema['shard_number']}; re-create the collection to change it"
             )
-            logger.info("Collection created successfully")
-        else:
-            logger.info(f"Collection {collection_name} already exists")
+        
+        existing = info.payload_schema or {}
+        for field, field_schema in schema['payload_indexes'].items():
+            current = existing.get(field)
+            wanted_type = PayloadSchemaType(getattr(field_schema, 'type', field_schema))
+            wanted_tenant = bool(getattr(field_schema, 'is_tenant', False))
+            
+            if current is None:
+                changes.append(f"create payload index {field} ({wanted_type.value})")
+            elif (
+                current.data_type != wanted_type
+                or bool(getattr(current.params, 'is_tenant', False)) != wanted_tenant
+            ):
+                changes.append(f"rebuild payload index {field} ({wanted_type.value}, is_tenant={wanted_tenant})")
+                if not dry_run:
+                    client.delete_payload_index(collection_name, field_name=field)
+            else:
+                continue
+            
+            if not dry_run:
+                client.create_payload_index(collection_name, field_name=field, field_schema=field_schema)
+        
+        for change in changes:
+            logger.info(f"{'Would apply' if dry_run else 'Applied'} to {collection_name}: {change}")
+        return changes
     
     def upsert_vector(
         self,
@@ -90,54 +570,427 @@ class QdrantService:
         
         return point_id
     
+    def upsert_vectors(
+        self,
+        points: List[PointStruct],
+        batch_size: Optional[int] = None,
+        parallel: Optional[int] = None,
+        wait: bool = True,
+        collection_name: Optional[str] = None
+    ) -> List[str]:
+        """
+        Upsert many points in chunks, several requests in flight at once
+        
+        Args:
+            points: Points to write
+            batch_size: Points per request (default QDRANT_UPSERT_BATCH_SIZE)
+            parallel: Max concurrent requests (default QDRANT_UPSERT_PARALLEL)
+            wait: Block until each chunk is applied; False returns once Qdrant
+                has accepted it, trading read-after-write consistency for speed
+            collection_name: Defaults to QDRANT_COLLECTION_EMBEDDINGS
+            
+        Returns:
+            Point IDs, in input order
+        """
+        client = self.get_client()
+        collection_name = collection_name or settings.QDRANT_COLLECTION_EMBEDDINGS
+        batch_size = batch_size or settings.QDRANT_UPSERT_BATCH_SIZE
+        parallel = parallel or settings.QDRANT_UPSERT_PARALLEL
+        
+        batches = [points[start:start + batch_size] for start in range(0, len(points), batch_size)]
+        
+        def upsert(batch):
+            client.upsert(
+                collection_name=collection_name,
+                points=batch,
+                wait=wait
+            )
+        
+        if len(batches) <= 1 or parallel <= 1:
+            for batch in batches:
+                upsert(batch)
+        else:
+            with ThreadPoolExecutor(max_workers=min(parallel, len(batches))) as executor:
+                # list() re-raises the first failed chunk
+                list(executor.map(upsert, batches))
+        
+        logger.debug(f"Upserted {len(points)} points in {len(batches)} requests (wait={wait})")
+        return [point.id for point in points]
+    
+    def build_chunk_points(
+        self,
+        document_id: str,
+        vectors,
+        chunks: List[Dict[str, Any]],
+        metadata: Dict[str, Any]
+    ) -> List[PointStruct]:
+        """
+        One point per document chunk
+        
+        Args:
+            document_id: Parent Document UUID
+            vectors: One embedding per chunk ((n, dim) array or nested lists)
+            chunks: Chunk descriptors from `chunking.chunk_text`
+            metadata: Payload shared by all chunks (must include user_id etc.)
+        """
+        return [
+            PointStruct(
+                id=chunk_point_id(document_id, chunk['index']),
+                vector=vector,
+                payload={
+                    **metadata,
+                    'document_id': document_id,
+                    'chunk_index': chunk['index'],
+                    'chunk_count': len(chunks),
+                    'chunk_start': chunk['start'],
+                    'chunk_end': chunk['end'],
+                }
+            )
+            for chunk, vector in zip(chunks, np.asarray(vectors, dtype=np.float32).tolist())
+        ]
+    
+    def delete_stale_chunks(
+        self,
+        chunk_counts: Dict[str, int],
+        wait: bool = True,
+        collection_name: Optional[str] = None
+    ):
+        """
+        Drop chunks left over from older versions of re-indexed documents
+        
+        Args:
+            chunk_counts: Document ID -> number of chunks it has now
+            collection_name: Defaults to QDRANT_COLLECTION_EMBEDDINGS
+        """
+        if not chunk_counts:
+            return
+        
+        client = self.get_client()
+        client.delete(
+            collection_name=collection_name or settings.QDRANT_COLLECTION_EMBEDDINGS,
+            points_selector=FilterSelector(filter=Filter(should=[
+                Filter(must=[
+                    FieldCondition(key='document_id', match=MatchValue(value=document_id)),
+                    FieldCondition(key='chunk_index', range=Range(gte=count)),
+                ])
+                for document_id, count in chunk_counts.items()
+            ])),
+            wait=wait
+        )
+    
+    def set_document_payloads(
+        self,
+        payloads: Dict[str, Dict[str, Any]],
+        collection_name: Optional[str] = None,
+        wait: bool = True
+    ):
+        """
+        Overwrite payload keys on every chunk of many documents in one request
+        
+        Args:
+            payloads: Document ID -> payload keys to set (see `document_payload`)
+            collection_name: Defaults to QDRANT_COLLECTION_EMBEDDINGS
+        """
+        if not payloads:
+            return
+        
+        self.get_client().batch_update_points(
+            collection_name=collection_name or settings.QDRANT_COLLECTION_EMBEDDINGS,
+            update_operations=[
+                SetPayloadOperation(set_payload=SetPayload(
+                    payload=payload,
+                    filter=Filter(must=[
+                        FieldCondition(key='document_id', match=MatchValue(value=document_id))
+                    ])
+                ))
+                for document_id, payload in payloads.items()
+            ],
+            wait=wait
+        )
+    
     def search_vectors(
         self,
         query_vector: List[float],
         limit: int = 10,
         score_threshold: float = 0.5,
-        filter_dict: Optional[Dict[str, Any]] = None
+        filter_dict: Optional[Dict[str, Any]] = None,
+        oversampling: Optional[float] = None,
+        rescore: Optional[bool] = None,
+        with_payload: Union[bool, List[str]] = True
     ) -> List[Dict[str, Any]]:
         """
         Search for similar vectors
         
         Args:
             query_vector: Query embedding vector
-            limit: Number of results to return
+            limit: Number of documents to return (chunks are grouped per document)
             score_threshold: Minimum similarity score
             filter_dict: Optional metadata filters (e.g., {"user_id": "123"})
+            oversampling: Quantized collections: candidate multiplier (see `search_params`)
+            rescore: Quantized collections: re-rank with original vectors
+            with_payload: True, or the payload keys to return (see `payload_selector`)
+            
+        Searches filtered on user_id are answered from the per-user
+        exact-search cache when it is enabled and holds the user.
             
         Returns:
             List of search results with score and payload
         """
-        client = self.get_client()
+        cached = self._search_user_cache(query_vector, limit, score_threshold, filter_dict)
+        if cached is not None:
+            return cached
         
-        # Build filter
-        query_filter = None
-        if filter_dict:
-            conditions = [
-                FieldCondition(key=key, match=MatchValue(value=value))
-                for key, value in filter_dict.items()
-            ]
-            query_filter = Filter(must=conditions)
+        client = self.get_client()
         
-        # Search
-        results = client.search(
+        # Search, keeping only the best chunk of each document
+        groups = client.search_groups(
             collection_name=settings.QDRANT_COLLECTION_EMBEDDINGS,
             query_vector=query_vector,
+            group_by='document_id',
+            group_size=1,
             limit=limit,
             score_threshold=score_threshold,
-            query_filter=query_filter
+            query_filter=self._build_filter(filter_dict),
+            search_params=self.search_params(oversampling, rescore),
+            with_payload=with_payload
+        ).groups
+        results = [group.hits[0] for group in groups if group.hits]
+        
+        return [self._format_hit(result) for result in results]
+    
+    async def search_vectors_async(
+        self,
+        query_vector: List[float],
+        limit: int = 10,
+        score_threshold: float = 0.5,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        with_payload: Union[bool, List[str]] = True,
+        shared_client: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        `search_vectors` on the asyncio client
+        
+        The event loop is free while Qdrant answers. A per-user cache miss
+        loads the user's vectors in a worker thread. `shared_client` as in
+        `async_client`.
+        """
+        if self.get_user_cache() is not None:
+            cached = await asyncio.to_thread(self._search_user_cache, query_vector, limit, score_threshold, filter_dict)
+            if cached is not None:
+                return cached
+        
+        async with self.async_client(shared=shared_client) as client:
+            response = await client.search_groups(
+                collection_name=settings.QDRANT_COLLECTION_EMBEDDINGS,
+                query_vector=query_vector,
+                group_by='document_id',
+                group_size=1,
+                limit=limit,
+                score_threshold=score_threshold,
+                query_filter=self._build_filter(filter_dict),
+                search_params=self.search_params(),
+                with_payload=with_payload
+            )
+        return [self._format_hit(group.hits[0]) for group in response.groups if group.hits]
+    
+    def search_vectors_batch(self, searches: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Run several searches in one `search_batch` request
+        
+        Qdrant has no batched group search, so each search over-fetches
+        `SEARCH_BATCH_CHUNK_OVERSAMPLE` x limit chunks and keeps the best
+        chunk per document. A query whose top hits are dominated by a few
+        long documents may therefore return fewer than `limit` documents.
+        
+        Args:
+            searches: Per search: {"query_vector", "limit", "score_threshold", "filter_dict"},
+                optionally "oversampling", "rescore" and "with_payload" (see `search_vectors`)
+            
+        Returns:
+            One result list per search (see `search_vectors`), in input order
+        """
+        if not searches:
+            return []
+        
+        results = [
+            self._search_user_cache(
+                search['query_vector'],
+                search.get('limit', 10),
+                search.get('score_threshold'),
+                search.get('filter_dict')
+            )
+            for search in searches
+        ]
+        remote = [i for i, cached in enumerate(results) if cached is None]
+        if not remote:
+            return results
+        
+        client = self.get_client()
+        oversample = settings.SEARCH_BATCH_CHUNK_OVERSAMPLE
+        
+        responses = client.search_batch(
+            collection_name=settings.QDRANT_COLLECTION_EMBEDDINGS,
+            requests=[
+                SearchRequest(
+                    vector=np.asarray(searches[i]['query_vector'], dtype=np.float32).tolist(),
+                    limit=searches[i].get('limit', 10) * oversample,
+                    score_threshold=searches[i].get('score_threshold'),
+                    filter=self._build_filter(searches[i].get('filter_dict')),
+                    params=self.search_params(searches[i].get('oversampling'), searches[i].get('rescore')),
+                    with_payload=searches[i].get('with_payload', True)
+                )
+                for i in remote
+            ]
         )
         
-        # Format results
-        return [
-            {
-                'id': result.id,
-                'score': result.score,
-                'payload': result.payload
-            }
-            for result in results
+        for i, hits in zip(remote, responses):
+            search = searches[i]
+            seen = set()
+            best = []
+            for hit in hits:
+                # Points written before chunking have no document_id; keep them as-is
+                key = (hit.payload or {}).get('document_id', hit.id)
+                if key in seen:
+                    continue
+                seen.add(key)
+                best.append(self._format_hit(hit))
+                if len(best) == search.get('limit', 10):
+                    break
+            results[i] = best
+        return results
+    
+    def document_point_ids(
+        self,
+        document_ids: List[str],
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, List[Any]]:
+        """
+        Chunk point IDs of many documents, without payloads or vectors
+        
+        Args:
+            document_ids: Parent Document UUIDs
+            filter_dict: Optional extra payload filters (e.g., {"user_id": "123"})
+            
+        Returns:
+            Mapping of document ID to its point IDs (documents without points are absent)
+        """
+        if not document_ids:
+            return {}
+        
+        client = self.get_client()
+        conditions = [FieldCondition(key='document_id', match=MatchAny(any=list(document_ids)))]
+        conditions += [
+            FieldCondition(key=key, match=MatchValue(value=value))
+            for key, value in (filter_dict or {}).items()
         ]
+        
+        point_ids = {}
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=settings.QDRANT_COLLECTION_EMBEDDINGS,
+                scroll_filter=Filter(must=conditions),
+                limit=256,
+                offset=offset,
+                with_payload=['document_id'],
+                with_vectors=False
+            )
+            for point in points:
+                point_ids.setdefault(point.payload['document_id'], []).append(point.id)
+            if offset is None:
+                break
+        return point_ids
+    
+    def recommend(
+        self,
+        positive_ids: List[str],
+        negative_ids: Optional[List[str]] = None,
+        limit: int = 10,
+        score_threshold: Optional[float] = None,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        strategy: str = 'average_vector'
+    ) -> Dict[str, Any]:
+        """
+        Documents similar to stored documents ("more like this")
+        
+        Qdrant compares the stored chunk vectors of the example documents
+        directly, so no text is embedded. Results are grouped per document
+        like `search_vectors`, and the example documents themselves are
+        excluded.
+        
+        Args:
+            positive_ids: Document UUIDs to find neighbours of
+            negative_ids: Document UUIDs whose neighbours are pushed down
+            limit: Number of documents to return
+            score_threshold: Minimum similarity score
+            filter_dict: Payload filters, applied to the examples too
+            strategy: 'average_vector' (mean of positives minus negatives)
+                or 'best_score' (per candidate, best positive vs. best negative)
+            
+        Returns:
+            {"results": [...], "missing": document IDs without stored vectors}
+        """
+        negative_ids = negative_ids or []
+        examples = self.document_point_ids(positive_ids + negative_ids, filter_dict)
+        missing = [document_id for document_id in positive_ids + negative_ids if document_id not in examples]
+        
+        positive = [point_id for document_id in positive_ids for point_id in examples.get(document_id, [])]
+        negative = [point_id for document_id in negative_ids for point_id in examples.get(document_id, [])]
+        if not positive:
+            return {'results': [], 'missing': missing}
+        
+        query_filter = self._build_filter(filter_dict) or Filter()
+        query_filter.must_not = [
+            FieldCondition(key='document_id', match=MatchAny(any=list(positive_ids) + list(negative_ids)))
+        ]
+        
+        groups = self.get_client().recommend_groups(
+            collection_name=settings.QDRANT_COLLECTION_EMBEDDINGS,
+            positive=positive,
+            negative=negative,
+            strategy=RecommendStrategy(strategy),
+            group_by='document_id',
+            group_size=1,
+            limit=limit,
+            score_threshold=score_threshold,
+            query_filter=query_filter,
+            search_params=self.search_params(),
+            with_payload=True
+        ).groups
+        
+        return {
+            'results': [self._format_hit(group.hits[0]) for group in groups if group.hits],
+            'missing': missing
+        }
+    
+    def _search_user_cache(
+        self,
+        query_vector,
+        limit: int,
+        score_threshold: Optional[float],
+        filter_dict: Optional[Dict[str, Any]]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Results from the per-user cache, or None to search Qdrant"""
+        user_cache = self.get_user_cache()
+        if user_cache is None or not filter_dict or 'user_id' not in filter_dict:
+            return None
+        return user_cache.search(str(filter_dict['user_id']), query_vector, limit, score_threshold, filter_dict)
+    
+    def _build_filter(self, filter_dict: Optional[Dict[str, Any]]) -> Optional[Filter]:
+        """Exact-match payload filter from a {key: value} dict"""
+        if not filter_dict:
+            return None
+        return Filter(must=[
+            FieldCondition(key=key, match=MatchValue(value=value))
+            for key, value in filter_dict.items()
+        ])
+    
+    def _format_hit(self, hit) -> Dict[str, Any]:
+        return {
+            'id': hit.id,
+            'score': hit.score,
+            'payload': hit.payload
+        }
     
     def delete_vector(self, point_id: str):
         """Delete a vector by ID"""
@@ -147,6 +1000,16 @@ class QdrantService:
             points_selector=[point_id]
         )
     
+    def delete_document_vectors(self, document_id: str, collection_name: Optional[str] = None):
+        """Delete every chunk vector belonging to a document"""
+        client = self.get_client()
+        client.delete(
+            collection_name=collection_name or settings.QDRANT_COLLECTION_EMBEDDINGS,
+            points_selector=FilterSelector(filter=Filter(must=[
+                FieldCondition(key='document_id', match=MatchValue(value=document_id))
+            ]))
+        )
+    
     def get_vector(self, point_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve a vector by ID"""
         client = self.get_client()
@@ -163,3 +1026,75 @@ class QdrantService:
                 'payload': point.payload
             }
         return None
+    
+    def scroll_user_points(self, user_id: str, max_points: int) -> Optional[List[Any]]:
+        """
+        All points of one user, with vectors and payloads
+        
+        Returns:
+            Points, or None if the user has more than `max_points`
+        """
+        client = self.get_client()
+        user_filter = self._build_filter({'user_id': user_id})
+        
+        points = []
+        offset = None
+        while True:
+            batch, offset = client.scroll(
+                collection_name=settings.QDRANT_COLLECTION_EMBEDDINGS,
+                scroll_filter=user_filter,
+                limit=min(1024, max_points + 1),
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            points.extend(batch)
+            if len(points) > max_points:
+                return None
+            if offset is None:
+                return points
+    
+    def get_document_vectors(
+        self,
+        document_ids: List[str],
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, List[List[float]]]:
+        """
+        Retrieve stored chunk vectors for many documents
+        
+        Args:
+            document_ids: Parent Document UUIDs
+            filter_dict: Optional extra payload filters (e.g., {"user_id": "123"})
+            
+        Returns:
+            Mapping of document ID to its chunk vectors, ordered by chunk index
+        """
+        client = self.get_client()
+        
+        conditions = [FieldCondition(key='document_id', match=MatchAny(any=list(document_ids)))]
+        conditions += [
+            FieldCondition(key=key, match=MatchValue(value=value))
+            for key, value in (filter_dict or {}).items()
+        ]
+        
+        chunks = {}
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=settings.QDRANT_COLLECTION_EMBEDDINGS,
+                scroll_filter=Filter(must=conditions),
+                limit=256,
+                offset=offset,
+                with_payload=['document_id', 'chunk_index'],
+                with_vectors=True
+            )
+            for point in points:
+                document_id = point.payload['document_id']
+                chunks.setdefault(document_id, []).append((point.payload.get('chunk_index', 0), point.vector))
+            if offset is None:
+                break
+        
+        return {
+            document_id: [vector for _, vector in sorted(items, key=lambda item: item[0])]
+            for document_id, items in chunks.items()
+        }
@@ -0,0 +1,376 @@
+"""
+Blue/green re-embedding of the vector collection
+
+A run (an Experiment of type 'reembedding') fills a new, versioned
+collection with vectors from a target model while searches keep reading
+the live alias (QDRANT_COLLECTION_EMBEDDINGS). Documents are processed in
+(created_at, id) order, so a run resumes from its cursor after a failure,
+and documents indexed or deleted meanwhile are mirrored to the new
+collection. Once the backfill is done, the alias is switched in one
+operation, and query and document embeddings follow it to the run's
+model.
+"""
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .chunking import chunk_text
+from .embedding_backends import create_backend
+from .embedding_service import EmbeddingService, backend_options_from_settings
+from .qdrant_service import QdrantService, document_payload
+
+logger = logging.getLogger(__name__)
+
+# Seconds a process trusts its last lookup of the running re-embedding
+ACTIVE_LOOKUP_TTL = 5
+
+_encoders = {}
+_encoders_lock = threading.Lock()
+_active = {'experiment': None, 'checked_at': 0.0}
+_live = {'model': None, 'checked_at': 0.0}
+
+
+class TargetEncoder:
+    """Chunks and embeds documents with the model of a re-embedding run (or of the live collection)"""
+
+    def __init__(self, model_name: str, backend: str):
+        self.model_name = model_name
+        self.backend = backend
+        self._model = None
+        self._lock = threading.Lock()
+
+    def get_model(self):
+        with self._lock:
+            if self._model is not None:
+                return self._model
+            if self.model_name == settings.EMBEDDING_MODEL and self.backend == settings.EMBEDDING_BACKEND:
+                self._model = EmbeddingService().load_model()
+            else:
+                logger.info(f"Loading re-embedding model: {self.model_name} (backend={self.backend})")
+                self._model = create_backend(
+                    self.backend,
+                    self.model_name,
+                    settings.MAX_SEQUENCE_LENGTH,
+                    **backend_options_from_settings()
+                ).load()
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Per document: {"chunks": [...], "vectors": (n_chunks, dim) array}"""
+        model = self.get_model()
+        max_tokens = min(settings.EMBEDDING_CHUNK_TOKENS, model.max_seq_length)
+        chunked = [
+            chunk_text(
+                text,
+                model.tokenizer,
+                max_tokens=max_tokens,
+                overlap=settings.EMBEDDING_CHUNK_OVERLAP,
+                max_chunks=settings.EMBEDDING_MAX_CHUNKS
+            )
+            for text in texts
+        ]
+        chunk_texts = [chunk['text'] for chunks in chunked for chunk in chunks]
+        vectors = (
+            np.asarray(model.encode(chunk_texts, batch_size=settings.EMBEDDING_BULK_MAX_BATCH_SIZE), dtype=np.float32)
+            if chunk_texts else np.zeros((0, 0), dtype=np.float32)
+        )
+
+        results = []
+        offset = 0
+        for chunks in chunked:
+            results.append({'chunks': chunks, 'vectors': vectors[offset:offset + len(chunks)]})
+            offset += len(chunks)
+        return results
+
+
+def get_encoder(config: Dict[str, Any]) -> TargetEncoder:
+    """Process-wide encoder for a run's target model"""
+    key = (config['backend'], config['model'])
+    with _encoders_lock:
+        if key not in _encoders:
+            _encoders[key] = TargetEncoder(config['model'], config['backend'])
+        return _encoders[key]
+
+
+def next_collection_name(prefix: str) -> str:
+    """
+    `<prefix>_v<n>` with n one above the highest existing version
+
+    A plain `<prefix>` collection from before aliases counts as version 1.
+    """
+    pattern = re.compile(rf"^{re.escape(prefix)}_v(\d+)$")
+    versions = [
+        int(match.group(1))
+        for collection in QdrantService().get_client().get_collections().collections
+        for match in [pattern.match(collection.name)]
+        if match
+    ]
+    return f"{prefix}_v{max(versions, default=1) + 1}"
+
+
+def start_reembedding(
+    model_name: str,
+    dimension: int,
+    backend: str,
+    batch_size: int,
+    throttle_seconds: float,
+    project_id: str = 'default'
+):
+    """
+    Create the target collection and the Experiment tracking the run
+
+    The caller queues `tasks.reembed_collection_batch` to start the backfill.
+    """
+    from ..models import Document, Experiment
+
+    if active_reembedding(refresh=True) is not None:
+        raise ValueError("A re-embedding run is already in progress")
+
+    qdrant_service = QdrantService()
+    alias = settings.QDRANT_COLLECTION_EMBEDDINGS
+    target = next_collection_name(settings.QDRANT_COLLECTION_PREFIX)
+    # HNSW is built once, after the backfill, instead of competing with searches
+    qdrant_service.create_collection(target, dimension=dimension, indexing=False)
+
+    experiment = Experiment.objects.create(
+        name=f"Re-embed {alias} with {model_name}",
+        project_id=project_id,
+        experiment_type='reembedding',
+        status='running',
+        model_ref=model_name,
+        config={
+            'alias': alias,
+            'source_collection': qdrant_service.resolve_alias(alias) or alias,
+            'source_model': live_model(refresh=True),
+            'target_collection': target,
+            'model': model_name,
+            'dimension': dimension,
+            'backend': backend,
+            'batch_size': batch_size,
+            'throttle_seconds': throttle_seconds,
+        },
+        metrics={
+            'total': Document.objects.filter(embedding_status='completed').count(),
+            'processed': 0,
+            'chunks': 0,
+            'missing_text': 0,
+            'dual_writes': 0,
+            'batches': 0,
+            'progress': 0.0,
+            'docs_per_second': None,
+            'cursor': None,
+            'backfill_completed_at': None,
+        },
+        started_at=timezone.now()
+    )
+    _active.update(experiment=experiment, checked_at=time.monotonic())
+    logger.info(f"Started re-embedding {experiment.id} into {target}")
+    return experiment
+
+
+def settings_model() -> Dict[str, Any]:
+    """The EMBEDDING_* model, used for collections no re-embedding run built"""
+    return {
+        'model': settings.EMBEDDING_MODEL,
+        'backend': settings.EMBEDDING_BACKEND,
+        'dimension': settings.EMBEDDING_DIMENSION,
+    }
+
+
+def live_model(refresh: bool = False) -> Dict[str, Any]:
+    """
+    {"model", "backend", "dimension"} of the collection the live alias serves
+
+    Taken from the re-embedding run that built the collection, or that
+    started from it (rollbacks); other collections use the EMBEDDING_*
+    settings. Cached for ACTIVE_LOOKUP_TTL, so every process follows a
+    switch within seconds. A failed lookup keeps the previous answer.
+    """
+    from ..models import Experiment
+
+    if refresh or _live['model'] is None or time.monotonic() - _live['checked_at'] > ACTIVE_LOOKUP_TTL:
+        try:
+            collection = QdrantService().resolve_alias(settings.QDRANT_COLLECTION_EMBEDDINGS)
+            run = Experiment.objects.filter(
+                Q(config__target_collection=collection) | Q(config__source_collection=collection),
+                experiment_type='reembedding'
+            ).order_by('-started_at').first() if collection else None
+
+            if run is not None and run.config['target_collection'] == collection:
+                model = {key: run.config[key] for key in ('model', 'backend', 'dimension')}
+            else:
+                model = (run and run.config.get('source_model')) or settings_model()
+        except Exception as e:
+            logger.warning(f"Could not look up the live embedding model: {e}")
+            model = _live['model'] or settings_model()
+        _live.update(model=model, checked_at=time.monotonic())
+    return _live['model']
+
+
+def active_reembedding(refresh: bool = False):
+    """The running re-embedding Experiment, if any (cached for ACTIVE_LOOKUP_TTL)"""
+    from ..models import Experiment
+
+    if refresh or time.monotonic() - _active['checked_at'] > ACTIVE_LOOKUP_TTL:
+        _active['experiment'] = Experiment.objects.filter(
+            experiment_type='reembedding',
+            status='running'
+        ).first()
+        _active['checked_at'] = time.monotonic()
+    return _active['experiment']
+
+
+def update_metrics(experiment_id, **changes) -> Dict[str, Any]:
+    """
+    Apply changes to an Experiment's metrics under a row lock
+
+    Backfill and dual-write tasks update the same record concurrently, so
+    counters are passed as callables applied to the current value.
+    """
+    from ..models import Experiment
+
+    with transaction.atomic():
+        experiment = Experiment.objects.select_for_update().get(id=experiment_id)
+        for key, value in changes.items():
+            experiment.metrics[key] = value(experiment.metrics.get(key)) if callable(value) else value
+        total = experiment.metrics.get('total') or 0
+        experiment.metrics['progress'] = round(min(experiment.metrics.get('processed', 0) / total, 1.0), 4) if total else 1.0
+        experiment.save(update_fields=['metrics'])
+    return experiment.metrics
+
+
+def next_documents(experiment, limit: int) -> list:
+    """Indexed documents after the run's (created_at, id) cursor"""
+    from ..models import Document
+
+    queryset = Document.objects.filter(embedding_status='completed')
+    cursor = experiment.metrics.get('cursor')
+    if cursor:
+        created_at = parse_datetime(cursor['created_at'])
+        queryset = queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=cursor['id'])
+        )
+    return list(queryset.order_by('created_at', 'id')[:limit])
+
+
+def reembed_documents(experiment, docs: list, texts: Optional[Dict[str, str]] = None) -> Dict[str, int]:
+    """
+    Embed documents with the target model and write them to the target collection
+
+    Texts come from `texts` (document ID -> text) or else MongoDB;
+    documents without one are counted as missing.
+    Documents deleted while the batch was embedding are removed again, so
+    the batch cannot resurrect them.
+
+    Returns:
+        {"documents", "chunks", "missing_text"}
+    """
+    from ..models import Document
+    from .mongo_service import MongoService
+
+    config = experiment.config
+    qdrant_service = QdrantService()
+
+    texts = texts or {}
+    mongo_ids = [doc.mongo_id for doc in docs if doc.mongo_id and not texts.get(str(doc.id))]
+    entries = MongoService().get_journal_entries_by_ids(mongo_ids) if mongo_ids else {}
+    with_text = []
+    for doc in docs:
+        entry = entries.get(doc.mongo_id) if doc.mongo_id else None
+        text = texts.get(str(doc.id)) or (entry and (entry.get('content', '') or entry.get('text', '')))
+        if text:
+            with_text.append((doc, text))
+
+    results = get_encoder(config).embed_documents([text for _, text in with_text]) if with_text else []
+
+    points = []
+    chunk_counts = {}
+    for (doc, _), result in zip(with_text, results):
+        document_id = str(doc.id)
+        points.extend(qdrant_service.build_chunk_points(
+            document_id=document_id,
+            vectors=result['vectors'],
+            chunks=result['chunks'],
+            metadata={**document_payload(doc), 'created_via': 'reembedding'}
+        ))
+        chunk_counts[document_id] = len(result['chunks'])
+
+    target = config['target_collection']
+    if points:
+        qdrant_service.upsert_vectors(points, collection_name=target)
+        qdrant_service.delete_stale_chunks(chunk_counts, collection_name=target)
+
+    remaining = {str(pk) for pk in Document.objects.filter(id__in=list(chunk_counts)).values_list('id', flat=True)}
+    for document_id in set(chunk_counts) - remaining:
+        qdrant_service.delete_document_vectors(document_id, collection_name=target)
+
+    return {
+        'documents': len(with_text),
+        'chunks': len(points),
+        'missing_text': len(docs) - len(with_text),
+    }
+
+
+def mirror_payloads(payloads: Dict[str, Dict[str, Any]]):
+    """Apply document payload updates to the target collection of a running re-embedding"""
+    experiment = active_reembedding()
+    if experiment is None:
+        return
+    QdrantService().set_document_payloads(payloads, collection_name=experiment.config['target_collection'])
+
+
+def mirror_deletes(document_ids: List[str]):
+    """Delete documents from the target collection of a running re-embedding"""
+    experiment = active_reembedding()
+    if experiment is None:
+        return
+    qdrant_service = QdrantService()
+    for document_id in document_ids:
+        qdrant_service.delete_document_vectors(document_id, collection_name=experiment.config['target_collection'])
+
+
+def switch_reembedding(experiment, force: bool = False) -> Optional[str]:
+    """
+    Point the live alias at a finished run's collection
+
+    Refuses unless the backfill is complete and, without `force`, no
+    document lacked text. Queries and newly indexed documents follow the
+    alias to the run's model (see `live_model`).
+
+    Returns:
+        The collection the alias pointed to before
+    """
+    config = experiment.config
+    metrics = experiment.metrics
+    qdrant_service = QdrantService()
+
+    if experiment.status != 'running' or not metrics.get('backfill_completed_at'):
+        raise ValueError(f"Re-embedding {experiment.id} has not finished its backfill")
+    if not force and metrics.get('missing_text'):
+        raise ValueError(
+            f"{metrics['missing_text']} documents had no text and are missing from "
+            f"{config['target_collection']}"
+        )
+
+    qdrant_service.set_indexing(config['target_collection'], True)
+    previous = qdrant_service.switch_alias(config['alias'], config['target_collection'])
+    # Cached vectors and search results came from the old collection
+    qdrant_service.get_generations().bump_all()
+
+    update_metrics(experiment.id, previous_collection=previous, switched_at=timezone.now().isoformat())
+    experiment.refresh_from_db()
+    experiment.status = 'completed'
+    experiment.completed_at = timezone.now()
+    experiment.save(update_fields=['status', 'completed_at'])
+    _active.update(experiment=None, checked_at=time.monotonic())
+    live_model(refresh=True)
+    return previous
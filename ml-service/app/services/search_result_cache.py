@@ -0,0 +1,110 @@
+"""
+Redis cache for semantic search responses
+
+Keys combine the user's generation counter with a hash of the normalized
+query and search parameters. Bumping the generation (on document create,
+reindex, update, delete and index completion) makes all of that user's
+entries unreachable at once; they then expire by TTL.
+"""
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import redis
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .embedding_cache import normalize_text
+from .user_generations import UserGenerations
+
+logger = logging.getLogger(__name__)
+
+# Seconds to skip Redis after a connection error
+REDIS_RETRY_INTERVAL = 30
+
+
+class SearchResultCache:
+    """Per-user, generation-scoped search response cache"""
+
+    def __init__(self, redis_url: str, generations: UserGenerations, ttl: int = 300, key_prefix: str = 'search'):
+        self.redis_url = redis_url
+        self.generations = generations
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+
+        self._redis = None
+        self._redis_down_until = 0.0
+        self._stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'errors': 0}
+
+    def _get_redis(self) -> Optional[redis.Redis]:
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                self.redis_url,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5
+            )
+        return self._redis
+
+    def _redis_failed(self, e: Exception):
+        logger.warning(f"Search result cache unavailable: {e}")
+        self._stats['errors'] += 1
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+
+    def make_key(self, user_id: str, generation: int, params: Dict[str, Any]) -> str:
+        """Cache key for a search by `user_id` at `generation`"""
+        params = {**params}
+        if 'query' in params:
+            params['query'] = normalize_text(params['query'])
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        return f"{self.key_prefix}:{user_id}:{generation}:{digest}"
+
+    def lookup(self, user_id: str, params: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Look up a search response
+
+        Returns:
+            (response or None, token for `store`). The token pins the
+            generation read before the search ran, so results computed
+            while a write lands are never stored under the newer generation.
+            It is None when the cache cannot be used.
+        """
+        generation = self.generations.get(user_id)
+        client = self._get_redis()
+        if generation is None or client is None:
+            self._stats['bypassed'] += 1
+            return None, None
+
+        key = self.make_key(user_id, generation, params)
+        try:
+            cached = client.get(key)
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            return None, None
+
+        if cached is None:
+            self._stats['misses'] += 1
+            return None, key
+        self._stats['hits'] += 1
+        return json.loads(cached), None
+
+    def store(self, token: Optional[str], response: Dict[str, Any]):
+        """Store a response under a token returned by `lookup`"""
+        client = self._get_redis()
+        if token is None or client is None:
+            return
+        try:
+            client.setex(token, self.ttl, json.dumps(response, cls=DjangoJSONEncoder))
+        except redis.RedisError as e:
+            self._redis_failed(e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of this process"""
+        lookups = self._stats['hits'] + self._stats['misses']
+        return {
+            **self._stats,
+            'ttl_seconds': self.ttl,
+            'hit_rate': round(self._stats['hits'] / lookups, 4) if lookups else 0.0,
+        }
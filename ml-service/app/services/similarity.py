@@ -0,0 +1,84 @@
+"""
+Blocked cosine similarity over embedding matrices
+"""
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row (zero rows stay zero)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+def iter_similarity_blocks(
+    queries: np.ndarray,
+    candidates: np.ndarray,
+    block_bytes: int
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Yield (row_offset, block) slices of the cosine similarity matrix
+
+    Each block is one matrix multiply of a slice of query rows against all
+    candidates, sized so that it stays under `block_bytes` of float32.
+    """
+    queries = normalize_rows(queries)
+    candidates_t = np.ascontiguousarray(normalize_rows(candidates).T)
+
+    rows_per_block = max(1, block_bytes // max(1, 4 * candidates_t.shape[1]))
+    for start in range(0, queries.shape[0], rows_per_block):
+        yield start, queries[start:start + rows_per_block] @ candidates_t
+
+
+def similarity_matrix(queries: np.ndarray, candidates: np.ndarray, block_bytes: int) -> np.ndarray:
+    """Full (n_queries, n_candidates) cosine similarity matrix"""
+    result = np.empty((queries.shape[0], candidates.shape[0]), dtype=np.float32)
+    for start, block in iter_similarity_blocks(queries, candidates, block_bytes):
+        result[start:start + block.shape[0]] = block
+    return result
+
+
+def top_k_similar(
+    queries: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    block_bytes: int,
+    exclude_self: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Best `k` candidates per query, computed block by block
+
+    Args:
+        exclude_self: Queries and candidates are the same set; skip the diagonal
+
+    Returns:
+        (indices, scores), each (n_queries, k), sorted by descending score
+    """
+    k = min(k, candidates.shape[0] - (1 if exclude_self else 0))
+    indices = np.empty((queries.shape[0], max(k, 0)), dtype=np.int64)
+    scores = np.empty((queries.shape[0], max(k, 0)), dtype=np.float32)
+    if k <= 0:
+        return indices, scores
+
+    for start, block in iter_similarity_blocks(queries, candidates, block_bytes):
+        rows = np.arange(block.shape[0])
+        if exclude_self:
+            block[rows, rows + start] = -np.inf
+
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_scores = block[rows[:, None], top]
+        order = np.argsort(-top_scores, axis=1)
+
+        indices[start:start + block.shape[0]] = np.take_along_axis(top, order, axis=1)
+        scores[start:start + block.shape[0]] = np.take_along_axis(top_scores, order, axis=1)
+
+    return indices, scores
+
+
+def mean_vector(vectors: List[np.ndarray]) -> Optional[np.ndarray]:
+    """Normalized mean of several vectors (e.g. the chunks of one document)"""
+    if not vectors:
+        return None
+    return normalize_rows(np.mean(normalize_rows(np.vstack(vectors)), axis=0, keepdims=True))[0]
@@ -0,0 +1,98 @@
+"""
+Per-user generation counters in Redis
+
+Every write that changes what a user's searches can return (creates, indexing,
+updates, deletes) bumps the user's counter. Caches store the generation they were
+built at and treat an entry as stale once the counter has moved, which
+works across gunicorn workers and Celery processes without fan-out.
+"""
+import logging
+import time
+from typing import Iterable, Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Seconds to stop asking Redis after a connection error
+REDIS_RETRY_INTERVAL = 30
+
+
+class UserGenerations:
+    """Read and bump per-user generation counters"""
+
+    def __init__(self, redis_url: str, key_prefix: str = 'usergen'):
+        self.redis_url = redis_url
+        self.key_prefix = key_prefix
+        self._redis = None
+        self._redis_down_until = 0.0
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.key_prefix}:{user_id}"
+
+    def _get_redis(self) -> Optional[redis.Redis]:
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                self.redis_url,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5
+            )
+        return self._redis
+
+    def _redis_failed(self, e: Exception):
+        logger.warning(f"User generation counters unavailable: {e}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+
+    def _epoch_key(self) -> str:
+        return f"{self.key_prefix}-epoch"
+
+    def get(self, user_id: str) -> Optional[int]:
+        """
+        Current generation of a user
+
+        The global epoch (see `bump_all`) is folded into the high bits, so
+        that bumping it changes every user's generation at once.
+
+        Returns:
+            The generation (0 if never bumped), or None if Redis is
+            unreachable, in which case callers must not trust cached data
+        """
+        client = self._get_redis()
+        if client is None:
+            return None
+        try:
+            epoch, value = client.mget(self._epoch_key(), self._key(user_id))
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            return None
+        return (int(epoch or 0) << 32) + int(value or 0)
+
+    def bump(self, user_ids: Iterable[str]):
+        """Invalidate everything cached for these users"""
+        user_ids = {str(user_id) for user_id in user_ids if user_id}
+        if not user_ids:
+            return
+        client = self._get_redis()
+        if client is None:
+            logger.warning(f"Could not invalidate caches of {len(user_ids)} users (Redis down)")
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.incr(self._key(user_id))
+            pipe.execute()
+        except redis.RedisError as e:
+            self._redis_failed(e)
+
+    def bump_all(self):
+        """Invalidate everything cached for all users (e.g. after switching collections)"""
+        client = self._get_redis()
+        if client is None:
+            logger.warning("Could not invalidate caches of all users (Redis down)")
+            return
+        try:
+            client.incr(self._epoch_key())
+        except redis.RedisError as e:
+            self._redis_failed(e)
@@ -0,0 +1,182 @@
+"""
+Per-user exact-search cache in front of Qdrant
+
+Most users own a few hundred to a few thousand chunk vectors. Their whole
+set is loaded once (Qdrant scroll) into a contiguous float32 matrix, and
+searches become one matrix-vector product in process instead of a network
+round-trip. Entries are checked against the user's generation counter on
+every search, and are evicted LRU under a memory budget.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .similarity import normalize_rows
+from .user_generations import UserGenerations
+
+logger = logging.getLogger(__name__)
+
+
+class UserVectorCache:
+    """LRU of per-user (vectors, payloads) matrices for exact local search"""
+
+    def __init__(
+        self,
+        loader: Callable[[str, int], Optional[List[Any]]],
+        generations: UserGenerations,
+        max_bytes: int,
+        max_points: int,
+        ttl: float
+    ):
+        """
+        Args:
+            loader: (user_id, max_points) -> list of points with `.id`,
+                `.vector` and `.payload`, or None if the user has more
+                than max_points
+            generations: Shared per-user generation counters
+            max_bytes: Memory budget for all cached matrices
+            max_points: Users with more vectors are always searched in Qdrant
+            ttl: Reload entries older than this (seconds), as a safety net
+                for invalidations lost while Redis was down
+        """
+        self.loader = loader
+        self.generations = generations
+        self.max_bytes = max_bytes
+        self.max_points = max_points
+        self.ttl = ttl
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._stats = {
+            'hits': 0,
+            'loads': 0,
+            'invalidations': 0,
+            'evictions': 0,
+            'too_large': 0,
+            'bypassed': 0,
+        }
+
+    def _get_entry(self, user_id: str) -> Optional[Dict[str, Any]]:
+        generation = self.generations.get(user_id)
+        if generation is None:
+            self._stats['bypassed'] += 1
+            return None
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                fresh = entry['generation'] == generation and time.monotonic() - entry['loaded_at'] < self.ttl
+                if fresh:
+                    self._entries.move_to_end(user_id)
+                    if entry['matrix'] is None:
+                        self._stats['too_large'] += 1
+                        return None
+                    self._stats['hits'] += 1
+                    return entry
+                self._remove(user_id)
+                self._stats['invalidations'] += 1
+
+        points = self.loader(user_id, self.max_points)
+        self._stats['loads'] += 1
+
+        if points is None:
+            # Remember (cheaply) that this user is served by Qdrant
+            entry = {'generation': generation, 'loaded_at': time.monotonic(), 'matrix': None, 'nbytes': 0}
+            self._stats['too_large'] += 1
+        else:
+            matrix = (
+                np.ascontiguousarray(normalize_rows(np.asarray([p.vector for p in points], dtype=np.float32)))
+                if points else None
+            )
+            entry = {
+                'generation': generation,
+                'loaded_at': time.monotonic(),
+                'matrix': matrix if matrix is not None else np.zeros((0, 0), dtype=np.float32),
+                'ids': [p.id for p in points],
+                'payloads': [p.payload or {} for p in points],
+                'nbytes': matrix.nbytes if matrix is not None else 0,
+            }
+
+        with self._lock:
+            if entry['nbytes'] <= self.max_bytes:
+                self._remove(user_id)
+                self._entries[user_id] = entry
+                self._bytes += entry['nbytes']
+                while self._bytes > self.max_bytes:
+                    evicted, _ = next(iter(self._entries.items()))
+                    self._remove(evicted)
+                    self._stats['evictions'] += 1
+
+        return entry if entry['matrix'] is not None else None
+
+    def _remove(self, user_id: str):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._bytes -= entry['nbytes']
+
+    def search(
+        self,
+        user_id: str,
+        query_vector,
+        limit: int,
+        score_threshold: Optional[float],
+        filter_dict: Dict[str, Any]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Exact cosine search over a user's cached vectors
+
+        Results match `QdrantService.search_vectors`: best chunk per
+        document, filtered by exact payload matches.
+
+        Returns:
+            Results, or None if this user must be searched in Qdrant
+        """
+        entry = self._get_entry(user_id)
+        if entry is None:
+            return None
+        if not entry['ids']:
+            return []
+
+        query = normalize_rows(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+        scores = entry['matrix'] @ query
+
+        payloads = entry['payloads']
+        extra_filters = {key: value for key, value in filter_dict.items() if key != 'user_id'}
+
+        results = []
+        seen = set()
+        for index in np.argsort(-scores):
+            score = float(scores[index])
+            if score_threshold is not None and score < score_threshold:
+                break
+            payload = payloads[index]
+            if any(payload.get(key) != value for key, value in extra_filters.items()):
+                continue
+            document_key = payload.get('document_id', entry['ids'][index])
+            if document_key in seen:
+                continue
+            seen.add(document_key)
+            results.append({'id': entry['ids'][index], 'score': score, 'payload': payload})
+            if len(results) == limit:
+                break
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/load counters and memory use"""
+        with self._lock:
+            users = len(self._entries)
+            cached_bytes = self._bytes
+        lookups = self._stats['hits'] + self._stats['loads']
+        return {
+            **self._stats,
+            'users': users,
+            'memory_mb': round(cached_bytes / (1024 * 1024), 2),
+            'max_memory_mb': round(self.max_bytes / (1024 * 1024), 2),
+            'hit_rate': round(self._stats['hits'] / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,51 @@
+"""
+Compact binary encoding for embedding vectors
+
+Vectors travel as raw little-endian float32 (or float16) bytes. Text-only
+channels (Celery JSON messages, the result backend, JSON responses) carry
+them base64-encoded inside a small envelope:
+
+    {"dtype": "float32", "shape": [n, dim], "data": "<base64>"}
+"""
+import base64
+from typing import Any, Dict
+
+import numpy as np
+
+DTYPES = {
+    'float32': np.dtype('<f4'),
+    'float16': np.dtype('<f2'),
+}
+
+
+def encode_vectors(vectors, dtype: str = 'float32') -> bytes:
+    """Raw bytes of a (n, dim) vector matrix"""
+    return np.ascontiguousarray(vectors, dtype=DTYPES[dtype]).tobytes()
+
+
+def decode_vectors(data: bytes, dimension: int, dtype: str = 'float32') -> np.ndarray:
+    """Inverse of `encode_vectors`, always returning float32"""
+    return np.frombuffer(data, dtype=DTYPES[dtype]).reshape(-1, dimension).astype(np.float32)
+
+
+def pack_vectors(vectors, dtype: str = 'float32') -> Dict[str, Any]:
+    """Base64 envelope for text channels"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    return {
+        'dtype': dtype,
+        'shape': list(vectors.shape),
+        'data': base64.b64encode(encode_vectors(vectors, dtype)).decode('ascii'),
+    }
+
+
+def unpack_vectors(packed) -> np.ndarray:
+    """
+    Decode a base64 envelope into a float32 (n, dim) matrix
+
+    Plain nested lists (the pre-envelope format) are accepted too, so
+    messages queued by older workers still decode.
+    """
+    if isinstance(packed, dict):
+        data = base64.b64decode(packed['data'])
+        return decode_vectors(data, packed['shape'][1], packed.get('dtype', 'float32'))
+    return np.atleast_2d(np.asarray(packed, dtype=np.float32))
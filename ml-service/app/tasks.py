@@ -2,6 +2,7 @@
 Celery tasks for async ML processing
 """
 import logging
+import time
 from celery import shared_task
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -12,14 +13,16 @@ logger = logging.getLogger(__name__)
 @shared_task(bind=True, max_retries=3)
 def generate_embedding(self, document_id: str, text: str):
     """
-    Generate embedding vector for text
+    Generate embedding vectors for text, one per token window
     
     Args:
         document_id: Document UUID
         text: Text content to embed
     """
+    from django.conf import settings
     from .models import Document, Embedding
     from .services.embedding_service import EmbeddingService
+    from .services.vector_codec import pack_vectors
     
     try:
         # Update status
@@ -27,16 +30,22 @@ def generate_embedding(self, document_id: str, text: str):
         doc.embedding_status = 'processing'
         doc.save()
         
-        # Generate embedding
+        # Generate embeddings
         logger.info(f"Generating embedding for document {document_id}")
         embedding_service = EmbeddingService()
-        vector = embedding_service.generate_embedding(text)
+        result = embedding_service.embed_document(text)
+        vectors = result['vectors']
         
-        logger.info(f"Generated embedding with dimension {len(vector)}")
+        logger.info(f"Generated {len(vectors)} chunk embeddings with dimension {vectors.shape[1]}")
         return {
             'document_id': document_id,
-            'vector': vector,
-            'dimension': len(vector)
+            'vectors': pack_vectors(vectors, settings.EMBEDDING_TRANSPORT_DTYPE),
+            # Chunk text lets a running re-embedding dual-write the document
+            'chunks': [
+                {key: chunk[key] for key in ('index', 'text', 'start', 'end', 'token_count')}
+                for chunk in result['chunks']
+            ],
+            'dimension': int(vectors.shape[1])
         }
         
     except Exception as e:
@@ -47,51 +56,31 @@ def generate_embedding(self, document_id: str, text: str):
 
 
 @shared_task(bind=True, max_retries=3)
-def index_to_qdrant(self, document_id: str, vector: list, metadata: dict):
+def index_to_qdrant(self, embedding_result: dict, document_id: str, metadata: dict):
     """
-    Index embedding vector to Qdrant
+    Index chunk embedding vectors to Qdrant
     
     Args:
+        embedding_result: Output of `generate_embedding` (passed by the chain)
         document_id: Document UUID
-        vector: Embedding vector
         metadata: Document metadata
     """
-    from .models import Document, Embedding
-    from .services.qdrant_service import QdrantService
-    from django.conf import settings
+    from .models import Document
+    from .services.vector_codec import unpack_vectors
     
     try:
         doc = Document.objects.get(id=document_id)
         
-        # Upsert to Qdrant
         logger.info(f"Indexing document {document_id} to Qdrant")
-        qdrant_service = QdrantService()
-        vector_id = qdrant_service.upsert_vector(
-            vector=vector,
-            metadata={
-                'document_id': document_id,
-                'user_id': doc.user_id,
-                'document_type': doc.document_type,
-                **metadata
-            },
-            point_id=document_id  # Use document ID as point ID
+        point_ids = store_document_embeddings(
+            doc,
+            chunks=embedding_result['chunks'],
+            vectors=unpack_vectors(embedding_result['vectors']),
+            metadata=metadata
         )
         
-        # Create Embedding record
-        embedding = Embedding.objects.create(
-            document=doc,
-            vector_id=vector_id,
-            model_name=settings.EMBEDDING_MODEL,
-            dimension=len(vector)
-        )
-        
-        # Update document
-        doc.qdrant_id = vector_id
-        doc.embedding_status = 'completed'
-        doc.save()
-        
-        logger.info(f"Successfully indexed document {document_id}")
-        return {'document_id': document_id, 'vector_id': vector_id}
+        logger.info(f"Successfully indexed document {document_id} ({len(point_ids)} chunks)")
+        return {'document_id': document_id, 'vector_id': point_ids[0], 'chunks': len(point_ids)}
         
     except Exception as e:
         logger.error(f"Error indexing to Qdrant: {e}")
@@ -100,6 +89,251 @@ def index_to_qdrant(self, document_id: str, vector: list, metadata: dict):
         raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
 
 
+def store_document_embeddings(doc, chunks: list, vectors, metadata: dict) -> list:
+    """
+    Upsert a document's chunk vectors and record them in PostgreSQL
+    
+    Returns:
+        Qdrant point IDs, in chunk order
+    """
+    return store_embeddings_bulk([(doc, chunks, vectors)], metadata)[str(doc.id)]
+
+
+def store_embeddings_bulk(entries: list, metadata: dict, wait: bool = True) -> dict:
+    """
+    Upsert chunk vectors of many documents and record them in PostgreSQL
+    
+    All points go through one batched, parallel `upsert_vectors` call; the
+    Embedding rows and Document status updates are then written in a single
+    transaction. Previous Embedding rows of the documents are replaced, so
+    re-indexing never collides on vector_id.
+    
+    Args:
+        entries: List of (doc, chunks, vectors)
+        metadata: Extra payload stored with every vector
+        wait: Passed to `upsert_vectors`
+        
+    Returns:
+        Document ID -> Qdrant point IDs, in chunk order
+    """
+    from .models import Document, Embedding
+    from .services.chunking import join_chunks
+    from .services.qdrant_service import QdrantService, document_payload
+    from .services.reembedding import active_reembedding, live_model
+    from django.db import transaction
+    
+    qdrant_service = QdrantService()
+    
+    points = []
+    point_ids = {}
+    for doc, chunks, vectors in entries:
+        document_id = str(doc.id)
+        doc_points = qdrant_service.build_chunk_points(
+            document_id=document_id,
+            vectors=vectors,
+            chunks=chunks,
+            metadata={**document_payload(doc), **metadata}
+        )
+        points.extend(doc_points)
+        point_ids[document_id] = [point.id for point in doc_points]
+    
+    qdrant_service.upsert_vectors(points, wait=wait)
+    # A re-indexed document may now have fewer chunks than before
+    qdrant_service.delete_stale_chunks(
+        {document_id: len(ids) for document_id, ids in point_ids.items()},
+        wait=wait
+    )
+    
+    docs = [doc for doc, _, _ in entries]
+    model_name = live_model()['model']
+    now = timezone.now()
+    with transaction.atomic():
+        Embedding.objects.filter(document__in=docs).delete()
+        Embedding.objects.bulk_create([
+            Embedding(
+                document=doc,
+                vector_id=point_id,
+                model_name=model_name,
+                dimension=len(vectors[0])
+            )
+            for doc, _, vectors in entries
+            for point_id in point_ids[str(doc.id)]
+        ])
+        
+        for doc in docs:
+            # The first chunk's point ID is the document ID
+            doc.qdrant_id = point_ids[str(doc.id)][0]
+            doc.embedding_status = 'completed'
+            doc.updated_at = now
+        Document.objects.bulk_update(docs, ['qdrant_id', 'embedding_status', 'updated_at'])
+    
+    qdrant_service.invalidate_users({doc.user_id for doc in docs})
+    
+    # Mirror into the collection being built by a running re-embedding
+    experiment = active_reembedding()
+    if experiment is not None:
+        texts = {
+            str(doc.id): join_chunks(chunks)
+            for doc, chunks, _ in entries
+            if chunks and all('text' in chunk for chunk in chunks)
+        }
+        reembed_dual_write.delay(str(experiment.id), list(point_ids), texts)
+    
+    return point_ids
+
+
+def index_in_chunks(entries: list, metadata: dict) -> int:
+    """
+    Store (doc, chunks, vectors) entries QDRANT_INDEX_BATCH_DOCS documents at a time
+    
+    Each chunk is committed on its own, so a failure part-way through keeps
+    the documents already indexed.
+    
+    Returns:
+        Number of documents indexed
+    """
+    from django.conf import settings
+    
+    chunk_size = settings.QDRANT_INDEX_BATCH_DOCS
+    for start in range(0, len(entries), chunk_size):
+        store_embeddings_bulk(
+            entries[start:start + chunk_size],
+            metadata,
+            wait=settings.QDRANT_UPSERT_WAIT
+        )
+    return len(entries)
+
+
+@shared_task(bind=True, max_retries=3)
+def bulk_index_to_qdrant(self, items: list, metadata: dict = None):
+    """
+    Index already-embedded documents in batches
+    
+    Args:
+        items: List of `generate_embedding` results
+            ({"document_id", "vectors", "chunks"})
+        metadata: Extra payload stored with every vector
+    """
+    from .models import Document
+    from .services.vector_codec import unpack_vectors
+    
+    document_ids = [item['document_id'] for item in items]
+    
+    try:
+        docs = {str(pk): doc for pk, doc in Document.objects.in_bulk(document_ids).items()}
+        entries = [
+            (docs[item['document_id']], item['chunks'], unpack_vectors(item['vectors']))
+            for item in items
+            if item['document_id'] in docs
+        ]
+        
+        logger.info(f"Bulk indexing {len(entries)} documents to Qdrant")
+        indexed = index_in_chunks(entries, metadata or {})
+        
+        logger.info(f"Bulk indexed {indexed}/{len(items)} documents")
+        return {'indexed': indexed, 'total': len(items)}
+        
+    except Exception as e:
+        logger.error(f"Error in bulk indexing: {e}")
+        Document.objects.filter(id__in=document_ids).exclude(
+            embedding_status='completed'
+        ).update(embedding_status='failed')
+        raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
+
+
+@shared_task(bind=True, max_retries=5)
+def reembed_collection_batch(self, experiment_id: str):
+    """
+    Re-embed the next batch of a re-embedding run, then queue the following one
+    
+    Batches are REEMBED_THROTTLE_SECONDS apart (per run config). The cursor
+    is saved after every batch, so a failed run resumes where it stopped
+    (`reembed_collection resume`).
+    
+    Args:
+        experiment_id: Experiment UUID of the run
+    """
+    from django.conf import settings
+    from .models import Experiment
+    from .services.reembedding import next_documents, reembed_documents, update_metrics
+    
+    experiment = Experiment.objects.get(id=experiment_id)
+    if experiment.status != 'running' or experiment.metrics.get('backfill_completed_at'):
+        return {'status': experiment.status}
+    
+    config = experiment.config
+    docs = next_documents(experiment, config['batch_size'])
+    
+    if not docs:
+        metrics = update_metrics(experiment_id, backfill_completed_at=timezone.now().isoformat())
+        logger.info(
+            f"Re-embedding {experiment_id} backfilled {metrics['processed']} documents into "
+            f"{config['target_collection']}; run `reembed_collection switch` to go live"
+        )
+        return {'status': 'backfilled', 'processed': metrics['processed']}
+    
+    try:
+        started = time.monotonic()
+        counts = reembed_documents(experiment, docs)
+        elapsed = time.monotonic() - started
+    except Exception as e:
+        logger.error(f"Re-embedding batch failed: {e}")
+        Experiment.objects.filter(id=experiment_id).update(error_message=str(e))
+        raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
+    
+    last = docs[-1]
+    metrics = update_metrics(
+        experiment_id,
+        processed=lambda value: (value or 0) + len(docs),
+        chunks=lambda value: (value or 0) + counts['chunks'],
+        missing_text=lambda value: (value or 0) + counts['missing_text'],
+        batches=lambda value: (value or 0) + 1,
+        docs_per_second=round(len(docs) / elapsed, 2) if elapsed else None,
+        cursor={'created_at': last.created_at.isoformat(), 'id': str(last.id)}
+    )
+    logger.info(f"Re-embedding {experiment_id}: {metrics['processed']}/{metrics['total']} documents")
+    
+    reembed_collection_batch.apply_async(
+        (experiment_id,),
+        countdown=config['throttle_seconds'],
+        queue=settings.REEMBED_QUEUE or None
+    )
+    return {'status': 'running', 'processed': metrics['processed']}
+
+
+@shared_task(bind=True, max_retries=3)
+def reembed_dual_write(self, experiment_id: str, document_ids: list, texts: dict = None):
+    """
+    Write freshly indexed documents to a running re-embedding's collection
+    
+    Args:
+        experiment_id: Experiment UUID of the run
+        document_ids: Documents just indexed into the live collection
+        texts: Document ID -> text they were indexed with; documents not
+            listed are read from MongoDB
+    """
+    from .models import Document, Experiment
+    from .services.reembedding import reembed_documents, update_metrics
+    
+    experiment = Experiment.objects.get(id=experiment_id)
+    if experiment.status != 'running':
+        return {'written': 0}
+    
+    try:
+        counts = reembed_documents(experiment, list(Document.objects.filter(id__in=document_ids)), texts)
+    except Exception as e:
+        logger.error(f"Re-embedding dual write failed: {e}")
+        raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
+    
+    # Documents without text would silently vanish from search after the switch
+    update_metrics(
+        experiment_id,
+        dual_writes=lambda value: (value or 0) + counts['documents'],
+        missing_text=lambda value: (value or 0) + counts['missing_text']
+    )
+    return {'written': counts['documents'], 'missing_text': counts['missing_text']}
+
+
 @shared_task
 def create_embedding_pipeline(document_id: str, text: str):
     """
@@ -122,6 +356,60 @@ def create_embedding_pipeline(document_id: str, text: str):
     return result.id
 
 
+@shared_task(bind=True, max_retries=3)
+def bulk_embed_documents(self, items: list, metadata: dict = None):
+    """
+    Embed and index many documents with the length-bucketed bulk encoder
+    
+    Args:
+        items: List of {"document_id": ..., "text": ...}
+        metadata: Extra payload stored with every vector
+    """
+    from .models import Document
+    from .services.embedding_service import EmbeddingService
+    
+    document_ids = [item['document_id'] for item in items]
+    
+    try:
+        docs = {str(pk): doc for pk, doc in Document.objects.in_bulk(document_ids).items()}
+        Document.objects.filter(id__in=document_ids).update(embedding_status='processing')
+        
+        logger.info(f"Bulk embedding {len(items)} documents")
+        embedding_service = EmbeddingService()
+        results = embedding_service.embed_documents([item['text'] for item in items])
+        
+        entries = []
+        for item, result in zip(items, results):
+            document_id = item['document_id']
+            doc = docs.get(document_id)
+            if doc is None:
+                logger.warning(f"Document {document_id} disappeared before indexing")
+                continue
+            entries.append((doc, result['chunks'], result['vectors']))
+        
+        indexed = index_in_chunks(entries, metadata or {})
+        
+        logger.info(f"Bulk indexed {indexed}/{len(items)} documents")
+        return {'indexed': indexed, 'total': len(items)}
+        
+    except Exception as e:
+        logger.error(f"Error in bulk embedding: {e}")
+        Document.objects.filter(id__in=document_ids).exclude(
+            embedding_status='completed'
+        ).update(embedding_status='failed')
+        raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
+
+
+def dispatch_bulk_embedding(items: list, metadata: dict = None) -> int:
+    """Queue bulk_embed_documents in EMBEDDING_BULK_TASK_SIZE chunks"""
+    from django.conf import settings
+    
+    chunk_size = settings.EMBEDDING_BULK_TASK_SIZE
+    for start in range(0, len(items), chunk_size):
+        bulk_embed_documents.delay(items[start:start + chunk_size], metadata)
+    return (len(items) + chunk_size - 1) // chunk_size
+
+
 @shared_task
 def sync_journal_entries(user_id: str = None, since: datetime = None):
     """
@@ -148,6 +436,7 @@ def sync_journal_entries(user_id: str = None, since: datetime = None):
         logger.info(f"Found {len(entries)} journal entries to sync")
         
         synced_count = 0
+        pending = []
         for entry in entries:
             # Check if already exists
             mongo_id = entry['_id']
@@ -170,10 +459,13 @@ def sync_journal_entries(user_id: str = None, since: datetime = None):
                 # Queue embedding generation
                 text = entry.get('content', '') or entry.get('text', '')
                 if text:
-                    create_embedding_pipeline.delay(str(doc.id), text)
+                    pending.append({'document_id': str(doc.id), 'text': text})
                     synced_count += 1
         
-        logger.info(f"Synced {synced_count} new journal entries")
+        # Embed new entries in a few length-bucketed batches
+        batches = dispatch_bulk_embedding(pending, metadata={'created_via': 'sync'})
+        
+        logger.info(f"Synced {synced_count} new journal entries in {batches} embedding batches")
         return {'synced': synced_count, 'total': len(entries)}
         
     except Exception as e:
@@ -213,13 +505,14 @@ def cleanup_old_logs():
 
 
 @shared_task
-def build_training_dataset(project_id: str, filters: dict):
+def build_training_dataset(project_id: str, filters: dict, include_embeddings: bool = False):
     """
     Build a training dataset from documents
     
     Args:
         project_id: Project ID
         filters: Query filters for documents
+        include_embeddings: Embed each document's MongoDB text with the bulk encoder
     """
     from .models import Document, Experiment
     from .services.minio_service import MinIOService
@@ -253,6 +546,9 @@ def build_training_dataset(project_id: str, filters: dict):
                 'created_at': doc.created_at.isoformat()
             })
         
+        if include_embeddings:
+            _attach_embeddings(dataset)
+        
         # Upload to MinIO
         minio_service = MinIOService()
         dataset_json = json.dumps(dataset, indent=2).encode('utf-8')
@@ -281,3 +577,27 @@ def build_training_dataset(project_id: str, filters: dict):
         experiment.completed_at = timezone.now()
         experiment.save()
         raise
+
+
+def _attach_embeddings(dataset: list):
+    """Add an 'embedding' field to dataset rows whose text is in MongoDB"""
+    from .services.embedding_service import EmbeddingService
+    from .services.mongo_service import MongoService
+    
+    entries = MongoService().get_journal_entries_by_ids(
+        [row['mongo_id'] for row in dataset if row['mongo_id']]
+    )
+    
+    rows, texts = [], []
+    for row in dataset:
+        entry = entries.get(row['mongo_id'])
+        text = entry and (entry.get('content', '') or entry.get('text', ''))
+        if text:
+            rows.append(row)
+            texts.append(text)
+    
+    vectors = EmbeddingService().generate_embeddings_bulk(texts)
+    for row, vector in zip(rows, vectors):
+        row['embedding'] = vector.tolist()
+    
+    logger.info(f"Embedded {len(rows)}/{len(dataset)} dataset documents")
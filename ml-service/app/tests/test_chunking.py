@@ -0,0 +1,89 @@
+"""
+Tests for token-window chunking and chunk point IDs
+"""
+import re
+import uuid
+
+from django.test import SimpleTestCase
+
+from app.services.chunking import chunk_point_id, chunk_text, join_chunks
+
+
+class WhitespaceTokenizer:
+    """One token per word, with offsets, plus [CLS]/[SEP] like a BERT tokenizer"""
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+    def __call__(self, text, **kwargs):
+        return {'offset_mapping': [match.span() for match in re.finditer(r'\S+', text)]}
+
+
+def words(n):
+    return ' '.join(f"w{i}" for i in range(n))
+
+
+class ChunkTextTests(SimpleTestCase):
+    tokenizer = WhitespaceTokenizer()
+
+    def test_short_text_is_one_chunk(self):
+        text = f"  {words(5)}  "
+        chunks = chunk_text(text, self.tokenizer, max_tokens=10)
+
+        self.assertEqual(chunks, [{'index': 0, 'text': text, 'start': 0, 'end': len(text), 'token_count': 5}])
+
+    def test_windows_leave_room_for_special_tokens(self):
+        chunks = chunk_text(words(16), self.tokenizer, max_tokens=10)
+
+        self.assertEqual([chunk['token_count'] for chunk in chunks], [8, 8])
+        self.assertEqual(chunks[1]['text'].split()[0], 'w8')
+
+    def test_consecutive_chunks_overlap(self):
+        text = words(20)
+        chunks = chunk_text(text, self.tokenizer, max_tokens=10, overlap=3)
+
+        self.assertEqual([chunk['index'] for chunk in chunks], list(range(len(chunks))))
+        for previous, current in zip(chunks, chunks[1:]):
+            self.assertEqual(previous['text'].split()[-3:], current['text'].split()[:3])
+        # Every word is covered and chunk text is sliced from the original
+        self.assertEqual(chunks[-1]['text'].split()[-1], 'w19')
+        for chunk in chunks:
+            self.assertEqual(text[chunk['start']:chunk['end']], chunk['text'])
+
+    def test_overlap_is_capped_below_the_window(self):
+        chunks = chunk_text(words(12), self.tokenizer, max_tokens=6, overlap=50)
+
+        # Window of 4 with overlap 3 advances one token per chunk
+        self.assertEqual(len(chunks), 9)
+        self.assertEqual(chunks[1]['text'].split()[0], 'w1')
+
+    def test_max_chunks_truncates(self):
+        chunks = chunk_text(words(100), self.tokenizer, max_tokens=10, max_chunks=3)
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(chunks[-1]['text'].split()[-1], 'w23')
+
+    def test_join_chunks_rebuilds_the_text(self):
+        text = words(20)
+        for overlap in (0, 3):
+            chunks = chunk_text(text, self.tokenizer, max_tokens=10, overlap=overlap)
+            self.assertEqual(join_chunks(chunks), text)
+
+
+class ChunkPointIdTests(SimpleTestCase):
+    document_id = str(uuid.uuid4())
+
+    def test_first_chunk_keeps_the_document_id(self):
+        self.assertEqual(chunk_point_id(self.document_id, 0), self.document_id)
+
+    def test_later_chunks_get_deterministic_uuid5_ids(self):
+        ids = [chunk_point_id(self.document_id, index) for index in range(1, 4)]
+
+        self.assertEqual(ids, [chunk_point_id(self.document_id, index) for index in range(1, 4)])
+        self.assertEqual(len(set(ids)), 3)
+        self.assertEqual(ids[0], str(uuid.uuid5(uuid.UUID(self.document_id), 'chunk-1')))
+        self.assertTrue(all(uuid.UUID(point_id).version == 5 for point_id in ids))
+
+    def test_ids_differ_between_documents(self):
+        other = str(uuid.uuid4())
+        self.assertNotEqual(chunk_point_id(self.document_id, 1), chunk_point_id(other, 1))
@@ -0,0 +1,41 @@
+"""
+Tests for length-bucketed bulk embedding batches
+"""
+import random
+
+from django.test import SimpleTestCase
+
+from app.services.embedding_service import plan_token_batches
+
+
+class PlanTokenBatchesTests(SimpleTestCase):
+
+    def test_every_index_is_planned_once(self):
+        rng = random.Random(0)
+        lengths = [rng.randint(1, 300) for _ in range(200)]
+        batches = plan_token_batches(lengths, token_budget=2048, max_batch_size=32)
+
+        self.assertEqual(sorted(index for batch in batches for index in batch), list(range(200)))
+
+    def test_batches_stay_within_token_budget_and_size(self):
+        rng = random.Random(0)
+        lengths = [rng.randint(1, 300) for _ in range(200)]
+        batches = plan_token_batches(lengths, token_budget=2048, max_batch_size=32)
+
+        for batch in batches:
+            self.assertLessEqual(len(batch), 32)
+            self.assertLessEqual(len(batch) * max(lengths[index] for index in batch), 2048)
+
+    def test_similar_lengths_are_grouped(self):
+        lengths = [100, 5, 100, 5, 100, 5]
+        batches = plan_token_batches(lengths, token_budget=300, max_batch_size=8)
+
+        self.assertEqual([sorted(batch) for batch in batches], [[1, 3, 5], [0, 2, 4]])
+
+    def test_text_over_budget_gets_its_own_batch(self):
+        batches = plan_token_batches([10, 5000, 10], token_budget=100, max_batch_size=8)
+
+        self.assertEqual(batches, [[0, 2], [1]])
+
+    def test_empty_input(self):
+        self.assertEqual(plan_token_batches([], token_budget=100, max_batch_size=8), [])
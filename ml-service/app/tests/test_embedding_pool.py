@@ -0,0 +1,43 @@
+"""
+Tests for the embedding process pool
+"""
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from app.services.embedding_pool import PooledBackend, plan_replicas
+
+
+class PlanReplicasTests(SimpleTestCase):
+    cpus = list(range(8))
+
+    def test_derived_size_uses_this_workers_share(self):
+        self.assertEqual(plan_replicas(0, 2, self.cpus), [[0, 1], [2, 3], [4, 5], [6, 7]])
+        self.assertEqual(plan_replicas(0, 2, self.cpus, workers=2, slot=0), [[0, 1], [2, 3]])
+
+    def test_workers_pin_to_disjoint_cpus(self):
+        plans = [plan_replicas(0, 1, self.cpus, workers=2, slot=slot) for slot in range(2)]
+
+        pinned = [cpu for plan in plans for cpu_set in plan for cpu in cpu_set]
+        self.assertEqual(sorted(pinned), self.cpus)
+
+    def test_explicit_size_cycles_through_the_share(self):
+        self.assertEqual(plan_replicas(3, 1, self.cpus, workers=4, slot=1), [[2], [3], [2]])
+
+    def test_more_workers_than_cpus_share_all_cpus(self):
+        self.assertEqual(plan_replicas(0, 1, [0, 1], workers=4, slot=3), [[0], [1]])
+
+
+class PooledBackendTests(SimpleTestCase):
+
+    def test_load_does_not_start_replicas(self):
+        pool = mock.Mock(backend_name='torch', model_name='model')
+        pool.describe.return_value = {'max_seq_length': 256, 'dimension': 384}
+        backend = PooledBackend(pool)
+
+        with mock.patch.dict('sys.modules', {'transformers': mock.Mock()}):
+            backend.load()
+        pool.describe.assert_not_called()
+
+        self.assertEqual((backend.max_seq_length, backend.dimension), (256, 384))
+        pool.describe.assert_called_once()
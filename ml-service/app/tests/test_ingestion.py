@@ -0,0 +1,139 @@
+"""
+Tests for bulk document ingestion and the NDJSON parser
+"""
+import io
+import json
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import TestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APITestCase
+
+from app.models import Document
+from app.parsers import NDJSONParser
+from app.services.ingestion import ingest_documents
+
+
+def document(title, **fields):
+    return {'user_id': 'u1', 'title': title, **fields}
+
+
+@mock.patch('app.tasks.dispatch_bulk_embedding', return_value=1)
+class IngestDocumentsTests(TestCase):
+    """services.ingestion.ingest_documents"""
+
+    def test_per_batch_commits_insert_valid_items_and_report_invalid_ones(self, dispatch):
+        result = ingest_documents([document('a'), {'title': 'no user'}, document('b')], atomic=False, batch_size=2)
+
+        self.assertEqual(result['created'], 2)
+        self.assertEqual(result['total'], 3)
+        self.assertEqual([error['index'] for error in result['errors']], [1])
+        self.assertIn('user_id', result['errors'][0]['errors'])
+        self.assertEqual(set(Document.objects.values_list('title', flat=True)), {'a', 'b'})
+
+    def test_inserts_nothing_when_an_item_is_invalid(self, dispatch):
+        items = [document(str(i)) for i in range(5)] + [{'title': 'no user'}]
+        result = ingest_documents(items, batch_size=2)
+
+        self.assertEqual(result['created'], 0)
+        self.assertEqual([error['index'] for error in result['errors']], [5])
+        self.assertFalse(Document.objects.exists())
+
+    def test_duplicate_mongo_ids_are_rejected_per_item(self, dispatch):
+        Document.objects.create(user_id='u1', title='stored', mongo_id='taken')
+
+        result = ingest_documents([
+            document('a', mongo_id='m1'),
+            document('b', mongo_id='m1'),
+            document('c', mongo_id='taken'),
+            document('d', mongo_id='m2'),
+        ], atomic=False)
+
+        self.assertEqual(result['created'], 2)
+        self.assertEqual([error['index'] for error in result['errors']], [1, 2])
+        self.assertEqual(set(Document.objects.values_list('mongo_id', flat=True)), {'taken', 'm1', 'm2'})
+
+    def test_blank_mongo_ids_are_stored_as_null(self, dispatch):
+        result = ingest_documents([document('a', mongo_id=''), document('b', mongo_id='')])
+
+        self.assertEqual((result['created'], result['errors']), (2, []))
+        self.assertEqual(Document.objects.filter(mongo_id__isnull=True).count(), 2)
+
+    def test_unparseable_lines_are_reported_per_item(self, dispatch):
+        result = ingest_documents([document('a'), ParseError('Line 2: bad JSON')], atomic=False)
+
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(result['errors'][0]['index'], 1)
+        self.assertIn('Line 2', str(result['errors'][0]['errors']['non_field_errors'][0]))
+
+    def test_embedding_is_dispatched_only_after_commit(self, dispatch):
+        with self.captureOnCommitCallbacks() as callbacks:
+            result = ingest_documents([document('a', text='hello'), document('b')])
+            dispatch.assert_not_called()
+
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        pending, = dispatch.call_args.args
+        self.assertEqual(pending, [{'document_id': str(Document.objects.get(title='a').id), 'text': 'hello'}])
+        self.assertEqual(result['queued_batches'], 1)
+
+
+@mock.patch('app.tasks.dispatch_bulk_embedding', return_value=0)
+class BulkCreateViewTests(APITestCase):
+    """POST /documents/bulk_create/"""
+
+    url = '/api/v1/documents/bulk_create/'
+
+    def test_json_is_all_or_nothing(self, dispatch):
+        response = self.client.post(self.url, {'documents': [document('a'), {'title': 'x'}]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertFalse(Document.objects.exists())
+
+    def test_json_rejects_per_batch_commits(self, dispatch):
+        response = self.client.post(f"{self.url}?atomic=false", {'documents': [document('a')]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('atomic', response.data)
+        self.assertFalse(Document.objects.exists())
+
+    def test_conflict_rolls_back_the_whole_request(self, dispatch):
+        with mock.patch('app.models.Document.objects.bulk_create', side_effect=IntegrityError('duplicate')):
+            response = self.client.post(self.url, {'documents': [document('a'), document('b')]}, format='json')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['created'], 0)
+        self.assertFalse(Document.objects.exists())
+
+    def test_ndjson_is_all_or_nothing_by_default(self, dispatch):
+        body = '\n'.join([json.dumps(document('a')), '{not json'])
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Document.objects.exists())
+
+    def test_ndjson_per_batch_commits(self, dispatch):
+        body = '\n'.join([json.dumps(document('a')), '{not json', '', json.dumps(document('b'))])
+        response = self.client.post(f"{self.url}?atomic=false", body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['total']), (2, 3))
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+
+
+class NDJSONParserTests(TestCase):
+    """parsers.NDJSONParser"""
+
+    def test_yields_values_and_parse_errors_lazily(self):
+        stream = io.BytesIO(b'{"a": 1}\n\n[2]\n{oops\n')
+        items = NDJSONParser().parse(stream)
+
+        self.assertEqual(next(items), {'a': 1})
+        self.assertEqual(next(items), [2])
+        error = next(items)
+        self.assertIsInstance(error, ParseError)
+        self.assertIn('Line 4', str(error.detail))
+        self.assertEqual(list(items), [])
@@ -0,0 +1,119 @@
+"""
+Tests for keyset pagination and sparse fieldsets on list endpoints
+"""
+from base64 import b64encode
+from datetime import timedelta
+from urllib.parse import quote, urlencode
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from app.models import Document, Embedding
+
+
+class CreatedAtCursorPaginationTests(APITestCase):
+    """CreatedAtCursorPagination on /documents/"""
+
+    url = '/api/v1/documents/'
+
+    def setUp(self):
+        # Seven documents, five of which share one created_at
+        self.documents = [Document.objects.create(user_id='u1', title=f"doc {i}") for i in range(7)]
+        now = timezone.now()
+        Document.objects.filter(id__in=[doc.id for doc in self.documents[:5]]).update(created_at=now)
+        Document.objects.filter(id=self.documents[5].id).update(created_at=now - timedelta(minutes=1))
+        Document.objects.filter(id=self.documents[6].id).update(created_at=now + timedelta(minutes=1))
+        self.expected = [
+            str(doc.id) for doc in Document.objects.order_by('-created_at', '-id')
+        ]
+
+    def walk(self, url):
+        """Follow `next` links to the end, returning the ids of every page"""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([item['id'] for item in response.data['results']])
+            url = response.data['next']
+        return pages
+
+    def test_pages_cover_ties_without_duplicates_or_gaps(self):
+        pages = self.walk(f"{self.url}?page_size=2")
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual([doc_id for page in pages for doc_id in page], self.expected)
+
+    def test_previous_link_returns_the_page_before(self):
+        first = self.client.get(f"{self.url}?page_size=3")
+        self.assertIsNone(first.data['previous'])
+
+        second = self.client.get(first.data['next'])
+        self.assertEqual([item['id'] for item in second.data['results']], self.expected[3:6])
+
+        back = self.client.get(second.data['previous'])
+        self.assertEqual([item['id'] for item in back.data['results']], self.expected[:3])
+        self.assertIsNone(back.data['previous'])
+        self.assertEqual(back.data['next'], first.data['next'])
+
+    def test_invalid_cursor_is_not_found(self):
+        malformed_position = b64encode(urlencode({'p': 'not-a-date|not-a-uuid'}).encode()).decode()
+        for cursor in ('garbage', quote(malformed_position)):
+            response = self.client.get(f"{self.url}?cursor={cursor}")
+            self.assertEqual(response.status_code, 404)
+
+    def test_count_only_on_request(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{self.url}?page_size=2")
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(queries), 1)
+
+        response = self.client.get(f"{self.url}?page_size=2&include_count=true")
+        self.assertEqual(response.data['count'], 7)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(f"{self.url}?page_size=100000")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 7)
+
+
+class SparseFieldsetTests(APITestCase):
+    """`?fields=` on list endpoints"""
+
+    def setUp(self):
+        self.document = Document.objects.create(user_id='u1', title='Journal', metadata={'big': 'x' * 100})
+        Embedding.objects.create(document=self.document, vector_id='v1', model_name='model', dimension=384)
+
+    def test_only_requested_columns_are_loaded(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/documents/?fields=title')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [{'id': str(self.document.id), 'title': 'Journal'}])
+        sql = queries[0]['sql']
+        self.assertIn('"title"', sql)
+        self.assertNotIn('"metadata"', sql)
+
+    def test_related_field_is_joined(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/embeddings/?fields=document_title')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['document_title'], 'Journal')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'document_title'})
+        # One query: the title comes through the join, not a lookup per row
+        self.assertEqual(len(queries), 1)
+        self.assertIn('JOIN', queries[0]['sql'])
+        self.assertNotIn('"model_name"', queries[0]['sql'])
+        self.assertNotIn('"metadata"', queries[0]['sql'])
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/api/v1/documents/?fields=title,bogus')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('bogus', response.data['fields'][0])
+
+    def test_write_only_field_is_rejected(self):
+        response = self.client.get('/api/v1/documents/?fields=text')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,136 @@
+"""
+Tests for the live collection alias used by blue/green re-embedding
+"""
+import os
+from unittest import mock
+
+import numpy as np
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from qdrant_client import QdrantClient
+
+from app.models import Document, Experiment
+from app.services.embedding_service import EmbeddingService
+from app.services.qdrant_service import QdrantService
+from app.services.reembedding import live_model, next_collection_name, settings_model
+from app.tasks import reembed_dual_write
+
+
+class InMemoryQdrantMixin:
+
+    def setUp(self):
+        super().setUp()
+        self.service = QdrantService()
+        self.client = QdrantClient(':memory:')
+        for name, value in (('_client', self.client), ('_client_pid', os.getpid())):
+            patcher = mock.patch.object(self.service, name, value, create=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class LiveAliasTests(InMemoryQdrantMixin, SimpleTestCase):
+
+    def test_fresh_install_creates_v1_behind_the_alias(self):
+        self.service.initialize_collection()
+
+        self.assertEqual(self.service.resolve_alias(settings.QDRANT_COLLECTION_EMBEDDINGS), 'cosmic_embeddings_v1')
+        self.assertEqual(next_collection_name(settings.QDRANT_COLLECTION_PREFIX), 'cosmic_embeddings_v2')
+
+    def test_legacy_collection_is_kept_behind_the_alias(self):
+        self.service.create_collection('cosmic_embeddings')
+
+        self.service.initialize_collection()
+
+        self.assertEqual(self.service.resolve_alias(settings.QDRANT_COLLECTION_EMBEDDINGS), 'cosmic_embeddings')
+        self.assertEqual(next_collection_name(settings.QDRANT_COLLECTION_PREFIX), 'cosmic_embeddings_v2')
+
+    def test_switch_keeps_the_previous_collection(self):
+        self.service.create_collection('cosmic_embeddings')
+        self.service.initialize_collection()
+        self.service.create_collection('cosmic_embeddings_v2')
+
+        previous = self.service.switch_alias(settings.QDRANT_COLLECTION_EMBEDDINGS, 'cosmic_embeddings_v2')
+
+        self.assertEqual(previous, 'cosmic_embeddings')
+        self.assertTrue(self.client.collection_exists('cosmic_embeddings'))
+        self.assertEqual(self.service.resolve_alias(settings.QDRANT_COLLECTION_EMBEDDINGS), 'cosmic_embeddings_v2')
+
+
+class FakeEncoder:
+
+    def embed_documents(self, texts):
+        return [
+            {'chunks': [{'index': 0, 'text': text, 'start': 0, 'end': len(text)}], 'vectors': np.ones((1, 4))}
+            for text in texts
+        ]
+
+
+@mock.patch('app.services.reembedding.get_encoder', return_value=FakeEncoder())
+class DualWriteTests(InMemoryQdrantMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.service.create_collection('cosmic_embeddings_v2', dimension=4)
+        self.experiment = Experiment.objects.create(
+            name='Re-embed',
+            project_id='default',
+            experiment_type='reembedding',
+            status='running',
+            config={'target_collection': 'cosmic_embeddings_v2', 'model': 'm', 'backend': 'torch'},
+            metrics={'missing_text': 0, 'dual_writes': 0}
+        )
+
+    def test_given_texts_are_written_and_missing_ones_counted(self, get_encoder):
+        with_text = Document.objects.create(user_id='u1', title='a', embedding_status='completed')
+        without_text = Document.objects.create(user_id='u1', title='b', embedding_status='completed')
+
+        reembed_dual_write(str(self.experiment.id), [str(with_text.id), str(without_text.id)], {str(with_text.id): 'hello'})
+
+        self.experiment.refresh_from_db()
+        self.assertEqual((self.experiment.metrics['dual_writes'], self.experiment.metrics['missing_text']), (1, 1))
+        points = self.client.retrieve('cosmic_embeddings_v2', [str(with_text.id), str(without_text.id)])
+        self.assertEqual([point.id for point in points], [str(with_text.id)])
+
+
+class LiveModelTests(InMemoryQdrantMixin, TestCase):
+    target = {'model': 'BAAI/bge-base-en-v1.5', 'backend': 'torch', 'dimension': 768}
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.dict('app.services.reembedding._live')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service.initialize_collection()
+        self.service.create_collection('cosmic_embeddings_v2', dimension=768)
+        Experiment.objects.create(
+            name='Re-embed',
+            project_id='default',
+            experiment_type='reembedding',
+            status='completed',
+            config={
+                'source_collection': 'cosmic_embeddings_v1',
+                'source_model': settings_model(),
+                'target_collection': 'cosmic_embeddings_v2',
+                **self.target,
+            }
+        )
+
+    def test_follows_the_alias(self):
+        self.assertEqual(live_model(refresh=True), settings_model())
+
+        self.service.switch_alias(settings.QDRANT_COLLECTION_EMBEDDINGS, 'cosmic_embeddings_v2')
+        self.assertEqual(live_model(refresh=True), self.target)
+
+        # Rolling back restores the model the run started from
+        self.service.switch_alias(settings.QDRANT_COLLECTION_EMBEDDINGS, 'cosmic_embeddings_v1')
+        self.assertEqual(live_model(refresh=True), settings_model())
+
+    def test_embedding_service_uses_the_live_model(self):
+        self.service.switch_alias(settings.QDRANT_COLLECTION_EMBEDDINGS, 'cosmic_embeddings_v2')
+        live_model(refresh=True)
+
+        with mock.patch('app.services.reembedding.get_encoder') as get_encoder:
+            model = EmbeddingService().get_model()
+
+        get_encoder.assert_called_once_with(self.target)
+        self.assertIs(model, get_encoder.return_value.get_model.return_value)
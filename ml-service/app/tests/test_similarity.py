@@ -0,0 +1,30 @@
+"""
+Tests for batch similarity input validation
+"""
+import uuid
+
+from django.test import SimpleTestCase
+
+from app.serializers import SimilaritySerializer
+
+
+class SimilaritySerializerTests(SimpleTestCase):
+    document_id = str(uuid.uuid4())
+
+    def test_document_ids_require_user_id(self):
+        for data in (
+            {'document_ids': [self.document_id]},
+            {'texts': ['a'], 'query_document_ids': [self.document_id]},
+            {'document_ids': [self.document_id], 'user_id': ''},
+        ):
+            serializer = SimilaritySerializer(data=data)
+            self.assertFalse(serializer.is_valid())
+            self.assertIn('user_id', serializer.errors)
+
+    def test_document_ids_with_user_id(self):
+        serializer = SimilaritySerializer(data={'document_ids': [self.document_id], 'user_id': 'u1'})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_texts_need_no_user_id(self):
+        serializer = SimilaritySerializer(data={'texts': ['a', 'b'], 'query_texts': ['c']})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
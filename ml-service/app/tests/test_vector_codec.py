@@ -0,0 +1,50 @@
+"""
+Tests for the binary vector encoding
+"""
+import json
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from app.services.vector_codec import decode_vectors, encode_vectors, pack_vectors, unpack_vectors
+
+
+class VectorCodecTests(SimpleTestCase):
+
+    def setUp(self):
+        self.vectors = np.random.default_rng(0).normal(size=(3, 384)).astype(np.float32)
+
+    def test_float32_round_trip_is_exact(self):
+        data = encode_vectors(self.vectors)
+
+        self.assertEqual(len(data), 3 * 384 * 4)
+        np.testing.assert_array_equal(decode_vectors(data, 384), self.vectors)
+
+    def test_float16_round_trip_is_close(self):
+        data = encode_vectors(self.vectors, dtype='float16')
+        decoded = decode_vectors(data, 384, dtype='float16')
+
+        self.assertEqual(len(data), 3 * 384 * 2)
+        self.assertEqual(decoded.dtype, np.float32)
+        np.testing.assert_allclose(decoded, self.vectors, rtol=1e-3, atol=1e-3)
+
+    def test_encoding_is_little_endian(self):
+        self.assertEqual(encode_vectors([[1.0]]), b'\x00\x00\x80\x3f')
+
+    def test_pack_round_trip_through_json(self):
+        for dtype in ('float32', 'float16'):
+            packed = json.loads(json.dumps(pack_vectors(self.vectors, dtype)))
+            self.assertEqual((packed['dtype'], packed['shape']), (dtype, [3, 384]))
+            np.testing.assert_allclose(unpack_vectors(packed), self.vectors, rtol=1e-3, atol=1e-3)
+
+    def test_pack_single_vector_as_one_row(self):
+        packed = pack_vectors(self.vectors[0])
+
+        self.assertEqual(packed['shape'], [1, 384])
+        np.testing.assert_array_equal(unpack_vectors(packed)[0], self.vectors[0])
+
+    def test_unpack_accepts_plain_lists(self):
+        unpacked = unpack_vectors(self.vectors.tolist())
+
+        self.assertEqual(unpacked.dtype, np.float32)
+        np.testing.assert_array_equal(unpacked, self.vectors)
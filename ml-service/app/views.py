@@ -1,26 +1,139 @@
 """
 DRF ViewSets and API Views
 """
+import asyncio
+import json
 import logging
+import numpy as np
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse
+from django.views import View
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.utils import timezone
 
 from .models import Document, Embedding, Experiment
+from .parsers import NDJSONParser
+from .renderers import MsgPackRenderer, VectorOctetStreamRenderer
 from .serializers import (
-    DocumentSerializer, EmbeddingSerializer, ExperimentSerializer,
-    SemanticSearchSerializer, SyncJournalSerializer
+    BatchSemanticSearchSerializer, DocumentSerializer, EmbedSerializer, EmbeddingSerializer,
+    ExperimentSerializer, RecommendSerializer, SemanticSearchSerializer, SimilaritySerializer,
+    SyncJournalSerializer
 )
 from .services.embedding_service import EmbeddingService
-from .services.qdrant_service import QdrantService
+from .services.health import HealthMonitor
+from .services.ingestion import ingest_documents
+from .services.instrumentation import render_prometheus, span, timed
+from .services.qdrant_service import QdrantService, document_payload, payload_selector, project_document
+from .services.reembedding import mirror_deletes, mirror_payloads
+from .services.similarity import mean_vector
+from .services.vector_codec import encode_vectors, pack_vectors
 from .tasks import create_embedding_pipeline, sync_journal_entries
 
 logger = logging.getLogger(__name__)
 
 
-class DocumentViewSet(viewsets.ModelViewSet):
+@timed('search.load_documents')
+def load_documents(results) -> dict:
+    """Documents referenced by search hits, in one query, keyed by string ID"""
+    doc_ids = {result['payload'].get('document_id') for result in results} - {None}
+    return {str(pk): doc for pk, doc in Document.objects.in_bulk(list(doc_ids)).items()}
+
+
+@timed('search.enrich')
+def enrich_results(results, docs: dict) -> list:
+    """Attach the serialized Document to each hit; hits without one are kept as-is"""
+    enriched_results = []
+    for result in results:
+        doc_id = result['payload'].get('document_id')
+        doc = docs.get(doc_id)
+        if doc is None:
+            if doc_id:
+                logger.warning(f"Document {doc_id} not found in PostgreSQL")
+            enriched_results.append(result)
+            continue
+        enriched_results.append({
+            'score': result['score'],
+            'document': DocumentSerializer(doc).data,
+            'payload': result['payload']
+        })
+    return enriched_results
+
+
+def project_results(results, fields) -> list:
+    """Hits answered from their Qdrant payload alone (projection 'payload')"""
+    return [
+        {'score': result['score'], 'document': project_document(result['payload'], fields)}
+        for result in results
+    ]
+
+
+def search_cache_params(data) -> dict:
+    """Request fields that determine a search response"""
+    return {
+        'query': data['query'],
+        'document_type': data['document_type'],
+        'top_k': data['top_k'],
+        'score_threshold': data['score_threshold'],
+        'projection': data['projection'],
+        'fields': data.get('fields'),
+    }
+
+
+class SparseFieldsetMixin:
+    """
+    `?fields=a,b` on list and retrieve
+    
+    Only those serializer fields (plus `id`) are returned and only their
+    columns are loaded, so large JSON columns such as `metadata` stay in
+    the database unless asked for.
+    """
+    
+    def get_sparse_fields(self):
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = None
+            requested = [
+                name.strip() for name in self.request.query_params.get('fields', '').split(',') if name.strip()
+            ]
+            if requested and self.action in ('list', 'retrieve'):
+                readable = {name for name, field in self.get_serializer_class()().fields.items() if not field.write_only}
+                unknown = sorted(set(requested) - readable)
+                if unknown:
+                    raise ValidationError({'fields': [
+                        f"Unknown fields: {', '.join(unknown)}. Choose from: {', '.join(sorted(readable))}"
+                    ]})
+                self._sparse_fields = list(dict.fromkeys(['id', *requested]))
+        return self._sparse_fields
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        
+        serializer_fields = self.get_serializer_class()().fields
+        # Joins are re-added only for requested related fields
+        queryset = queryset.select_related(None)
+        # Pagination positions on (created_at, id)
+        columns = {'id', 'created_at'}
+        for name in fields:
+            source = serializer_fields[name].source_attrs
+            columns.add('__'.join(source))
+            if len(source) > 1:
+                queryset = queryset.select_related('__'.join(source[:-1]))
+        return queryset.only(*columns)
+    
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_sparse_fields())
+        return super().get_serializer(*args, **kwargs)
+
+
+class DocumentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet for Document CRUD operations
     """
@@ -35,24 +148,85 @@ class DocumentViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(user_id=user_id)
         return queryset
     
-    @action(detail=False, methods=['post'])
+    def perform_create(self, serializer):
+        document = serializer.save()
+        QdrantService().invalidate_users([document.user_id])
+    
+    def perform_update(self, serializer):
+        # Cached search responses and chunk payloads embed document metadata
+        document = serializer.save()
+        QdrantService().invalidate_users([document.user_id])
+        if document.embedding_status == 'completed':
+            payloads = {str(document.id): document_payload(document)}
+            try:
+                QdrantService().set_document_payloads(payloads)
+                mirror_payloads(payloads)
+            except Exception as e:
+                logger.error(f"Failed to update payload of document {document.id}: {e}")
+    
+    def perform_destroy(self, instance):
+        """Delete the document and all of its chunk vectors"""
+        document_id = str(instance.id)
+        user_id = instance.user_id
+        instance.delete()
+        
+        qdrant_service = QdrantService()
+        try:
+            qdrant_service.delete_document_vectors(document_id)
+            mirror_deletes([document_id])
+        except Exception as e:
+            logger.error(f"Failed to delete vectors for document {document_id}: {e}")
+        qdrant_service.invalidate_users([user_id])
+    
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
     def bulk_create(self, request):
-        """Bulk create documents"""
-        documents = request.data.get('documents', [])
-        
-        created = []
-        for doc_data in documents:
-            serializer = self.get_serializer(data=doc_data)
-            if serializer.is_valid():
-                doc = serializer.save()
-                created.append(doc)
-            else:
-                logger.warning(f"Invalid document data: {serializer.errors}")
+        """
+        Bulk create documents
         
-        return Response({
-            'created': len(created),
-            'total': len(documents)
-        }, status=status.HTTP_201_CREATED)
+        Accepts {"documents": [...]} as JSON (up to BULK_INGEST_MAX_DOCUMENTS)
+        or one document per line as application/x-ndjson, read while the
+        upload streams. Nothing is inserted unless every document is valid.
+        NDJSON uploads may opt into committing batch by batch with
+        ?atomic=false, inserting valid documents and reporting the others.
+        """
+        atomic = request.query_params.get('atomic', 'true').lower() not in ('0', 'false')
+        
+        if request.content_type.startswith(NDJSONParser.media_type):
+            documents = request.data
+        else:
+            if not atomic:
+                return Response(
+                    {'atomic': ['Batch-by-batch commits are only available for application/x-ndjson uploads.']},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            documents = request.data.get('documents', []) if isinstance(request.data, dict) else request.data
+            if not isinstance(documents, list):
+                return Response({'documents': ['Expected a list.']}, status=status.HTTP_400_BAD_REQUEST)
+            if len(documents) > settings.BULK_INGEST_MAX_DOCUMENTS:
+                return Response(
+                    {'documents': [
+                        f"At most {settings.BULK_INGEST_MAX_DOCUMENTS} documents per JSON request; "
+                        f"send larger uploads as application/x-ndjson"
+                    ]},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        result = ingest_documents(documents, atomic=atomic)
+        if result.get('conflict'):
+            # Atomic requests roll back entirely; earlier batches of a non-atomic one stay committed
+            return Response(
+                {'error': 'A document was created concurrently; retry the documents not created', **result},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        if result['errors']:
+            logger.warning(f"Bulk create rejected {len(result['errors'])}/{result['total']} documents")
+        
+        response_status = (
+            status.HTTP_400_BAD_REQUEST if result['errors'] and not result['created']
+            else status.HTTP_201_CREATED
+        )
+        return Response(result, status=response_status)
     
     @action(detail=True, methods=['post'])
     def reindex(self, request, pk=None):
@@ -71,6 +245,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
                     # Reset status and queue task
                     document.embedding_status = 'pending'
                     document.save()
+                    QdrantService().invalidate_users([document.user_id])
                     
                     create_embedding_pipeline.delay(str(document.id), text)
                     
@@ -82,11 +257,11 @@ class DocumentViewSet(viewsets.ModelViewSet):
         )
 
 
-class EmbeddingViewSet(viewsets.ReadOnlyModelViewSet):
+class EmbeddingViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Embedding (read-only)
     """
-    queryset = Embedding.objects.all()
+    queryset = Embedding.objects.select_related('document')
     serializer_class = EmbeddingSerializer
     
     def get_queryset(self):
@@ -98,7 +273,7 @@ class EmbeddingViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
 
-class ExperimentViewSet(viewsets.ModelViewSet):
+class ExperimentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet for Experiment tracking
     """
@@ -124,8 +299,14 @@ class SemanticSearchView(APIView):
         "user_id": "123",
         "document_type": "journal_entry",
         "top_k": 10,
-        "score_threshold": 0.5
+        "score_threshold": 0.5,
+        "projection": "document",     // or "payload"
+        "fields": ["title", "created_at"]   // payload projection only
     }
+    
+    With projection "payload" each hit's document is built from the fields
+    stored in the Qdrant payload at index time (default: all of them), so
+    no database query is made.
     """
     
     def post(self, request):
@@ -137,12 +318,23 @@ class SemanticSearchView(APIView):
         data = serializer.validated_data
         
         try:
+            qdrant_service = QdrantService()
+            
+            # Repeated searches are served from Redis until the user's data changes
+            search_cache = qdrant_service.get_search_cache()
+            cache_token = None
+            if search_cache is not None:
+                cached, cache_token = search_cache.lookup(data['user_id'], search_cache_params(data))
+                if cached is not None:
+                    return Response({**cached, 'query': data['query']})
+            
             # Generate query embedding
             embedding_service = EmbeddingService()
-            query_vector = embedding_service.generate_embedding(data['query'])
+            query_vector = embedding_service.embed_query(data['query'])
+            
+            payload_only = data['projection'] == 'payload'
             
             # Search Qdrant
-            qdrant_service = QdrantService()
             results = qdrant_service.search_vectors(
                 query_vector=query_vector,
                 limit=data['top_k'],
@@ -150,32 +342,25 @@ class SemanticSearchView(APIView):
                 filter_dict={
                     'user_id': data['user_id'],
                     'document_type': data['document_type']
-                }
+                },
+                with_payload=payload_selector(data['fields']) if payload_only else True
             )
             
             # Enrich with document metadata
-            enriched_results = []
-            for result in results:
-                doc_id = result['payload'].get('document_id')
-                if doc_id:
-                    try:
-                        doc = Document.objects.get(id=doc_id)
-                        enriched_results.append({
-                            'score': result['score'],
-                            'document': DocumentSerializer(doc).data,
-                            'payload': result['payload']
-                        })
-                    except Document.DoesNotExist:
-                        logger.warning(f"Document {doc_id} not found in PostgreSQL")
-                        enriched_results.append(result)
-                else:
-                    enriched_results.append(result)
+            if payload_only:
+                enriched_results = project_results(results, data['fields'])
+            else:
+                enriched_results = enrich_results(results, load_documents(results))
             
-            return Response({
+            response_data = {
                 'query': data['query'],
                 'results': enriched_results,
                 'count': len(enriched_results)
-            })
+            }
+            if search_cache is not None:
+                search_cache.store(cache_token, response_data)
+            
+            return Response(response_data)
             
         except Exception as e:
             logger.error(f"Search error: {e}")
@@ -185,6 +370,360 @@ class SemanticSearchView(APIView):
             )
 
 
+class AsyncSemanticSearchView(View):
+    """
+    Semantic search on the asyncio stack (serve with an ASGI worker)
+    
+    POST /api/v1/search/async/
+    
+    Same request and response as `/search/`. Qdrant is queried with
+    AsyncQdrantClient and documents are loaded in one async ORM query,
+    so one process keeps many searches in flight while they wait on I/O;
+    query embedding runs on a bounded thread pool.
+    """
+    http_method_names = ['post']
+    
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Like DRF's APIView: callers authenticate per request, not by session cookie
+        view.csrf_exempt = True
+        return view
+    
+    async def post(self, request):
+        try:
+            body = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = SemanticSearchSerializer(data=body)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        
+        try:
+            qdrant_service = QdrantService()
+            
+            search_cache = qdrant_service.get_search_cache()
+            cache_token = None
+            if search_cache is not None:
+                cached, cache_token = await asyncio.to_thread(
+                    search_cache.lookup, data['user_id'], search_cache_params(data)
+                )
+                if cached is not None:
+                    return JsonResponse({**cached, 'query': data['query']})
+            
+            query_vector = await EmbeddingService().embed_query_async(data['query'])
+            
+            payload_only = data['projection'] == 'payload'
+            
+            results = await qdrant_service.search_vectors_async(
+                query_vector=query_vector,
+                limit=data['top_k'],
+                score_threshold=data['score_threshold'],
+                filter_dict={
+                    'user_id': data['user_id'],
+                    'document_type': data['document_type']
+                },
+                with_payload=payload_selector(data['fields']) if payload_only else True,
+                # Under WSGI this request's event loop dies with it
+                shared_client=isinstance(request, ASGIRequest)
+            )
+            
+            if payload_only:
+                enriched_results = project_results(results, data['fields'])
+            else:
+                doc_ids = {result['payload'].get('document_id') for result in results} - {None}
+                with span('search.load_documents'):
+                    docs = {str(doc.pk): doc async for doc in Document.objects.filter(id__in=doc_ids)}
+                enriched_results = enrich_results(results, docs)
+            
+            response_data = {
+                'query': data['query'],
+                'results': enriched_results,
+                'count': len(enriched_results)
+            }
+            if search_cache is not None:
+                await asyncio.to_thread(search_cache.store, cache_token, response_data)
+            
+            return JsonResponse(response_data)
+            
+        except Exception as e:
+            logger.error(f"Async search error: {e}")
+            return JsonResponse({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class BatchSemanticSearchView(APIView):
+    """
+    Several semantic searches in one call
+    
+    POST /api/v1/search/batch/
+    {
+        "searches": [
+            {"query": "...", "user_id": "123", "top_k": 5, "score_threshold": 0.4},
+            {"query": "...", "user_id": "123", "document_type": "goal"}
+        ]
+    }
+    
+    All queries are embedded in one batched encode and sent to Qdrant as a
+    single search_batch request; results come back in request order.
+    Entries accept `projection` and `fields` like `/search/`.
+    """
+    
+    def post(self, request):
+        serializer = BatchSemanticSearchSerializer(data=request.data)
+        
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        searches = serializer.validated_data['searches']
+        
+        try:
+            query_vectors = EmbeddingService().embed_queries([search['query'] for search in searches])
+            
+            result_lists = QdrantService().search_vectors_batch([
+                {
+                    'query_vector': vector,
+                    'limit': search['top_k'],
+                    'score_threshold': search['score_threshold'],
+                    'filter_dict': {
+                        'user_id': search['user_id'],
+                        'document_type': search['document_type']
+                    },
+                    'with_payload': (
+                        payload_selector(search['fields']) if search['projection'] == 'payload' else True
+                    )
+                }
+                for search, vector in zip(searches, query_vectors)
+            ])
+            
+            # One query for every document referenced by any document-projected result
+            docs = load_documents([
+                result
+                for search, results in zip(searches, result_lists) if search['projection'] == 'document'
+                for result in results
+            ])
+            
+            responses = []
+            for search, results in zip(searches, result_lists):
+                if search['projection'] == 'payload':
+                    enriched_results = project_results(results, search['fields'])
+                else:
+                    enriched_results = enrich_results(results, docs)
+                responses.append({
+                    'query': search['query'],
+                    'results': enriched_results,
+                    'count': len(enriched_results)
+                })
+            
+            return Response({'results': responses, 'count': len(responses)})
+            
+        except Exception as e:
+            logger.error(f"Batch search error: {e}")
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class RecommendView(APIView):
+    """
+    "More like this": documents similar to stored documents
+    
+    POST /api/v1/recommend/
+    {
+        "document_ids": ["<uuid>"],
+        "negative_document_ids": ["<uuid>"],   // optional
+        "user_id": "123",
+        "document_type": "journal_entry",
+        "top_k": 10,
+        "score_threshold": 0.5,
+        "strategy": "average_vector"           // or "best_score"
+    }
+    
+    Uses the vectors already stored in Qdrant; nothing is embedded.
+    """
+    
+    def post(self, request):
+        serializer = RecommendSerializer(data=request.data)
+        
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        
+        try:
+            recommendation = QdrantService().recommend(
+                positive_ids=[str(doc_id) for doc_id in data['document_ids']],
+                negative_ids=[str(doc_id) for doc_id in data['negative_document_ids']],
+                limit=data['top_k'],
+                score_threshold=data['score_threshold'],
+                filter_dict={
+                    'user_id': data['user_id'],
+                    'document_type': data['document_type']
+                },
+                strategy=data['strategy']
+            )
+            results = recommendation['results']
+            enriched_results = enrich_results(results, load_documents(results))
+            
+            return Response({
+                'results': enriched_results,
+                'count': len(enriched_results),
+                'missing': recommendation['missing']
+            })
+            
+        except Exception as e:
+            logger.error(f"Recommend error: {e}")
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class EmbedView(APIView):
+    """
+    Embed texts
+    
+    POST /api/v1/embed/
+    {
+        "texts": ["...", "..."],
+        "dtype": "float32",      // or "float16"
+        "encoding": "base64"     // JSON only: base64 envelope (default) or "list"
+    }
+    
+    Response format follows the Accept header:
+    - application/json: {"dimension", "vectors": {"dtype", "shape", "data"}}
+    - application/octet-stream: raw little-endian vectors, shape and dtype in
+      the X-Embedding-Shape / X-Embedding-Dtype headers
+    - application/msgpack: like JSON, with "data" as raw bytes
+    """
+    renderer_classes = [*APIView.renderer_classes, VectorOctetStreamRenderer, MsgPackRenderer]
+    
+    def post(self, request):
+        serializer = EmbedSerializer(data=request.data)
+        
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        
+        try:
+            vectors = EmbeddingService().generate_embeddings_bulk(data['texts'])
+            dtype = data['dtype']
+            response_format = request.accepted_renderer.format
+            
+            if response_format == VectorOctetStreamRenderer.format:
+                return Response({'vectors': vectors, 'dtype': dtype})
+            
+            if response_format == MsgPackRenderer.format:
+                payload = {
+                    'dtype': dtype,
+                    'shape': list(vectors.shape),
+                    'data': encode_vectors(vectors, dtype),
+                }
+            elif data['encoding'] == 'list':
+                payload = vectors.tolist()
+            else:
+                payload = pack_vectors(vectors, dtype)
+            
+            return Response({'dimension': int(vectors.shape[1]), 'vectors': payload})
+            
+        except Exception as e:
+            logger.error(f"Embed error: {e}")
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class SimilarityView(APIView):
+    """
+    Batch similarity between texts or stored document vectors
+    
+    POST /api/v1/similarity/
+    {
+        "query_document_ids": ["<uuid>"],       // optional, defaults to the candidates
+        "document_ids": ["<uuid>", "<uuid>"],   // or "texts": ["...", "..."]
+        "user_id": "123",                       // required with document IDs; owner of the stored vectors
+        "top_k": 5                              // optional, omit for the full matrix
+    }
+    """
+    
+    def _resolve(self, texts, document_ids, user_id):
+        """Return (ids, vectors, missing) for one side of the comparison"""
+        if texts is not None:
+            vectors = EmbeddingService().generate_embeddings_bulk(texts)
+            return list(range(len(texts))), vectors, []
+        
+        document_ids = [str(doc_id) for doc_id in document_ids]
+        # The serializer requires user_id with document IDs; never read other users' vectors
+        stored = QdrantService().get_document_vectors(document_ids, filter_dict={'user_id': user_id})
+        
+        found = [doc_id for doc_id in document_ids if doc_id in stored]
+        missing = [doc_id for doc_id in document_ids if doc_id not in stored]
+        vectors = [mean_vector(np.asarray(stored[doc_id], dtype=np.float32)) for doc_id in found]
+        
+        dimension = EmbeddingService().get_model_config()['dimension']
+        return found, np.vstack(vectors) if vectors else np.zeros((0, dimension), dtype=np.float32), missing
+    
+    def post(self, request):
+        serializer = SimilaritySerializer(data=request.data)
+        
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        
+        try:
+            col_ids, candidates, missing = self._resolve(
+                data.get('texts'), data.get('document_ids'), data.get('user_id')
+            )
+            
+            same_set = 'query_texts' not in data and 'query_document_ids' not in data
+            if same_set:
+                row_ids, queries = col_ids, candidates
+            else:
+                row_ids, queries, query_missing = self._resolve(
+                    data.get('query_texts'), data.get('query_document_ids'), data.get('user_id')
+                )
+                missing += query_missing
+            
+            response = {'rows': row_ids, 'columns': col_ids, 'missing': missing}
+            
+            if len(row_ids) == 0 or len(col_ids) == 0:
+                response['results' if 'top_k' in data else 'matrix'] = []
+                return Response(response)
+            
+            result = EmbeddingService().similarity(
+                queries,
+                candidates,
+                top_k=data.get('top_k'),
+                exclude_self=same_set
+            )
+            
+            if 'matrix' in result:
+                response['matrix'] = np.round(result['matrix'], 6).tolist()
+            else:
+                response['results'] = [
+                    [
+                        {'id': col_ids[j], 'score': round(float(score), 6)}
+                        for j, score in zip(row_indices, row_scores)
+                    ]
+                    for row_indices, row_scores in zip(result['indices'], result['scores'])
+                ]
+            
+            return Response(response)
+            
+        except Exception as e:
+            logger.error(f"Similarity error: {e}")
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class SyncJournalEntriesView(APIView):
     """
     Trigger journal sync from MongoDB
@@ -230,53 +769,107 @@ class HealthCheckView(APIView):
     Health check endpoint
     
     GET /api/v1/health/
+    
+    Served from the background probes (see `/health/ready/`), so a slow
+    dependency cannot hang the request.
     """
     
     def get(self, request):
+        readiness = HealthMonitor().get_status()
         health_status = {
-            'status': 'healthy',
+            'status': 'healthy' if readiness['status'] in ('ready', 'disabled') else 'degraded',
             'timestamp': timezone.now().isoformat(),
-            'services': {}
+            'services': {
+                name: 'healthy' if result['status'] == 'healthy' else f"{result['status']}: {result['error']}"
+                for name, result in readiness['services'].items()
+            }
         }
         
-        # Check database
+        # Per-worker memory (compare PSS vs RSS across workers to confirm weight sharing)
         try:
-            from django.db import connection
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT 1")
-            health_status['services']['database'] = 'healthy'
-        except Exception as e:
-            health_status['services']['database'] = f'unhealthy: {e}'
-            health_status['status'] = 'degraded'
-        
-        # Check Qdrant
-        try:
-            qdrant_service = QdrantService()
-            qdrant_service.get_client().get_collections()
-            health_status['services']['qdrant'] = 'healthy'
+            health_status['memory'] = EmbeddingService().get_memory_report()
         except Exception as e:
-            health_status['services']['qdrant'] = f'unhealthy: {e}'
-            health_status['status'] = 'degraded'
-        
-        # Check MongoDB
-        try:
-            from .services.mongo_service import MongoService
-            mongo_service = MongoService()
-            mongo_service.get_client().server_info()
-            health_status['services']['mongodb'] = 'healthy'
-        except Exception as e:
-            health_status['services']['mongodb'] = f'unhealthy: {e}'
-            health_status['status'] = 'degraded'
-        
-        # Check embedding model
-        try:
-            embedding_service = EmbeddingService()
-            embedding_service.get_model()
-            health_status['services']['embedding_model'] = 'healthy'
-        except Exception as e:
-            health_status['services']['embedding_model'] = f'unhealthy: {e}'
-            health_status['status'] = 'degraded'
+            logger.warning(f"Memory report failed: {e}")
         
         status_code = status.HTTP_200_OK if health_status['status'] == 'healthy' else status.HTTP_503_SERVICE_UNAVAILABLE
         
         return Response(health_status, status=status_code)
+
+
+class HealthLiveView(APIView):
+    """
+    Liveness: the process answers requests
+    
+    GET /api/v1/health/live/
+    
+    Touches no dependency; restart the container only when this fails.
+    """
+    
+    def get(self, request):
+        return Response({'status': 'alive', 'timestamp': timezone.now().isoformat()})
+
+
+class HealthReadyView(APIView):
+    """
+    Readiness from the cached background probes
+    
+    GET /api/v1/health/ready/
+    
+    503 until every probe in HEALTH_REQUIRED_PROBES last succeeded. Each
+    service reports its status, latency, and when it was last checked.
+    """
+    
+    def get(self, request):
+        readiness = HealthMonitor().get_status()
+        status_code = (
+            status.HTTP_200_OK if readiness['status'] in ('ready', 'disabled')
+            else status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        return Response({**readiness, 'timestamp': timezone.now().isoformat()}, status=status_code)
+
+
+class HealthHistoryView(APIView):
+    """
+    Probe latency history for dashboards
+    
+    GET /api/v1/health/history/?probe=qdrant
+    
+    Per dependency: availability, p50/p95/max latency of successful checks
+    and the last HEALTH_HISTORY_SIZE samples.
+    """
+    
+    def get(self, request):
+        return Response(HealthMonitor().get_history(request.query_params.get('probe')))
+
+
+class StatsView(APIView):
+    """
+    Runtime metrics for in-process ML components
+    
+    GET /api/v1/stats/
+    """
+    
+    def get(self, request):
+        return Response({
+            'timestamp': timezone.now().isoformat(),
+            'embedding_batcher': EmbeddingService().get_batcher_stats(),
+            'embedding_cache': EmbeddingService().get_cache_stats(),
+            'embedding_executor': EmbeddingService().get_executor_stats(),
+            'user_vector_cache': QdrantService().get_user_cache_stats(),
+            'search_result_cache': QdrantService().get_search_cache_stats()
+        })
+
+
+class MetricsView(View):
+    """
+    Prometheus metrics of this worker process
+    
+    GET /metrics
+    
+    Histograms of request latency per view and of every instrumented stage
+    (see `services.instrumentation`), in the text exposition format.
+    """
+    http_method_names = ['get']
+    
+    def get(self, request):
+        return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -30,6 +30,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'app.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -102,7 +103,7 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.TokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'app.pagination.CreatedAtCursorPagination',
     'PAGE_SIZE': 50,
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
@@ -120,7 +121,30 @@ MONGO_DB_NAME = os.getenv('MONGO_DB_NAME', 'cosmic_insights')
 # Qdrant
 QDRANT_URL = os.getenv('QDRANT_URL', 'http://qdrant:6333')
 QDRANT_API_KEY = os.getenv('QDRANT_API_KEY', '')
-QDRANT_COLLECTION_EMBEDDINGS = 'cosmic_embeddings'
+QDRANT_COLLECTION_EMBEDDINGS = 'cosmic_embeddings_live'  # alias of the live collection; all reads and writes use it
+QDRANT_COLLECTION_PREFIX = 'cosmic_embeddings'  # collections are <prefix>_v<n>; a plain <prefix> predates aliases
+QDRANT_PREFER_GRPC = os.getenv('QDRANT_PREFER_GRPC', 'False') == 'True'
+QDRANT_GRPC_PORT = int(os.getenv('QDRANT_GRPC_PORT', '6334'))
+QDRANT_TIMEOUT = int(os.getenv('QDRANT_TIMEOUT', '10'))  # seconds
+QDRANT_POOL_MAX_CONNECTIONS = int(os.getenv('QDRANT_POOL_MAX_CONNECTIONS', '32'))  # REST, per process
+QDRANT_POOL_MAX_KEEPALIVE = int(os.getenv('QDRANT_POOL_MAX_KEEPALIVE', '16'))
+QDRANT_SHARD_NUMBER = int(os.getenv('QDRANT_SHARD_NUMBER', '1'))  # fixed at collection creation
+QDRANT_REPLICATION_FACTOR = int(os.getenv('QDRANT_REPLICATION_FACTOR', '1'))
+QDRANT_WRITE_CONSISTENCY_FACTOR = int(os.getenv('QDRANT_WRITE_CONSISTENCY_FACTOR', '1'))
+QDRANT_HNSW_M = int(os.getenv('QDRANT_HNSW_M', '16'))
+QDRANT_HNSW_EF_CONSTRUCT = int(os.getenv('QDRANT_HNSW_EF_CONSTRUCT', '100'))
+QDRANT_TENANT_PARTITIONING = os.getenv('QDRANT_TENANT_PARTITIONING', 'False') == 'True'  # per-user HNSW graphs
+QDRANT_QUANTIZATION = os.getenv('QDRANT_QUANTIZATION', 'none')  # none, scalar (int8) or binary
+QDRANT_QUANTIZATION_QUANTILE = float(os.getenv('QDRANT_QUANTIZATION_QUANTILE', '0.99'))  # scalar only
+QDRANT_QUANTIZATION_ALWAYS_RAM = os.getenv('QDRANT_QUANTIZATION_ALWAYS_RAM', 'True') == 'True'
+# Originals move to disk once a quantized copy serves searches from RAM
+QDRANT_VECTORS_ON_DISK = os.getenv('QDRANT_VECTORS_ON_DISK', str(QDRANT_QUANTIZATION != 'none')) == 'True'
+QDRANT_SEARCH_OVERSAMPLING = float(os.getenv('QDRANT_SEARCH_OVERSAMPLING', '2.0'))
+QDRANT_SEARCH_RESCORE = os.getenv('QDRANT_SEARCH_RESCORE', 'True') == 'True'
+QDRANT_UPSERT_BATCH_SIZE = int(os.getenv('QDRANT_UPSERT_BATCH_SIZE', '256'))  # points per request
+QDRANT_UPSERT_PARALLEL = int(os.getenv('QDRANT_UPSERT_PARALLEL', '4'))  # concurrent upsert requests
+QDRANT_UPSERT_WAIT = os.getenv('QDRANT_UPSERT_WAIT', 'True') == 'True'  # bulk indexing only
+QDRANT_INDEX_BATCH_DOCS = int(os.getenv('QDRANT_INDEX_BATCH_DOCS', '128'))  # documents per bulk index transaction
 
 # MinIO
 MINIO_ENDPOINT = os.getenv('MINIO_ENDPOINT', 'minio:9000')
@@ -145,6 +169,89 @@ CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
 EMBEDDING_DIMENSION = int(os.getenv('EMBEDDING_DIMENSION', '384'))
 MAX_SEQUENCE_LENGTH = int(os.getenv('MAX_SEQUENCE_LENGTH', '512'))
+EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'torch')  # torch, onnx, onnx-int8
+EMBEDDING_ONNX_DIR = os.getenv('EMBEDDING_ONNX_DIR', os.path.join(BASE_DIR, 'data', 'onnx'))
+EMBEDDING_NUM_THREADS = int(os.getenv('EMBEDDING_NUM_THREADS', '0'))  # 0 = runtime default
+EMBEDDING_WEIGHTS_MODE = os.getenv('EMBEDDING_WEIGHTS_MODE', 'default')  # default, mmap, preload
+EMBEDDING_WEIGHTS_DIR = os.getenv('EMBEDDING_WEIGHTS_DIR', os.path.join(BASE_DIR, 'data', 'weights'))
+
+# Embedding executor: 'inline' runs the model in-process, 'process' runs N replicas in a process pool
+EMBEDDING_EXECUTOR = os.getenv('EMBEDDING_EXECUTOR', 'inline')
+EMBEDDING_POOL_SIZE = int(os.getenv('EMBEDDING_POOL_SIZE', '0'))  # 0 = this worker's share of cores / threads per replica
+EMBEDDING_POOL_THREADS = int(os.getenv('EMBEDDING_POOL_THREADS', '1'))  # torch threads per replica
+EMBEDDING_POOL_PIN_CPUS = os.getenv('EMBEDDING_POOL_PIN_CPUS', 'True') == 'True'
+
+# Document chunking (token windows, one Qdrant point per chunk)
+EMBEDDING_CHUNK_TOKENS = int(os.getenv('EMBEDDING_CHUNK_TOKENS', '256'))  # capped at the model's max sequence length
+EMBEDDING_CHUNK_OVERLAP = int(os.getenv('EMBEDDING_CHUNK_OVERLAP', '32'))
+EMBEDDING_MAX_CHUNKS = int(os.getenv('EMBEDDING_MAX_CHUNKS', '64'))  # per document, 0 = unlimited
+
+# Bulk (length-bucketed) embedding
+EMBEDDING_BULK_TOKEN_BUDGET = int(os.getenv('EMBEDDING_BULK_TOKEN_BUDGET', '16384'))  # padded tokens per forward pass
+EMBEDDING_BULK_MAX_BATCH_SIZE = int(os.getenv('EMBEDDING_BULK_MAX_BATCH_SIZE', '256'))
+EMBEDDING_BULK_TASK_SIZE = int(os.getenv('EMBEDDING_BULK_TASK_SIZE', '256'))  # documents per Celery task
+
+# Bulk document ingestion
+BULK_INGEST_MAX_DOCUMENTS = int(os.getenv('BULK_INGEST_MAX_DOCUMENTS', '5000'))  # per JSON request; NDJSON is unbounded
+BULK_INGEST_BATCH_SIZE = int(os.getenv('BULK_INGEST_BATCH_SIZE', '1000'))  # documents per validation batch and transaction
+
+# Batch semantic search
+SEARCH_BATCH_MAX_QUERIES = int(os.getenv('SEARCH_BATCH_MAX_QUERIES', '50'))
+SEARCH_BATCH_CHUNK_OVERSAMPLE = int(os.getenv('SEARCH_BATCH_CHUNK_OVERSAMPLE', '3'))  # chunks fetched per requested document
+
+# Batch similarity
+SIMILARITY_BLOCK_BYTES = int(os.getenv('SIMILARITY_BLOCK_MB', '32')) * 1024 * 1024  # per matrix-multiply block
+SIMILARITY_MAX_ITEMS = int(os.getenv('SIMILARITY_MAX_ITEMS', '5000'))
+SIMILARITY_MAX_MATRIX_CELLS = int(os.getenv('SIMILARITY_MAX_MATRIX_CELLS', '1000000'))  # full matrix responses
+
+# Query embedding micro-batching
+EMBEDDING_BATCHING_ENABLED = os.getenv('EMBEDDING_BATCHING_ENABLED', 'True') == 'True'
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv('EMBEDDING_BATCH_WINDOW_MS', '5'))
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv('EMBEDDING_BATCH_MAX_SIZE', '32'))
+EMBEDDING_BATCH_TIMEOUT = float(os.getenv('EMBEDDING_BATCH_TIMEOUT', '30'))  # seconds
+EMBEDDING_ASYNC_WORKERS = int(os.getenv('EMBEDDING_ASYNC_WORKERS', '32'))  # threads embedding queries for async views
+
+# Embedding cache (in-process LRU + Redis)
+EMBEDDING_CACHE_ENABLED = os.getenv('EMBEDDING_CACHE_ENABLED', 'True') == 'True'
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', '10000'))
+EMBEDDING_CACHE_REDIS_URL = os.getenv('EMBEDDING_CACHE_REDIS_URL', CELERY_BROKER_URL)  # Empty disables the Redis tier
+EMBEDDING_CACHE_REDIS_TTL = int(os.getenv('EMBEDDING_CACHE_REDIS_TTL', str(7 * 24 * 3600)))  # seconds
+EMBEDDING_CACHE_REDIS_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_REDIS_MAX_ENTRIES', '500000'))
+
+# Per-user search cache invalidation (generation counters)
+USER_GENERATION_REDIS_URL = os.getenv('USER_GENERATION_REDIS_URL', CELERY_BROKER_URL)
+
+# Per-user exact-search cache (in-process, in front of Qdrant)
+USER_VECTOR_CACHE_ENABLED = os.getenv('USER_VECTOR_CACHE_ENABLED', 'False') == 'True'
+USER_VECTOR_CACHE_MAX_MB = int(os.getenv('USER_VECTOR_CACHE_MAX_MB', '256'))  # per process
+USER_VECTOR_CACHE_MAX_POINTS = int(os.getenv('USER_VECTOR_CACHE_MAX_POINTS', '20000'))  # larger users go to Qdrant
+USER_VECTOR_CACHE_TTL = int(os.getenv('USER_VECTOR_CACHE_TTL', '600'))  # seconds
+
+# Redis cache of semantic search responses, keyed on the user's generation
+SEARCH_RESULT_CACHE_ENABLED = os.getenv('SEARCH_RESULT_CACHE_ENABLED', 'True') == 'True'
+SEARCH_RESULT_CACHE_REDIS_URL = os.getenv('SEARCH_RESULT_CACHE_REDIS_URL', USER_GENERATION_REDIS_URL)
+SEARCH_RESULT_CACHE_TTL = int(os.getenv('SEARCH_RESULT_CACHE_TTL', '300'))  # seconds
+
+# Blue/green re-embedding (reembed_collection)
+REEMBED_BATCH_SIZE = int(os.getenv('REEMBED_BATCH_SIZE', '64'))  # documents per backfill batch
+REEMBED_THROTTLE_SECONDS = float(os.getenv('REEMBED_THROTTLE_SECONDS', '2.0'))  # pause between batches
+REEMBED_QUEUE = os.getenv('REEMBED_QUEUE', '')  # Celery queue for backfill batches (empty = default)
+
+# Vector transport (Celery embed -> index messages, /api/v1/embed/)
+EMBEDDING_TRANSPORT_DTYPE = os.getenv('EMBEDDING_TRANSPORT_DTYPE', 'float32')  # float32 or float16
+EMBED_MAX_TEXTS = int(os.getenv('EMBED_MAX_TEXTS', '256'))  # texts per /api/v1/embed/ request
+
+# Background health probes (/api/v1/health/ready/)
+HEALTH_PROBES_ENABLED = os.getenv('HEALTH_PROBES_ENABLED', 'True') == 'True'
+HEALTH_PROBE_INTERVAL = float(os.getenv('HEALTH_PROBE_INTERVAL', '10'))  # seconds between checks of each dependency
+HEALTH_MODEL_PROBE_INTERVAL = float(os.getenv('HEALTH_MODEL_PROBE_INTERVAL', '30'))  # seconds, embedding model
+HEALTH_PROBE_TIMEOUT = float(os.getenv('HEALTH_PROBE_TIMEOUT', '2'))  # seconds before a check counts as failed
+HEALTH_REQUIRED_PROBES = os.getenv('HEALTH_REQUIRED_PROBES', 'database,qdrant,mongodb,embedding_model').split(',')
+HEALTH_HISTORY_SIZE = int(os.getenv('HEALTH_HISTORY_SIZE', '360'))  # latency samples kept per dependency
+
+# Stage timing (Server-Timing header, /metrics)
+INSTRUMENTATION_ENABLED = os.getenv('INSTRUMENTATION_ENABLED', 'True') == 'True'
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'True') == 'True'  # expose stage timings to clients
 
 # Express API
 EXPRESS_API_URL = os.getenv('EXPRESS_API_URL', 'http://cosmic-backend:5000')
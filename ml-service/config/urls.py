@@ -15,6 +15,16 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/', include(router.urls)),
     path('api/v1/search/', views.SemanticSearchView.as_view(), name='semantic-search'),
+    path('api/v1/search/async/', views.AsyncSemanticSearchView.as_view(), name='semantic-search-async'),
+    path('api/v1/search/batch/', views.BatchSemanticSearchView.as_view(), name='semantic-search-batch'),
+    path('api/v1/recommend/', views.RecommendView.as_view(), name='recommend'),
+    path('api/v1/embed/', views.EmbedView.as_view(), name='embed'),
+    path('api/v1/similarity/', views.SimilarityView.as_view(), name='similarity'),
     path('api/v1/sync/', views.SyncJournalEntriesView.as_view(), name='sync-journals'),
     path('api/v1/health/', views.HealthCheckView.as_view(), name='health-check'),
+    path('api/v1/health/live/', views.HealthLiveView.as_view(), name='health-live'),
+    path('api/v1/health/ready/', views.HealthReadyView.as_view(), name='health-ready'),
+    path('api/v1/health/history/', views.HealthHistoryView.as_view(), name='health-history'),
+    path('api/v1/stats/', views.StatsView.as_view(), name='stats'),
+    path('metrics', views.MetricsView.as_view(), name='metrics'),
 ]
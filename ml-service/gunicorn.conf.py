@@ -0,0 +1,54 @@
+"""
+Gunicorn configuration for ML Service
+
+Command-line flags in the Dockerfile take precedence over these values.
+"""
+import gc
+import itertools
+import os
+
+# EMBEDDING_WEIGHTS_MODE=preload loads the model in the master (AppConfig.ready)
+# before forking, so workers share the weight pages copy-on-write
+preload_app = os.getenv('EMBEDDING_WEIGHTS_MODE', 'default') == 'preload'
+
+
+def when_ready(server):
+    if preload_app:
+        # Keep the garbage collector from touching (and un-sharing) preloaded objects
+        gc.freeze()
+
+
+def pre_fork(server, worker):
+    """Give each worker the lowest free slot, so a replacement takes over its predecessor's CPUs"""
+    taken = {getattr(other, 'slot', None) for other in server.WORKERS.values()}
+    worker.slot = next(slot for slot in itertools.count() if slot not in taken)
+
+
+def post_fork(server, worker):
+    """
+    Drop network clients inherited from the master; each worker reconnects
+
+    QdrantService detects the fork itself (per-process client). Embedding
+    process pools (EMBEDDING_EXECUTOR=process) split the host's CPUs by
+    worker count and slot.
+    """
+    os.environ['EMBEDDING_POOL_WORKERS'] = str(server.num_workers)
+    os.environ['EMBEDDING_POOL_SLOT'] = str(worker.slot)
+
+    if not preload_app:
+        return
+
+    from app.services.minio_service import MinIOService
+    from app.services.mongo_service import MongoService
+
+    MinIOService()._client = None
+    mongo_service = MongoService()
+    mongo_service._client = None
+    mongo_service._db = None
+
+
+def post_worker_init(worker):
+    """Start the background health probers once the worker has loaded the app"""
+    from app.services.health import HealthMonitor
+
+    HealthMonitor().ensure_started()